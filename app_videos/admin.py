@@ -8,6 +8,11 @@ Key Components:
       category choice field, ensuring no uncategorized videos are created.
     • VideoAdmin – The associated admin interface configuration that applies
       the custom form and simplifies video management for administrators.
+    • VideoRenditionInline – Read-only overview of the processing state of
+      every HLS rendition of a video.
+    • UploadSessionAdmin – Read-only overview of resumable API uploads.
+    • EncodingProfileAdmin – Editable encoding ladders (renditions, codec,
+      preset, segment length) with per-category and default profiles.
 
 The configuration improves data consistency, user experience, and complies
 with internal data validation standards used throughout the application.
@@ -15,7 +20,7 @@ with internal data validation standards used throughout the application.
 
 from django import forms
 from django.contrib import admin
-from .models import Video, CATEGORY_CHOICES
+from .models import EncodingProfile, EncodingRendition, UploadSession, Video, VideoRendition, CATEGORY_CHOICES
 
 
 class VideoAdminForm(forms.ModelForm):
@@ -34,6 +39,42 @@ class VideoAdminForm(forms.ModelForm):
         model = Video
         fields = "__all__"
 
+class VideoRenditionInline(admin.TabularInline):
+    """
+    Shows which renditions of a video are completed and how many segments were written.
+    """
+    model = VideoRendition
+    extra = 0
+    can_delete = False
+    readonly_fields = ("name", "segments_completed", "completed_at", "updated_at")
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Video)
 class VideoAdmin(admin.ModelAdmin):
-    form = VideoAdminForm
\ No newline at end of file
+    form = VideoAdminForm
+    inlines = [VideoRenditionInline]
+    readonly_fields = ("duration", "width", "height", "frame_rate", "video_codec", "audio_codec", "bitrate", "content_hash", "processed_at",
+                       "published_at", "complexity_bitrate", "bitrate_ladder", "thumbnail_variants")
+
+
+class EncodingRenditionInline(admin.TabularInline):
+    """
+    Edits the renditions (resolution and bitrates) of an encoding profile's ladder.
+    """
+    model = EncodingRendition
+    extra = 0
+
+
+@admin.register(EncodingProfile)
+class EncodingProfileAdmin(admin.ModelAdmin):
+    inlines = [EncodingRenditionInline]
+    list_display = ("name", "category", "is_default", "video_codec", "preset", "segment_seconds", "separate_audio")
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ("id", "filename", "owner", "offset", "size", "video", "updated_at")
+    readonly_fields = ("id", "owner", "filename", "size", "offset", "video", "created_at", "updated_at")
@@ -0,0 +1,17 @@
+from rest_framework.permissions import BasePermission
+
+from .tokens import PLAYBACK_TOKEN_PARAM, verify_playback_token
+
+
+class HasPlaybackToken(BasePermission):
+    """
+    Grants access to the media of a video to requests carrying a valid playback token.
+
+    The token is read from the `token` query parameter and checked against the
+    `pk` URL argument of the view. No user is loaded, so the check needs no
+    database query (see app_videos.api.tokens).
+    """
+    message = "Missing, invalid or expired playback token."
+
+    def has_permission(self, request, view):
+        return verify_playback_token(request.query_params.get(PLAYBACK_TOKEN_PARAM), view.kwargs["pk"])
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from django.conf import settings
-from app_videos.models import Video
+from app_videos.models import UploadSession, Video
 from rest_framework.reverse import reverse
 
 class VideoListSerializer(serializers.ModelSerializer):
@@ -10,14 +10,50 @@ class VideoListSerializer(serializers.ModelSerializer):
     Methods:
         get_thumbnail_url(obj):
             Constructs the absolute URL for the video's thumbnail, considering the request context.
+        get_thumbnail_srcset(obj):
+            Returns a srcset string of the resized thumbnail variants per image format.
     """
     thumbnail_url = serializers.SerializerMethodField()
+    thumbnail_srcset = serializers.SerializerMethodField()
     class Meta:
         model = Video
-        fields = ['id', 'created_at', 'title', 'description', 'thumbnail_url', 'category']
+        fields = ['id', 'created_at', 'title', 'description', 'thumbnail_url', 'thumbnail_srcset', 'category']
 
     def get_thumbnail_url(self, obj):
         if not obj.thumbnail:
             return None
         request = self.context.get("request")
-        return reverse("video-thumbnail", args=[obj.pk], request=request)
\ No newline at end of file
+        return reverse("video-thumbnail", args=[obj.pk], request=request)
+
+    def get_thumbnail_srcset(self, obj):
+        """
+        Returns e.g. {'webp': '<url> 320w, <url> 640w'}, ready for a <source srcset> per image format.
+        """
+        request = self.context.get("request")
+        return {
+            fmt: ", ".join(
+                f"{reverse('video-thumbnail-variant', args=[obj.pk, int(width), fmt], request=request)} {width}w"
+                for width in sorted(widths, key=int)
+            )
+            for fmt, widths in obj.thumbnail_variants.items()
+        }
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """
+    Serializer for creating and reading resumable upload sessions.
+
+    The client provides the file name, total size and the metadata of the video
+    that is created on finalize; offset and video are read-only.
+    """
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'filename', 'size', 'offset', 'title', 'description', 'category', 'video', 'created_at']
+        read_only_fields = ['id', 'offset', 'video', 'created_at']
+
+    def validate_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("The upload must not be empty.")
+        if value > settings.VIDEO_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(f"The upload must not exceed {settings.VIDEO_UPLOAD_MAX_SIZE} bytes.")
+        return value
@@ -0,0 +1,77 @@
+"""
+tokens.py
+---------
+Signed playback tokens for HLS segment URLs.
+
+When a media playlist is served to an authenticated user, a short-lived token
+scoped to the video is appended to every segment URI (`?token=<expires>.<signature>`).
+The segment view then only checks the HMAC-SHA256 signature and the expiry,
+without JWT verification or a database query, and a CDN or proxy holding the
+same key can validate the token as well:
+
+    signature = base64url(HMAC-SHA256(key, "<video_id>:<expires>")), without padding
+
+Expiry times are rounded up to PLAYBACK_TOKEN_EXPIRY_STEP, so all playlists of
+a video served within that step carry the same segment URLs, which browsers
+and proxies can then cache.
+
+Constants:
+    PLAYBACK_TOKEN_PARAM (str): Query parameter carrying the token.
+    PLAYBACK_TOKEN_EXPIRY_STEP (int): Granularity of the token expiry times in seconds.
+
+Functions:
+    sign_playback(video_id, expires): Returns the signature of a video id and expiry timestamp.
+    issue_playback_token(video_id, ttl): Returns a token for a video, valid for at least `ttl` seconds.
+    verify_playback_token(token, video_id): Checks the signature and expiry of a token.
+"""
+
+import base64
+import hashlib
+import hmac
+import math
+import time
+
+from django.conf import settings
+
+
+PLAYBACK_TOKEN_PARAM = "token"
+PLAYBACK_TOKEN_EXPIRY_STEP = 3600
+
+
+def sign_playback(video_id, expires):
+    """
+    Returns the base64url HMAC-SHA256 signature of '<video_id>:<expires>'.
+
+    The key is settings.VIDEO_PLAYBACK_TOKEN_KEY, or SECRET_KEY when it is not configured.
+    """
+    key = (settings.VIDEO_PLAYBACK_TOKEN_KEY or settings.SECRET_KEY).encode()
+    digest = hmac.new(key, f"{video_id}:{expires}".encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def issue_playback_token(video_id, ttl=None):
+    """
+    Returns a playback token for a video.
+
+    Args:
+        video_id (int): The video the token grants access to.
+        ttl (int, optional): Minimum lifetime in seconds; settings.VIDEO_PLAYBACK_TOKEN_TTL when omitted.
+            The expiry is rounded up to the next multiple of PLAYBACK_TOKEN_EXPIRY_STEP.
+
+    Returns:
+        str: '<expires>.<signature>', where `expires` is a Unix timestamp.
+    """
+    ttl = settings.VIDEO_PLAYBACK_TOKEN_TTL if ttl is None else ttl
+    expires = math.ceil((time.time() + ttl) / PLAYBACK_TOKEN_EXPIRY_STEP) * PLAYBACK_TOKEN_EXPIRY_STEP
+    return f"{expires}.{sign_playback(video_id, expires)}"
+
+
+def verify_playback_token(token, video_id):
+    """
+    Returns True if `token` was issued for `video_id` and has not expired.
+    """
+    expires, _, signature = (token or "").partition(".")
+    # isdigit() alone also accepts non-ASCII digits such as '²', which int() rejects
+    if not (expires.isascii() and expires.isdigit()) or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(signature, sign_playback(video_id, int(expires)))
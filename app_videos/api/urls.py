@@ -1,9 +1,20 @@
 from django.urls import path
-from .views import VideoListView, ServeHLSPlaylistView, ServeHLSSegmentView, ServeThumbnailView
+from .views import (
+    VideoListView, ServeHLSMasterPlaylistView, ServeHLSPlaylistView, ServeHLSSegmentView,
+    ServeThumbnailView, ServeThumbnailVariantView, ServeTrickplayView, TranscodeProgressView,
+    UploadSessionCreateView, UploadSessionFinalizeView, UploadSessionView,
+)
 
 urlpatterns = [
     path('video/', VideoListView.as_view(), name="video-list"),
+    path("upload/", UploadSessionCreateView.as_view(), name="upload-create"),
+    path("upload/<uuid:pk>/", UploadSessionView.as_view(), name="upload-session"),
+    path("upload/<uuid:pk>/finalize/", UploadSessionFinalizeView.as_view(), name="upload-finalize"),
     path("video/<int:pk>/thumbnail/", ServeThumbnailView.as_view(), name="video-thumbnail"),
+    path("video/<int:pk>/thumbnail/<int:width>/<str:fmt>/", ServeThumbnailVariantView.as_view(), name="video-thumbnail-variant"),
+    path("video/<int:pk>/trickplay/<str:filename>", ServeTrickplayView.as_view(), name="video-trickplay"),
+    path("video/<int:pk>/progress/", TranscodeProgressView.as_view(), name="video-progress"),
+    path("video/<int:pk>/master.m3u8", ServeHLSMasterPlaylistView.as_view(), name="video-master-playlist"),
     path('video/<int:pk>/<str:resolution>/index.m3u8', ServeHLSPlaylistView.as_view(), name='serve_hls_playlist'),
     path('video/<int:pk>/<str:resolution>/<str:segment>', ServeHLSSegmentView.as_view(), name='serve_hls_segment'),
 ]
@@ -0,0 +1,334 @@
+"""
+media_utils.py
+--------------
+Helpers for serving media files (HLS playlists, segments, thumbnails) from the API views
+and for writing resumable upload chunks to disk.
+
+Media files are delivered according to settings.VIDEO_DELIVERY_BACKEND: 'django'
+streams the bytes from the worker, 'x-accel-redirect' (nginx) and 'x-sendfile'
+(Apache mod_xsendfile, lighttpd) only return a header naming the file, and the
+front proxy sends it. Authentication and path resolution stay in the views.
+
+Every media response carries the Cache-Control policy of its kind
+(settings.VIDEO_CACHE_CONTROL) and ETag / Last-Modified validators, so
+If-None-Match / If-Modified-Since requests are answered with 304 Not Modified.
+
+Constants:
+    MAX_RANGES (int): Maximum number of ranges served per request.
+
+Functions:
+    parse_range_header(header, size): Parses an HTTP Range header with one or more ranges.
+    iter_file_range(path, start, length): Streams a byte range of a file in chunks.
+    multipart_part_header(boundary, content_type, start, end, size): Returns the headers of a multipart/byteranges part.
+    iter_multipart_ranges(path, ranges, size, content_type, boundary): Streams a multipart/byteranges body.
+    if_range_passes(request, etag, last_modified): Checks the If-Range precondition of a request.
+    range_response(request, path, stat, content_type, etag): Returns the 200, 206 or 416 response for a Range header.
+    file_etag(stat): Returns the ETag of a file from its size and modification time.
+    conditional_response(request, etag, last_modified, cache_policy, build_response): Answers conditional requests with 304.
+    offload_response(path, content_type): Returns a response handing the transfer of a file to the front proxy.
+    serve_file(request, path, content_type, cache_policy): Returns a (partial) streaming response for a media file.
+    append_request_body(stream, path, offset, length): Writes a request body into a file at an offset in chunks.
+"""
+
+import os
+import re
+import uuid
+from pathlib import Path
+from urllib.parse import quote
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+
+RANGE_SPEC_RE = re.compile(r"^(\d*)-(\d*)$")
+STREAM_CHUNK_SIZE = 64 * 1024
+# Ranges served per request at most; requests for more (after merging overlaps) get the full file
+MAX_RANGES = 16
+
+
+def parse_range_header(header, size):
+    """
+    Parses a `Range: bytes=...` header with one or more ranges.
+
+    Overlapping and adjacent ranges are merged, ranges starting beyond the end
+    of the file are dropped.
+
+    Args:
+        header (str): Value of the Range header, or None.
+        size (int): Size of the requested file in bytes.
+
+    Returns:
+        list: Sorted inclusive (start, end) byte positions; empty if no range is
+        satisfiable (416). None if the header is missing or malformed, in which
+        case it is ignored and the full file is served.
+    """
+    unit, _, specs = (header or "").partition("=")
+    if unit.strip().lower() != "bytes" or not specs.strip():
+        return None
+
+    ranges = []
+    for spec in filter(None, (part.strip() for part in specs.split(","))):
+        match = RANGE_SPEC_RE.match(spec)
+        if not match or match.groups() == ("", ""):
+            return None
+
+        first, last = match.groups()
+        if first:
+            start = int(first)
+            if last and int(last) < start:
+                return None
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            # Suffix range: the last N bytes
+            start = max(size - int(last), 0)
+            end = size - 1
+
+        if start <= end:
+            ranges.append((start, end))
+
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def iter_file_range(path, start, length, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yields `length` bytes of a file starting at `start`, without reading the whole range into memory.
+    """
+    with open(path, "rb") as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def multipart_part_header(boundary, content_type, start, end, size):
+    """
+    Returns the boundary line and headers of one part of a `multipart/byteranges` body.
+    """
+    return (
+        f"--{boundary}\r\nContent-Type: {content_type}\r\n"
+        f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+    ).encode()
+
+
+def iter_multipart_ranges(path, ranges, size, content_type, boundary):
+    """
+    Yields a `multipart/byteranges` body with one part per range, streaming the file contents.
+    """
+    for start, end in ranges:
+        yield multipart_part_header(boundary, content_type, start, end, size)
+        yield from iter_file_range(path, start, end - start + 1)
+        yield b"\r\n"
+    yield f"--{boundary}--\r\n".encode()
+
+
+def if_range_passes(request, etag, last_modified):
+    """
+    Returns True if the request has no `If-Range` header or it matches the current file.
+
+    If-Range holds either a strong ETag or the exact Last-Modified date; if the
+    file changed, the Range header is ignored and the full file is sent.
+    """
+    value = request.META.get("HTTP_IF_RANGE")
+    if not value:
+        return True
+    if value.startswith('"'):
+        return value == etag
+    return parse_http_date_safe(value) == int(last_modified)
+
+
+def range_response(request, path, stat, content_type, etag):
+    """
+    Returns a streaming response for the `Range` header of a request.
+
+    Returns:
+        HttpResponse: 206 with the single range, 206 `multipart/byteranges` for
+        several ranges, 416 if no range is satisfiable, or a 200 FileResponse
+        without (or with an ignored) Range header.
+    """
+    ranges = None
+    if if_range_passes(request, etag, stat.st_mtime):
+        ranges = parse_range_header(request.META.get("HTTP_RANGE"), stat.st_size)
+
+    if ranges is None or len(ranges) > MAX_RANGES:
+        response = FileResponse(open(path, "rb"), content_type=content_type)
+    elif not ranges:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{stat.st_size}"
+    elif len(ranges) == 1:
+        start, end = ranges[0]
+        length = end - start + 1
+        response = StreamingHttpResponse(iter_file_range(path, start, length), status=206, content_type=content_type)
+        response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+        response["Content-Length"] = str(length)
+    else:
+        boundary = uuid.uuid4().hex
+        response = StreamingHttpResponse(
+            iter_multipart_ranges(path, ranges, stat.st_size, content_type, boundary),
+            status=206, content_type=f"multipart/byteranges; boundary={boundary}",
+        )
+        response["Content-Length"] = str(len(f"--{boundary}--\r\n") + sum(
+            len(multipart_part_header(boundary, content_type, start, end, stat.st_size)) + end - start + 1 + 2
+            for start, end in ranges
+        ))
+
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+def file_etag(stat):
+    """
+    Returns the strong ETag '"<mtime hex>-<size hex>"' of a file.
+
+    This is the format nginx uses, so the ETag does not change when the
+    delivery is offloaded to it (see offload_response).
+    """
+    return f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+
+
+def conditional_response(request, etag, last_modified, cache_policy, build_response):
+    """
+    Returns a 304 Not Modified response if the client's copy is current, else the built response.
+
+    Either way, the response carries the validators and the Cache-Control
+    header of `cache_policy`, so clients and proxies can revalidate it later.
+
+    Args:
+        request (HttpRequest): The incoming request.
+        etag (str): Quoted ETag of the current representation.
+        last_modified (float): Modification time as a Unix timestamp, or None for
+            generated content that may change without the file changing (no
+            Last-Modified is sent and If-Modified-Since is ignored).
+        cache_policy (str): Key of settings.VIDEO_CACHE_CONTROL ('segment', 'playlist' or 'thumbnail').
+        build_response (Callable): Returns the full response; only called when it is needed.
+
+    Returns:
+        HttpResponse: 304 Not Modified, 412 Precondition Failed or the built response;
+        only 200, 206 and 304 responses get the validators and Cache-Control.
+    """
+    if last_modified is not None:
+        last_modified = int(last_modified)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = build_response()
+    if response.status_code not in (200, 206, 304):
+        # Errors (412, 416) must not be cached under the media policy
+        return response
+
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    response["Cache-Control"] = settings.VIDEO_CACHE_CONTROL[cache_policy]
+    return response
+
+
+def offload_response(path, content_type):
+    """
+    Returns an empty response that hands the transfer of a file to the front proxy.
+
+    nginx receives `X-Accel-Redirect: <VIDEO_ACCEL_REDIRECT_PREFIX><path below MEDIA_ROOT>`,
+    which must map to an `internal` location aliasing MEDIA_ROOT; Apache and
+    lighttpd receive `X-Sendfile: <absolute path>`. The proxy answers Range
+    requests itself and keeps the Content-Type set here.
+
+    Args:
+        path (Path): Path of the existing file to serve.
+        content_type (str): Content type of the response.
+
+    Returns:
+        HttpResponse: The offload response, or None if Django delivers the file itself
+        (backend 'django') or the file is not below MEDIA_ROOT (the proxy only exposes MEDIA_ROOT).
+    """
+    backend = settings.VIDEO_DELIVERY_BACKEND
+    if backend not in ("x-accel-redirect", "x-sendfile"):
+        return None
+
+    media_root = Path(settings.MEDIA_ROOT).resolve()
+    path = Path(path).resolve()
+    if media_root not in path.parents:
+        return None
+
+    response = HttpResponse(content_type=content_type)
+    if backend == "x-accel-redirect":
+        prefix = settings.VIDEO_ACCEL_REDIRECT_PREFIX.rstrip("/")
+        response["X-Accel-Redirect"] = f"{prefix}/{quote(path.relative_to(media_root).as_posix())}"
+    else:
+        response["X-Sendfile"] = str(path)
+    return response
+
+
+def serve_file(request, path, content_type, cache_policy):
+    """
+    Serves a media file, honouring conditional requests and `Range` / `If-Range` request headers.
+
+    Byte-range requests are needed by single-file HLS renditions, whose playlists
+    address every segment as a byte range of one media file, and by clients
+    resuming interrupted downloads (see range_response). With an offloading
+    VIDEO_DELIVERY_BACKEND the front proxy sends the file (see offload_response).
+
+    Args:
+        request (HttpRequest): The incoming request.
+        path (Path): Path of the existing file to serve.
+        content_type (str): Content type of the response.
+        cache_policy (str): Key of settings.VIDEO_CACHE_CONTROL applying to the file.
+
+    Returns:
+        HttpResponse: 304 Not Modified if the client's copy is current, an offload response,
+        or the (partial) content response of range_response.
+    """
+    stat = path.stat()
+    etag = file_etag(stat)
+
+    def build_response():
+        response = offload_response(path, content_type)
+        if response is None:
+            response = range_response(request, path, stat, content_type, etag)
+        return response
+
+    return conditional_response(request, etag, stat.st_mtime, cache_policy, build_response)
+
+
+def append_request_body(stream, path, offset, length, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Writes up to `length` bytes of a request body into a file at `offset`, without buffering the body in memory.
+
+    Bytes after `offset` (left over from an interrupted earlier write that was
+    never acknowledged) are discarded first. If the client disconnects, the
+    bytes received so far are kept and counted.
+
+    Args:
+        stream: File-like request body (e.g. `request.stream`).
+        path (str | Path): Existing partial upload file.
+        offset (int): Position to write at, i.e. the bytes already acknowledged.
+        length (int): Number of body bytes to read at most.
+        chunk_size (int): Read/write block size.
+
+    Returns:
+        int: Number of bytes written.
+    """
+    written = 0
+    with open(path, "r+b") as file:
+        file.seek(offset)
+        file.truncate()
+        while written < length:
+            try:
+                chunk = stream.read(min(chunk_size, length - written))
+            except OSError:
+                # Client disconnected (UnreadablePostError is an OSError)
+                break
+            if not chunk:
+                break
+            file.write(chunk)
+            written += len(chunk)
+        file.flush()
+        os.fsync(file.fileno())
+    return written
@@ -1,13 +1,44 @@
-from rest_framework.permissions import IsAuthenticated
-from rest_framework import generics
-from app_videos.models import Video
+import hashlib
+import os
+from functools import partial
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework import generics, status
+from app_videos.models import EncodingProfile, UploadSession, Video
 from app_auth.api.views import CookieJWTAuthentication
-from .serializers import VideoListSerializer
+from .serializers import UploadSessionSerializer, VideoListSerializer
 from pathlib import Path
-from django.http import FileResponse, Http404
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.http import Http404, HttpResponse
+from django.utils.http import quote_etag, urlencode
 from django.conf import settings
+from django.utils.text import get_valid_filename
 from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
 from drf_spectacular.utils import extend_schema, OpenApiResponse
+from app_videos.hls import append_uri_query
+from app_videos.playlist_cache import get_playlist
+from app_videos.progress import get_progress
+from app_videos.thumbnails import THUMBNAIL_FORMATS
+from app_videos.trickplay import TRICKPLAY_DIR
+from .permissions import HasPlaybackToken
+from .tokens import PLAYBACK_TOKEN_PARAM, issue_playback_token
+from .utils import append_request_body, conditional_response, serve_file
+
+
+# Content types of HLS media segments by file extension
+SEGMENT_CONTENT_TYPES = {
+    ".ts": "video/mp2t",
+    ".m4s": "video/iso.segment",
+    ".mp4": "video/mp4",
+}
+
+# Content types of the trickplay files (WebVTT index and JPEG sprite sheets)
+TRICKPLAY_CONTENT_TYPES = {
+    ".vtt": "text/vtt",
+    ".jpg": "image/jpeg",
+}
 
 
 @extend_schema(
@@ -36,6 +67,36 @@ class VideoListView(generics.ListAPIView):
     queryset = Video.objects.all()
 
 
+@extend_schema(
+    tags=["Videos"],
+    summary="Serve the HLS master playlist (master.m3u8)",
+    description=(
+        "Retrieves the master playlist of a video. It lists every transcoded rendition with its measured "
+        "BANDWIDTH, AVERAGE-BANDWIDTH, CODECS, RESOLUTION and FRAME-RATE, in ascending bandwidth order."
+    ),
+    responses={
+        200: OpenApiResponse(description="Master playlist returned successfully."),
+        401: OpenApiResponse(description="Unauthorized – missing or invalid authentication."),
+        404: OpenApiResponse(description="Master playlist not found (video not processed yet)."),
+    },
+)
+class ServeHLSMasterPlaylistView(APIView):
+    """
+    Serves the HLS master playlist used by players to choose between the renditions of a video.
+
+    **Expected File Path:**  
+    `MEDIA_ROOT/video/<video_id>/master.m3u8`
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        file_path = Path(settings.MEDIA_ROOT) / f"video/{pk}/master.m3u8"
+        if not file_path.exists():
+            raise Http404("HLS master playlist not found.")
+        return serve_file(request, file_path, 'application/vnd.apple.mpegurl', "playlist")
+
+
 @extend_schema(
     tags=["Videos"],
     summary="Serve an HLS playlist file (.m3u8)",
@@ -55,6 +116,8 @@ class ServeHLSPlaylistView(APIView):
 
     This endpoint streams the `.m3u8` playlist used by clients to initiate adaptive bitrate playback.  
     If the file does not exist in the expected directory path, a 404 HTTP error is returned.  
+    Every segment URI is signed with a playback token of the video, which authorizes the segment requests.  
+    Finished playlists are read from the playlist cache (see app_videos.playlist_cache), not from disk.
 
     **Expected File Path:**  
     `MEDIA_ROOT/video/<video_id>/<resolution>/index.m3u8`
@@ -63,43 +126,61 @@ class ServeHLSPlaylistView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, pk, resolution):
-        file_path = Path(settings.MEDIA_ROOT) / f"video/{pk}/{resolution}/index.m3u8"
-        if not file_path.exists():
+        cached = get_playlist(pk, resolution)
+        if cached is None:
             raise Http404("HLS playlist not found.")
-        return FileResponse(open(file_path, 'rb'), content_type='application/vnd.apple.mpegurl')
+        text, _ = cached
+        query = urlencode({PLAYBACK_TOKEN_PARAM: issue_playback_token(pk)})
+        playlist = append_uri_query(text, query).encode()
+        # The signed URIs change when the token rotates while the file does not, so only
+        # the content ETag validates the response (no Last-Modified / If-Modified-Since)
+        etag = quote_etag(hashlib.md5(playlist, usedforsecurity=False).hexdigest())
+        return conditional_response(
+            request, etag, None, "playlist",
+            lambda: HttpResponse(playlist, content_type='application/vnd.apple.mpegurl'),
+        )
 
 
 @extend_schema(
     tags=["Videos"],
-    summary="Serve an HLS video segment (.ts)",
+    summary="Serve an HLS video segment (.ts, .m4s) or fMP4 init segment (.mp4)",
     description=(
         "Provides access to a specific HLS video segment file, which is part of the adaptive streaming structure. "
-        "Clients use these segment files to stream video data chunk by chunk."
+        "Clients use these segment files to stream video data chunk by chunk. "
+        "Single-file renditions are fetched with HTTP Range requests. "
+        "Access is granted by the signed `token` query parameter that the media playlist adds to every segment URI."
     ),
     responses={
         200: OpenApiResponse(description="HLS video segment successfully returned."),
-        401: OpenApiResponse(description="Unauthorized – authentication token invalid or missing."),
+        206: OpenApiResponse(description="Requested byte range(s) of the segment file returned (multipart/byteranges for several ranges)."),
+        403: OpenApiResponse(description="Forbidden – playback token missing, invalid or expired."),
+        416: OpenApiResponse(description="None of the requested byte ranges lies within the file."),
         404: OpenApiResponse(description="Requested video segment not found."),
     },
 )
 class ServeHLSSegmentView(APIView):
     """
-    Serves an individual HLS video segment (.ts file) for playback.
+    Serves an individual HLS video segment (.ts or CMAF .m4s file, or an fMP4 init segment) for playback.
 
     Segments are part of the HLS streaming protocol and are requested sequentially by video players.  
-    Each segment represents a small piece (usually a few seconds) of the full video.
+    Each segment represents a small piece (usually a few seconds) of the full video.  
+    Single-file renditions store all segments in one file, so byte-range requests are answered with 206
+    (several ranges as `multipart/byteranges`, unsatisfiable ranges with 416).  
+    Requests are authorized by the playback token of the segment URI (see ServeHLSPlaylistView) instead of
+    the JWT cookie, so no user is loaded.
 
     **Expected File Path:**  
-    `MEDIA_ROOT/video/<video_id>/<resolution>/<segment_name>.ts`
+    `MEDIA_ROOT/video/<video_id>/<resolution>/<segment_name>.ts|.m4s|.mp4?token=<playback token>`
     """
-    authentication_classes = [CookieJWTAuthentication]
-    permission_classes = [IsAuthenticated]
+    authentication_classes = []
+    permission_classes = [HasPlaybackToken]
 
     def get(self, request, pk, resolution, segment):
         file_path = Path(settings.MEDIA_ROOT) / f"video/{pk}/{resolution}/{segment}"
         if not file_path.exists():
             raise Http404("Segment not found.")
-        return FileResponse(open(file_path, 'rb'), content_type='video/mp2t')
+        content_type = SEGMENT_CONTENT_TYPES.get(file_path.suffix.lower(), 'video/mp2t')
+        return serve_file(request, file_path, content_type, "segment")
 
 
 class ServeThumbnailView(APIView):
@@ -121,4 +202,278 @@ class ServeThumbnailView(APIView):
 
         # content type
         ctype = "image/png" if path.suffix.lower() == ".png" else "image/jpeg"
-        return FileResponse(open(path, "rb"), content_type=ctype)
\ No newline at end of file
+        return serve_file(request, path, ctype, "thumbnail")
+
+
+@extend_schema(
+    tags=["Videos"],
+    summary="Serve a resized thumbnail variant",
+    description=(
+        "Returns one responsive variant of a video's thumbnail in the requested format (webp, avif or jpeg) "
+        "and width in pixels. The available variants are listed in `thumbnail_srcset` of the video list."
+    ),
+    responses={
+        200: OpenApiResponse(description="Thumbnail variant returned successfully."),
+        401: OpenApiResponse(description="Unauthorized – missing or invalid authentication."),
+        404: OpenApiResponse(description="Video or thumbnail variant not found."),
+    },
+)
+class ServeThumbnailVariantView(APIView):
+    """
+    Serves a resized, compressed thumbnail variant written by the processing pipeline.
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk, width, fmt):
+        try:
+            video = Video.objects.get(pk=pk)
+        except Video.DoesNotExist:
+            raise Http404("Video not found")
+
+        variant = video.thumbnail_variants.get(fmt, {}).get(str(width))
+        if not variant:
+            raise Http404("Thumbnail variant not available")
+
+        path = Path(settings.MEDIA_ROOT) / variant
+        if not path.exists():
+            raise Http404("Thumbnail variant file missing")
+        return serve_file(request, path, THUMBNAIL_FORMATS[fmt]["content_type"], "thumbnail")
+
+
+@extend_schema(
+    tags=["Videos"],
+    summary="Serve trickplay seek previews (WebVTT index or sprite sheet)",
+    description=(
+        "Returns the WebVTT thumbnail track (thumbnails.vtt) of a video or one of the JPEG sprite sheets it "
+        "references. Each cue maps a time range to a tile of a sprite sheet (`sprite_000.jpg#xywh=x,y,w,h`), "
+        "so players can show seek previews without downloading media segments."
+    ),
+    responses={
+        200: OpenApiResponse(description="Trickplay file returned successfully."),
+        401: OpenApiResponse(description="Unauthorized – missing or invalid authentication."),
+        404: OpenApiResponse(description="Trickplay file not found."),
+    },
+)
+class ServeTrickplayView(APIView):
+    """
+    Serves the trickplay WebVTT index and sprite sheets of a video.
+
+    **Expected File Path:**  
+    `MEDIA_ROOT/video/<video_id>/trickplay/<filename>`
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk, filename):
+        file_path = Path(settings.MEDIA_ROOT) / f"video/{pk}/{TRICKPLAY_DIR}/{filename}"
+        content_type = TRICKPLAY_CONTENT_TYPES.get(file_path.suffix.lower())
+        if content_type is None or not file_path.is_file():
+            raise Http404("Trickplay file not found.")
+        return serve_file(request, file_path, content_type, "thumbnail")
+
+
+@extend_schema(
+    tags=["Videos"],
+    summary="Retrieve the live transcode progress of a video",
+    description=(
+        "Returns the transcode progress of every rendition of a video while FFmpeg is running. "
+        "Each entry contains status, encoded frames, encoding speed (realtime factor), percent and ETA in seconds."
+    ),
+    responses={
+        200: OpenApiResponse(description="Progress per rendition returned successfully."),
+        401: OpenApiResponse(description="Unauthorized – missing or invalid authentication."),
+        404: OpenApiResponse(description="Video not found."),
+    },
+)
+class TranscodeProgressView(APIView):
+    """
+    Returns the per-rendition transcode progress of a video.
+
+    The progress is written to the Redis cache by the transcode workers while
+    FFmpeg runs. Renditions that have not started yet (or whose entry expired)
+    are omitted from the response.
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        try:
+            video = Video.objects.get(pk=pk)
+        except Video.DoesNotExist:
+            raise Http404("Video not found")
+
+        names = [name for name, *_ in EncodingProfile.objects.for_video(video).formats()]
+        renditions = get_progress(pk, names)
+        return Response({"video_id": pk, "renditions": renditions})
+
+
+# Content type of upload chunks (tus protocol)
+UPLOAD_CHUNK_CONTENT_TYPE = "application/offset+octet-stream"
+
+
+def upload_headers(session):
+    """
+    Returns the tus-style headers describing the state of an upload session.
+    """
+    return {"Upload-Offset": str(session.offset), "Upload-Length": str(session.size), "Cache-Control": "no-store"}
+
+
+@extend_schema(
+    tags=["Uploads"],
+    summary="Create a resumable upload session",
+    description=(
+        "Creates a chunked upload for a video file of `size` bytes. The `Location` header points to the "
+        "session, to which the file is appended with PATCH requests before it is finalized."
+    ),
+    request=UploadSessionSerializer,
+    responses={
+        201: OpenApiResponse(response=UploadSessionSerializer, description="Upload session created."),
+        400: OpenApiResponse(description="Invalid file name, size or video metadata."),
+        401: OpenApiResponse(description="Unauthorized – missing or invalid authentication."),
+        403: OpenApiResponse(description="Only staff users may upload videos."),
+    },
+)
+class UploadSessionCreateView(APIView):
+    """
+    Creates a resumable, chunked upload session (tus-style) for a new video.
+
+    The received bytes are written to `MEDIA_ROOT/uploads/<session_id>.part`.
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        serializer = UploadSessionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        session = serializer.save(owner=request.user)
+
+        os.makedirs(os.path.dirname(session.partial_path()), exist_ok=True)
+        open(session.partial_path(), "wb").close()
+
+        location = reverse("upload-session", args=[session.pk], request=request)
+        headers = {"Location": location, **upload_headers(session)}
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+
+
+@extend_schema(
+    tags=["Uploads"],
+    summary="Read, append to or abort a resumable upload",
+    description=(
+        "GET/HEAD return the current `Upload-Offset`, so an interrupted upload can continue where it stopped. "
+        "PATCH appends the request body (`Content-Type: application/offset+octet-stream`) at the offset given "
+        "in the `Upload-Offset` header; the body is streamed to disk. DELETE aborts the upload."
+    ),
+    responses={
+        200: OpenApiResponse(response=UploadSessionSerializer, description="Upload state returned."),
+        204: OpenApiResponse(description="Chunk stored (new offset in `Upload-Offset`) or upload aborted."),
+        401: OpenApiResponse(description="Unauthorized – missing or invalid authentication."),
+        404: OpenApiResponse(description="Upload session not found."),
+        409: OpenApiResponse(description="`Upload-Offset` does not match the stored offset, or the upload is finalized."),
+        413: OpenApiResponse(description="The chunk would exceed the announced upload size."),
+        415: OpenApiResponse(description="Wrong chunk content type."),
+    },
+)
+class UploadSessionView(APIView):
+    """
+    Reads the state of, appends a chunk to, or aborts a resumable upload session of the current user.
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get_session(self, request, pk, lock=False):
+        sessions = UploadSession.objects.filter(owner=request.user)
+        if lock:
+            sessions = sessions.select_for_update()
+        try:
+            return sessions.get(pk=pk)
+        except UploadSession.DoesNotExist:
+            raise Http404("Upload session not found.")
+
+    def get(self, request, pk):
+        session = self.get_session(request, pk)
+        return Response(UploadSessionSerializer(session).data, headers=upload_headers(session))
+
+    def patch(self, request, pk):
+        if request.content_type != UPLOAD_CHUNK_CONTENT_TYPE:
+            return Response({"detail": f"Content-Type must be {UPLOAD_CHUNK_CONTENT_TYPE}."}, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+        # The row lock serializes concurrent writers of the same upload
+        with transaction.atomic():
+            session = self.get_session(request, pk, lock=True)
+            if session.video_id or request.headers.get("Upload-Offset") != str(session.offset):
+                return Response({"detail": "Upload offset mismatch."}, status=status.HTTP_409_CONFLICT, headers=upload_headers(session))
+
+            length = int(request.headers.get("Content-Length") or 0)
+            if session.offset + length > session.size:
+                return Response({"detail": "Chunk exceeds the upload size."}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, headers=upload_headers(session))
+
+            session.offset += append_request_body(request.stream, session.partial_path(), session.offset, length)
+            session.save(update_fields=["offset", "updated_at"])
+
+        return Response(status=status.HTTP_204_NO_CONTENT, headers=upload_headers(session))
+
+    def delete(self, request, pk):
+        session = self.get_session(request, pk)
+        if session.video_id:
+            return Response({"detail": "The upload is already finalized."}, status=status.HTTP_409_CONFLICT)
+        if os.path.exists(session.partial_path()):
+            os.remove(session.partial_path())
+        session.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@extend_schema(
+    tags=["Uploads"],
+    summary="Finalize a resumable upload",
+    description=(
+        "Once all bytes were received, moves the file into the video storage, creates the Video and starts "
+        "its processing pipeline. Repeating the request returns the already created video."
+    ),
+    responses={
+        200: OpenApiResponse(description="The upload was already finalized; returns the video id."),
+        201: OpenApiResponse(description="Video created; returns the video id."),
+        401: OpenApiResponse(description="Unauthorized – missing or invalid authentication."),
+        404: OpenApiResponse(description="Upload session not found."),
+        409: OpenApiResponse(description="The upload is not complete yet."),
+    },
+)
+class UploadSessionFinalizeView(APIView):
+    """
+    Turns a completely received upload into a Video, which triggers the processing pipeline (see video_post_save).
+
+    The partial file is only moved into the video storage once the transaction
+    commits, so a failed request leaves it in place and can be repeated. The
+    file is not hashed here: schedule_video hashes it on a worker and reuses
+    the output of an identical, already processed video.
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def post(self, request, pk):
+        with transaction.atomic():
+            try:
+                session = UploadSession.objects.select_for_update().get(pk=pk, owner=request.user)
+            except UploadSession.DoesNotExist:
+                raise Http404("Upload session not found.")
+
+            if session.video_id:
+                return Response({"video_id": session.video_id}, status=status.HTTP_200_OK)
+            if session.offset != session.size:
+                return Response({"detail": "The upload is not complete."}, status=status.HTTP_409_CONFLICT, headers=upload_headers(session))
+
+            # Same file system as the partial file, so this is a cheap rename. Registered before the
+            # Video is created, so the file is in place before video_post_save enqueues the pipeline
+            name = default_storage.get_available_name(f"video/tmp/{get_valid_filename(session.filename)}")
+            os.makedirs(os.path.dirname(default_storage.path(name)), exist_ok=True)
+            transaction.on_commit(partial(os.replace, session.partial_path(), default_storage.path(name)))
+
+            session.video = Video.objects.create(
+                title=session.title,
+                description=session.description,
+                category=session.category,
+                video_file=name,
+            )
+            session.save(update_fields=["video", "updated_at"])
+
+        return Response({"video_id": session.video_id}, status=status.HTTP_201_CREATED)
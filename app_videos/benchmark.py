@@ -0,0 +1,288 @@
+"""
+Transcode benchmark helpers
+
+The benchmark generates synthetic source clips with FFmpeg's `lavfi` test
+sources (no sample media needs to be shipped) and runs the real processing
+tasks against them: `probe_video`, the transcode of the default encoding
+profile in the configured transcode mode (one `convert_video_to_hls_ladder` or
+`convert_video_to_hls_chunked` task, or `convert_video_to_hls` per rendition),
+`create_thumbnail` and `create_master_playlist`. Every task is measured for
+wall time, CPU time (including the FFmpeg child processes) and the peak RSS of
+the largest FFmpeg process it started; the output bytes and segments are
+counted per rendition. The report is plain JSON, so reports of two versions
+can be compared to spot regressions (see compare_reports).
+
+Each clip runs inside a database transaction that is rolled back afterwards,
+so no Video rows remain and no processing jobs are enqueued by the signals.
+
+Constants:
+    DEFAULT_CLIPS (str): Default clip specification, from cheapest to most expensive.
+    CLIP_DIR (str): Directory below MEDIA_ROOT receiving the generated clips.
+
+Classes:
+    RusagePopen: Popen that records the resource usage of the process when it is reaped.
+
+Functions:
+    parse_clip_spec(spec): Parses 'WIDTHxHEIGHT:SECONDS,...' into clip tuples.
+    generate_clip(clip_dir, width, height, duration, frame_rate): Writes a synthetic test clip, reusing an existing one.
+    measure(func, *args): Runs a function and returns its wall time, CPU time and the peak RSS of its child processes.
+    rendition_output_stats(output_dir): Returns the output bytes and segment count of a rendition.
+    run_benchmark(clips, frame_rate, mode): Benchmarks the processing tasks on synthetic clips and returns the report.
+    compare_reports(report, baseline): Returns the relative wall time change of every task against a baseline report.
+"""
+
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .hls import read_media_playlist
+from .models import EncodingProfile, Video
+from .scratch import media_dir, scratch_dir
+from .tasks import (
+    convert_video_to_hls, convert_video_to_hls_chunked, convert_video_to_hls_ladder, create_master_playlist,
+    create_thumbnail, probe_video, select_renditions,
+)
+
+
+DEFAULT_CLIPS = "640x360:10,1280x720:30,1920x1080:30"
+CLIP_DIR = "benchmark"
+
+
+def parse_clip_spec(spec):
+    """
+    Parses a clip specification such as '1280x720:30,1920x1080:60' into (width, height, seconds) tuples.
+
+    Raises:
+        ValueError: If an entry is not of the form WIDTHxHEIGHT:SECONDS.
+    """
+    clips = []
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        size, _, seconds = entry.partition(":")
+        width, _, height = size.partition("x")
+        if not (width.isdigit() and height.isdigit() and seconds.isdigit()):
+            raise ValueError(f"Invalid clip '{entry}', expected WIDTHxHEIGHT:SECONDS.")
+        clips.append((int(width), int(height), int(seconds)))
+    return clips
+
+
+def generate_clip(clip_dir, width, height, duration, frame_rate):
+    """
+    Writes an H.264/AAC test clip from the `testsrc2` and `sine` lavfi sources.
+
+    Clips are named after their parameters and reused when they already exist,
+    so repeated runs measure the same input.
+
+    Returns:
+        Path: The clip file.
+    """
+    clip_dir.mkdir(parents=True, exist_ok=True)
+    clip = clip_dir / f"testsrc_{width}x{height}_{duration}s_{frame_rate}fps.mp4"
+    if clip.exists():
+        return clip
+
+    cmd = [
+        "ffmpeg", "-y",
+        "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate={frame_rate}:duration={duration}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=48000:duration={duration}",
+        "-c:v", "libx264", "-preset", "ultrafast", "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-shortest",
+        str(clip)
+    ]
+    subprocess.run(cmd, capture_output=True, check=True)
+    return clip
+
+
+class RusagePopen(subprocess.Popen):
+    """
+    Popen that reaps its process with os.wait4 and records the process's resource usage.
+
+    getrusage(RUSAGE_CHILDREN).ru_maxrss is the high-water mark over every child
+    the worker ever waited for, so it cannot attribute memory to one task;
+    wait4 returns the peak RSS of exactly this process. While measure runs,
+    subprocess.Popen is replaced by this class, so FFmpeg processes started by
+    the tasks (also via subprocess.run and from worker threads) are recorded.
+    """
+    usages = []
+    usages_lock = threading.Lock()
+
+    def wait(self, timeout=None):
+        if self.returncode is None and timeout is None:
+            _, status, usage = os.wait4(self.pid, 0)
+            self.returncode = os.waitstatus_to_exitcode(status)
+            with self.usages_lock:
+                self.usages.append(usage)
+        return super().wait(timeout)
+
+
+def measure(func, *args):
+    """
+    Runs `func(*args)` and returns its wall time, CPU time and the peak RSS of its child processes.
+
+    CPU time adds the user and system time of this process and of all child
+    processes (FFmpeg) that finished meanwhile. Peak RSS is the largest RSS of a
+    single child process started by the task (0 if it started none), taken from
+    the resource usage of that process (see RusagePopen).
+
+    Returns:
+        dict: 'wall_seconds', 'cpu_seconds' and 'peak_rss_kb'.
+    """
+    def cpu_seconds():
+        usages = (resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN))
+        return sum(usage.ru_utime + usage.ru_stime for usage in usages)
+
+    RusagePopen.usages = []
+    cpu_before = cpu_seconds()
+    start = time.perf_counter()
+    with patch("subprocess.Popen", RusagePopen):
+        func(*args)
+    wall = time.perf_counter() - start
+    cpu = cpu_seconds() - cpu_before
+
+    peak_rss = max((usage.ru_maxrss for usage in RusagePopen.usages), default=0)
+    return {"wall_seconds": round(wall, 3), "cpu_seconds": round(cpu, 3), "peak_rss_kb": peak_rss}
+
+
+def rendition_output_stats(output_dir):
+    """
+    Returns the number of bytes written to a rendition directory and the segments listed in its playlist.
+    """
+    files = [path for path in output_dir.rglob("*") if path.is_file()]
+    return {
+        "bytes": sum(path.stat().st_size for path in files),
+        "segments": len(read_media_playlist(output_dir / "index.m3u8")),
+    }
+
+
+def ffmpeg_version():
+    """
+    Returns the first line of `ffmpeg -version`, or an empty string if FFmpeg is not available.
+    """
+    try:
+        result = subprocess.run(["ffmpeg", "-version"], capture_output=True, check=True, text=True)
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+    return (result.stdout or "").partition("\n")[0]
+
+
+def benchmark_clip(source, width, height, duration, frame_rate, mode):
+    """
+    Runs and measures the processing tasks for one clip and removes their output afterwards.
+
+    The renditions are transcoded as in `mode` (a settings.VIDEO_TRANSCODE_MODE
+    value): one measured ladder or chunked task for all renditions, or one
+    measured task per rendition.
+
+    Returns:
+        dict: The clip parameters, the measurement of every task and the output stats per rendition.
+    """
+    result = {
+        "clip": f"{width}x{height}:{duration}",
+        "width": width, "height": height, "duration": duration, "frame_rate": frame_rate,
+        "tasks": [],
+        "renditions": {},
+    }
+
+    with transaction.atomic():
+        video = Video.objects.create(
+            title=f"Benchmark {width}x{height}", description="Synthetic benchmark clip",
+            video_file=str(source.relative_to(settings.MEDIA_ROOT)),
+        )
+        video_dir = media_dir(video.pk)
+        try:
+            result["tasks"].append({"task": "probe_video", **measure(probe_video, video.pk)})
+            video.refresh_from_db()
+
+            formats = select_renditions(video, EncodingProfile.objects.for_video(video).formats())
+            if mode in ("ladder", "chunked"):
+                task = convert_video_to_hls_ladder if mode == "ladder" else convert_video_to_hls_chunked
+                result["tasks"].append({"task": task.__name__, **measure(task, video.pk, formats)})
+            else:
+                for video_format in formats:
+                    metrics = measure(convert_video_to_hls, video.pk, *video_format)
+                    result["tasks"].append({"task": "convert_video_to_hls", "rendition": video_format[0], **metrics})
+
+            for name, *_ in formats:
+                result["renditions"][name] = rendition_output_stats(video_dir / name)
+
+            result["tasks"].append({"task": "create_thumbnail", **measure(create_thumbnail, video.pk)})
+            result["tasks"].append({"task": "create_master_playlist", **measure(create_master_playlist, video.pk)})
+        finally:
+            shutil.rmtree(video_dir, ignore_errors=True)
+            shutil.rmtree(scratch_dir(video.pk), ignore_errors=True)
+            video.refresh_from_db()
+            if video.thumbnail:
+                Path(video.thumbnail.path).unlink(missing_ok=True)
+            # Leaves no rows behind and drops the processing jobs queued on commit
+            transaction.set_rollback(True)
+
+    return result
+
+
+def run_benchmark(clips, frame_rate=30, mode=None):
+    """
+    Benchmarks the processing tasks on synthetic clips.
+
+    Args:
+        clips (list): (width, height, seconds) tuples, see parse_clip_spec.
+        frame_rate (int): Frame rate of the generated clips.
+        mode (str, optional): Transcode mode ('ladder', 'chunked' or 'per_rendition');
+            settings.VIDEO_TRANSCODE_MODE when omitted.
+
+    Returns:
+        dict: JSON-serializable report with environment information and one result per clip.
+    """
+    mode = mode or settings.VIDEO_TRANSCODE_MODE
+    clip_dir = Path(settings.MEDIA_ROOT) / CLIP_DIR
+    report = {
+        "created_at": timezone.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "ffmpeg": ffmpeg_version(),
+        "transcode_mode": mode,
+        "clips": [],
+    }
+
+    for width, height, duration in sorted(clips, key=lambda clip: clip[0] * clip[1] * clip[2]):
+        source = generate_clip(clip_dir, width, height, duration, frame_rate)
+        report["clips"].append(benchmark_clip(source, width, height, duration, frame_rate, mode))
+
+    return report
+
+
+def compare_reports(report, baseline):
+    """
+    Returns the relative wall time change of every task against a baseline report.
+
+    Tasks are matched by clip, task name and rendition; tasks missing from the
+    baseline are skipped.
+
+    Returns:
+        list: (clip, task, rendition, baseline_seconds, seconds, change) tuples, where
+            `change` is the relative difference (0.1 means 10 % slower).
+    """
+    def task_times(data):
+        return {
+            (clip["clip"], task["task"], task.get("rendition", "")): task["wall_seconds"]
+            for clip in data["clips"]
+            for task in clip["tasks"]
+        }
+
+    baseline_times = task_times(baseline)
+    rows = []
+    for key, seconds in task_times(report).items():
+        if key not in baseline_times:
+            continue
+        before = baseline_times[key]
+        change = (seconds - before) / before if before else 0.0
+        rows.append((*key, before, seconds, round(change, 3)))
+    return rows
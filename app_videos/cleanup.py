@@ -0,0 +1,170 @@
+"""
+Media cleanup helpers
+
+Deleting a Video must not wait for its media to be removed from disk: a
+rendition tree can hold thousands of segments, and deleting hundreds of videos
+from the admin would otherwise block the request for minutes. The post_delete
+signal therefore only records the media paths of a deleted video. Once the
+transaction commits, the paths of all videos deleted in it are handed to a
+single background job. The reconciler (`manage.py reconcile_media`) finds
+media that is no longer referenced by any row, e.g. after a crash.
+
+Constants:
+    MEDIA_CLEANUP_QUEUE (str): RQ queue of the background deletion jobs.
+    ORPHAN_SCAN_DIRS (tuple): Directories below MEDIA_ROOT whose files must be referenced by a Video.
+
+Functions:
+    video_media_paths(video): Returns the media paths of a video, relative to MEDIA_ROOT.
+    delete_media_files(paths): Removes media files and directories below MEDIA_ROOT (RQ job).
+    schedule_media_deletion(paths): Deletes media paths in a background job once the current transaction commits.
+    find_orphaned_media(min_age): Returns media paths that no Video or UploadSession references.
+"""
+
+import re
+import shutil
+import threading
+import time
+import weakref
+from pathlib import Path
+
+import django_rq
+from django.conf import settings
+from django.db import transaction
+
+from .models import UploadSession, Video
+from .playlist_cache import forget_playlists
+from .scratch import media_dir, scratch_dir, scratch_root
+
+
+MEDIA_CLEANUP_QUEUE = "default"
+ORPHAN_SCAN_DIRS = ("video/tmp", "thumbnail/tmp", "thumbnail", "thumbnail/variants")
+
+# Deletion batch of the current transaction and a weak reference to its commit hook, per thread
+_batch = threading.local()
+
+
+def video_media_paths(video):
+    """
+    Returns the media paths of a video, relative to MEDIA_ROOT.
+
+    These are the HLS output directory, the uploaded source (if it was not
+    removed yet), the thumbnail and its responsive variants.
+    """
+    paths = [f"video/{video.pk}"]
+    if video.video_file:
+        paths.append(video.video_file.name)
+    if video.thumbnail:
+        paths.append(video.thumbnail.name)
+    for widths in video.thumbnail_variants.values():
+        paths.extend(widths.values())
+    return paths
+
+
+def delete_media_files(paths):
+    """
+    Removes the given files and directory trees below MEDIA_ROOT.
+
+    Missing paths are skipped, so the job can safely be retried. Paths that
+    resolve outside MEDIA_ROOT are ignored, and so is the media of videos in
+    `paths` whose row still exists (e.g. a deletion rolled back to a savepoint).
+    A video directory (video/<pk>) also removes the scratch directory of the video
+    and the cached playlists of its renditions.
+
+    Args:
+        paths (list): Paths relative to MEDIA_ROOT.
+    """
+    media_root = Path(settings.MEDIA_ROOT).resolve()
+    video_ids = [int(match[1]) for match in (re.fullmatch(r"video/(\d+)", path) for path in paths) if match]
+    kept = {path for video in Video.objects.filter(pk__in=video_ids) for path in video_media_paths(video)}
+
+    for video_id in video_ids:
+        if f"video/{video_id}" not in kept:
+            shutil.rmtree(scratch_dir(video_id), ignore_errors=True)
+            if media_dir(video_id).is_dir():
+                forget_playlists(video_id, [path.name for path in media_dir(video_id).iterdir() if path.is_dir()])
+
+    for relative_path in paths:
+        path = (media_root / relative_path).resolve()
+        if relative_path in kept or path == media_root or media_root not in path.parents:
+            continue
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            path.unlink(missing_ok=True)
+
+
+def schedule_media_deletion(paths):
+    """
+    Deletes media paths in a background job once the current transaction commits.
+
+    Deletions of the same transaction (e.g. a bulk delete in the admin) are
+    batched into a single job: the first deletion starts a batch and registers
+    the commit hook that enqueues it, later ones only add their paths. The
+    batch holds its hook by weak reference only. Django drops the hooks of a
+    rolled back transaction or savepoint, so a batch whose hook is gone is
+    abandoned instead of collecting paths that would never be deleted. Outside
+    of a transaction the job is enqueued right away.
+
+    Args:
+        paths (list): Paths relative to MEDIA_ROOT.
+    """
+    pending = getattr(_batch, "pending", None)
+    if pending is not None and pending() is not None:
+        _batch.paths.extend(paths)
+        return
+
+    batch = list(paths)
+
+    def enqueue():
+        _batch.pending = None
+        django_rq.get_queue(MEDIA_CLEANUP_QUEUE, autocommit=True).enqueue(delete_media_files, batch)
+
+    _batch.paths, _batch.pending = batch, weakref.ref(enqueue)
+    transaction.on_commit(enqueue)
+
+
+def find_orphaned_media(min_age=86400):
+    """
+    Returns media paths that no Video or UploadSession references.
+
+    Covers uploaded sources (video/tmp), thumbnails and their variants, HLS
+    output and scratch directories without a Video row (both reported as
+    video/<pk>) and partial uploads (uploads/<id>.part) without an UploadSession. Paths modified within the
+    last `min_age` seconds are skipped, as they may belong to an upload or a
+    processing job whose row is not saved yet.
+
+    Args:
+        min_age (int): Minimum age in seconds of an orphan.
+
+    Returns:
+        list: Orphaned paths relative to MEDIA_ROOT, sorted.
+    """
+    media_root = Path(settings.MEDIA_ROOT)
+    cutoff = time.time() - min_age
+
+    referenced = set()
+    for video_file, thumbnail, variants in Video.objects.values_list("video_file", "thumbnail", "thumbnail_variants"):
+        referenced.update(filter(None, (video_file, thumbnail)))
+        for widths in (variants or {}).values():
+            referenced.update(widths.values())
+    video_ids = {str(pk) for pk in Video.objects.values_list("pk", flat=True)}
+    session_ids = {str(pk) for pk in UploadSession.objects.values_list("pk", flat=True)}
+
+    # (reported path, path on disk)
+    candidates = []
+    for directory in ORPHAN_SCAN_DIRS:
+        for path in (media_root / directory).glob("*"):
+            relative_path = path.relative_to(media_root).as_posix()
+            if path.is_file() and relative_path not in referenced:
+                candidates.append((relative_path, path))
+
+    for video_root in (media_root / "video", scratch_root()):
+        for path in video_root.glob("*"):
+            if path.is_dir() and path.name.isdigit() and path.name not in video_ids:
+                candidates.append((f"video/{path.name}", path))
+
+    for path in (media_root / "uploads").glob("*.part"):
+        if path.stem not in session_ids:
+            candidates.append((path.relative_to(media_root).as_posix(), path))
+
+    return sorted({relative_path for relative_path, path in candidates if path.stat().st_mtime < cutoff})
@@ -0,0 +1,273 @@
+"""
+HLS playlist helpers
+
+This module contains small helpers to read and write HLS media playlists (.m3u8)
+produced by FFmpeg, so the processing pipeline can combine or rewrite them
+without re-running FFmpeg. Playlists are replaced atomically, so a player that
+fetches one while it is rewritten always gets either the old or the new version.
+
+Classes:
+    Segment: One media segment entry of a playlist.
+
+Functions:
+    read_media_playlist(path): Parses the segment entries of a media playlist.
+    is_complete_playlist(path): Checks whether a media playlist exists and is finished (#EXT-X-ENDLIST).
+    write_media_playlist(path, segments, target_duration, ended): Writes a VOD media playlist for the given segments.
+    replace_playlist(path, lines): Atomically replaces a playlist file with the given lines.
+    segment_byte_size(segment, directory): Returns the number of media bytes of a segment.
+    init_segment_uri(segment): Returns the URI of the fMP4 init segment of a segment, if any.
+    append_uri_query(playlist, query): Appends a query string to every segment and init segment URI of a playlist.
+    codec_string(stream): Builds the RFC 6381 codec string of an ffprobe stream.
+    write_master_playlist(path, variants, audio): Writes a master playlist with spec-complete EXT-X-STREAM-INF attributes.
+"""
+
+import math
+import os
+import re
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+
+class Segment(NamedTuple):
+    """
+    One media segment entry of an HLS playlist.
+
+    Attributes:
+        duration (float): Segment duration in seconds (#EXTINF).
+        uri (str): Segment URI, relative to the playlist.
+        byterange (str): '#EXT-X-BYTERANGE' value ('<length>@<offset>') for single-file renditions.
+        init (str): Attribute list of the '#EXT-X-MAP' tag (fMP4 init segment) that applies to the segment.
+    """
+    duration: float
+    uri: str
+    byterange: Optional[str] = None
+    init: Optional[str] = None
+
+
+def read_media_playlist(path):
+    """
+    Parses an HLS media playlist into its segment entries.
+
+    Args:
+        path (Path): Path of the .m3u8 media playlist.
+
+    Returns:
+        list: Segment tuples in playlist order.
+    """
+    segments = []
+    duration = byterange = init = None
+
+    for line in Path(path).read_text().splitlines():
+        line = line.strip()
+        if line.startswith("#EXTINF:"):
+            duration = float(line[len("#EXTINF:"):].split(",", 1)[0])
+        elif line.startswith("#EXT-X-BYTERANGE:"):
+            byterange = line[len("#EXT-X-BYTERANGE:"):]
+        elif line.startswith("#EXT-X-MAP:"):
+            init = line[len("#EXT-X-MAP:"):]
+        elif line and not line.startswith("#") and duration is not None:
+            segments.append(Segment(duration, line, byterange, init))
+            duration = byterange = None
+
+    return segments
+
+
+def is_complete_playlist(path):
+    """
+    Returns True if the media playlist exists and was finished with #EXT-X-ENDLIST.
+    """
+    path = Path(path)
+    return path.exists() and "#EXT-X-ENDLIST" in path.read_text()
+
+
+def write_media_playlist(path, segments, target_duration=None, ended=True):
+    """
+    Writes a VOD media playlist for the given segments.
+
+    Args:
+        path (Path): Destination path of the .m3u8 media playlist.
+        segments (list): Segment tuples in playback order.
+        target_duration (int, optional): EXT-X-TARGETDURATION value; derived from
+            the longest segment when omitted.
+        ended (bool): Whether to close the playlist with #EXT-X-ENDLIST. Partial
+            playlists of interrupted transcodes are written without it.
+    """
+    if target_duration is None:
+        target_duration = math.ceil(max((segment.duration for segment in segments), default=0))
+
+    # EXT-X-MAP requires version 6+ (7 for fMP4), EXT-X-BYTERANGE version 4+
+    if any(segment.init for segment in segments):
+        version = 7
+    elif any(segment.byterange for segment in segments):
+        version = 4
+    else:
+        version = 3
+
+    lines = [
+        "#EXTM3U",
+        f"#EXT-X-VERSION:{version}",
+        f"#EXT-X-TARGETDURATION:{target_duration}",
+        "#EXT-X-MEDIA-SEQUENCE:0",
+        "#EXT-X-PLAYLIST-TYPE:VOD",
+    ]
+    current_init = None
+    for segment in segments:
+        if segment.init and segment.init != current_init:
+            lines.append(f"#EXT-X-MAP:{segment.init}")
+            current_init = segment.init
+        lines.append(f"#EXTINF:{segment.duration:.6f},")
+        if segment.byterange:
+            lines.append(f"#EXT-X-BYTERANGE:{segment.byterange}")
+        lines.append(segment.uri)
+    if ended:
+        lines.append("#EXT-X-ENDLIST")
+
+    replace_playlist(path, lines)
+
+
+def replace_playlist(path, lines):
+    """
+    Atomically replaces the playlist at `path` with the given lines.
+
+    The playlist is written to a temporary file next to it and renamed over
+    the old one, so readers never see a truncated or half-written playlist.
+    """
+    path = Path(path)
+    partial = path.with_name(f".{path.name}.tmp")
+    partial.write_text("\n".join(lines) + "\n")
+    os.replace(partial, path)
+
+
+def segment_byte_size(segment, directory):
+    """
+    Returns the number of media bytes of a segment.
+
+    For byte-range segments this is the range length; otherwise it is the size
+    of the segment file in `directory`.
+    """
+    if segment.byterange:
+        return int(segment.byterange.split("@", 1)[0])
+    return (Path(directory) / segment.uri).stat().st_size
+
+
+def init_segment_uri(segment):
+    """
+    Returns the URI of the fMP4 init segment (EXT-X-MAP) that applies to a segment, or None.
+    """
+    match = re.search(r'URI="([^"]+)"', segment.init or "")
+    return match.group(1) if match else None
+
+
+def append_uri_query(playlist, query):
+    """
+    Appends a query string (e.g. 'token=...') to every segment and EXT-X-MAP URI of a media playlist.
+
+    Args:
+        playlist (str): Text of the media playlist.
+        query (str): Encoded query string without the leading '?'.
+
+    Returns:
+        str: The rewritten playlist text.
+    """
+    def with_query(uri):
+        return f"{uri}{'&' if '?' in uri else '?'}{query}"
+
+    lines = []
+    for line in playlist.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("#EXT-X-MAP:"):
+            line = re.sub(r'URI="([^"]+)"', lambda match: f'URI="{with_query(match.group(1))}"', stripped)
+        elif stripped and not stripped.startswith("#"):
+            line = with_query(stripped)
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+# profile_idc and constraint flags of the H.264 profiles FFmpeg reports
+H264_PROFILES = {
+    "constrained baseline": "42E0",
+    "baseline": "4200",
+    "main": "4D40",
+    "extended": "5800",
+    "high": "6400",
+    "high 10": "6E00",
+    "high 4:2:2": "7A00",
+    "high 4:4:4 predictive": "F400",
+}
+
+# MPEG-4 audio object types of the AAC profiles FFmpeg reports
+AAC_OBJECT_TYPES = {
+    "lc": 2,
+    "he-aac": 5,
+    "he-aacv2": 29,
+}
+
+
+def codec_string(stream):
+    """
+    Builds the RFC 6381 codec string (as used in the HLS CODECS attribute) of an ffprobe stream.
+
+    Args:
+        stream (dict): One entry of ffprobe's `streams` output.
+
+    Returns:
+        str: e.g. 'avc1.4D401F', 'hvc1.1.6.L93.B0' or 'mp4a.40.2', or an empty string for unsupported codecs.
+    """
+    codec = stream.get("codec_name")
+    profile = str(stream.get("profile", "")).lower()
+
+    if codec == "h264":
+        prefix = H264_PROFILES.get(profile, H264_PROFILES["main"])
+        level = stream.get("level") or 31
+        return f"avc1.{prefix}{int(level):02X}"
+    if codec == "hevc":
+        # general_profile_space/idc, compatibility flags, tier + level (level_idc = 30 * level), constraints
+        profile_idc, compatibility = (2, 4) if profile == "main 10" else (1, 6)
+        level = stream.get("level") or 93
+        return f"hvc1.{profile_idc}.{compatibility}.L{int(level)}.B0"
+    if codec == "aac":
+        return f"mp4a.40.{AAC_OBJECT_TYPES.get(profile, 2)}"
+    return ""
+
+
+def write_master_playlist(path, variants, audio=None):
+    """
+    Writes an HLS master playlist.
+
+    Variants are listed in ascending BANDWIDTH order, so players that pick the
+    first entry start with the cheapest stream. Optional attributes are only
+    written when known. With `audio`, the shared audio rendition is declared as
+    an #EXT-X-MEDIA audio group that every variant references.
+
+    Args:
+        path (Path): Destination path of the master playlist.
+        variants (list): Dicts with 'uri', 'bandwidth' and optionally 'average_bandwidth',
+            'codecs', 'resolution' (e.g. '854x480') and 'frame_rate'. The bandwidths
+            and codecs must already include the audio rendition.
+        audio (dict, optional): 'group_id', 'name' and 'uri' of the shared audio rendition.
+    """
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-INDEPENDENT-SEGMENTS"]
+
+    if audio:
+        lines.append(
+            f'#EXT-X-MEDIA:TYPE=AUDIO,GROUP-ID="{audio["group_id"]}",NAME="{audio["name"]}",'
+            f'DEFAULT=YES,AUTOSELECT=YES,URI="{audio["uri"]}"'
+        )
+
+    for variant in sorted(variants, key=lambda variant: variant["bandwidth"] or 0):
+        attributes = [f"BANDWIDTH={variant['bandwidth'] or 0}"]
+        if variant.get("average_bandwidth"):
+            attributes.append(f"AVERAGE-BANDWIDTH={variant['average_bandwidth']}")
+        if variant.get("codecs"):
+            attributes.append(f'CODECS="{variant["codecs"]}"')
+        if variant.get("resolution"):
+            attributes.append(f"RESOLUTION={variant['resolution']}")
+        if variant.get("frame_rate"):
+            attributes.append(f"FRAME-RATE={variant['frame_rate']:.3f}")
+        if audio:
+            attributes.append(f'AUDIO="{audio["group_id"]}"')
+
+        lines.append(f"#EXT-X-STREAM-INF:{','.join(attributes)}")
+        lines.append(variant["uri"])
+
+    replace_playlist(path, lines)
@@ -0,0 +1,74 @@
+"""
+benchmark_transcode management command
+
+Runs the transcode benchmark (see app_videos.benchmark) on synthetic clips and
+stores the report as JSON. With --baseline, the wall times are compared with
+an earlier report, e.g. of the previous release:
+
+    python manage.py benchmark_transcode --output bench-new.json --baseline bench-old.json
+"""
+
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app_videos.benchmark import DEFAULT_CLIPS, compare_reports, parse_clip_spec, run_benchmark
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the video processing tasks on synthetic lavfi test clips and writes a JSON report."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--clips", default=DEFAULT_CLIPS,
+            help=f"Comma separated WIDTHxHEIGHT:SECONDS clips to generate (default: {DEFAULT_CLIPS}).",
+        )
+        parser.add_argument("--frame-rate", type=int, default=30, help="Frame rate of the generated clips (default: 30).")
+        parser.add_argument(
+            "--mode", choices=["ladder", "chunked", "per_rendition"],
+            help="Transcode mode to benchmark (default: VIDEO_TRANSCODE_MODE).",
+        )
+        parser.add_argument("--output", help="Path of the JSON report; printed to stdout when omitted.")
+        parser.add_argument("--baseline", help="Earlier JSON report to compare the wall times with.")
+        parser.add_argument(
+            "--threshold", type=float, default=0.1,
+            help="Relative wall time increase reported as a regression (default: 0.1 = 10 %%).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            clips = parse_clip_spec(options["clips"])
+        except ValueError as error:
+            raise CommandError(error)
+        if not clips:
+            raise CommandError("No clips to benchmark.")
+
+        baseline = None
+        if options["baseline"]:
+            try:
+                baseline = json.loads(Path(options["baseline"]).read_text())
+            except (OSError, ValueError) as error:
+                raise CommandError(f"Cannot read baseline report: {error}")
+
+        report = run_benchmark(clips, options["frame_rate"], options["mode"])
+
+        if not options["output"]:
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            Path(options["output"]).write_text(json.dumps(report, indent=2) + "\n")
+            for clip in report["clips"]:
+                for task in clip["tasks"]:
+                    label = f"{task['task']} {task.get('rendition', '')}".strip()
+                    self.stdout.write(
+                        f"{clip['clip']:>16}  {label:<28} {task['wall_seconds']:>9.3f}s wall "
+                        f"{task['cpu_seconds']:>9.3f}s cpu {task['peak_rss_kb']:>9} kB"
+                    )
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+        if baseline:
+            # Keeps stdout valid JSON when the report is printed there
+            out = self.stdout if options["output"] else self.stderr
+            for clip, task, rendition, before, seconds, change in compare_reports(report, baseline):
+                line = f"{clip:>16}  {f'{task} {rendition}'.strip():<28} {before:>9.3f}s -> {seconds:>9.3f}s ({change:+.1%})"
+                out.write(self.style.ERROR(line) if change > options["threshold"] else line)
@@ -0,0 +1,36 @@
+"""
+reconcile_media management command
+
+Lists media below MEDIA_ROOT that no Video or UploadSession references any
+more (see app_videos.cleanup.find_orphaned_media) and removes it with --delete:
+
+    python manage.py reconcile_media --delete
+"""
+
+from django.core.management.base import BaseCommand
+
+from app_videos.cleanup import delete_media_files, find_orphaned_media
+
+
+class Command(BaseCommand):
+    help = "Finds orphaned uploads, thumbnails and HLS directories without a matching row and optionally deletes them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--delete", action="store_true", help="Delete the orphaned media instead of only listing it.")
+        parser.add_argument(
+            "--min-age", type=int, default=86400,
+            help="Skip media modified within the last N seconds, e.g. uploads in progress (default: 86400).",
+        )
+
+    def handle(self, *args, **options):
+        orphans = find_orphaned_media(options["min_age"])
+        for path in orphans:
+            self.stdout.write(path)
+
+        if not orphans:
+            self.stdout.write(self.style.SUCCESS("No orphaned media found."))
+        elif options["delete"]:
+            delete_media_files(orphans)
+            self.stdout.write(self.style.SUCCESS(f"Deleted {len(orphans)} orphaned media paths."))
+        else:
+            self.stdout.write(f"Found {len(orphans)} orphaned media paths; run with --delete to remove them.")
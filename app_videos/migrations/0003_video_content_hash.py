@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_videos', '0002_video_source_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='processed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
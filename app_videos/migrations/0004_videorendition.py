@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_videos', '0003_video_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VideoRendition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=16)),
+                ('segments_completed', models.PositiveIntegerField(default=0)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('video', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='renditions', to='app_videos.video')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('video', 'name'), name='unique_video_rendition')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_videos', '0004_videorendition'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='videorendition',
+            name='average_bandwidth',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='videorendition',
+            name='bandwidth',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='videorendition',
+            name='codecs',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
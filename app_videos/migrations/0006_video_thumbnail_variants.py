@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_videos', '0005_videorendition_bandwidth'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='thumbnail_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
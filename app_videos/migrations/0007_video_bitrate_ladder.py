@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 03:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_videos', '0006_video_thumbnail_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='bitrate_ladder',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='complexity_bitrate',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
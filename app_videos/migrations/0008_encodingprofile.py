@@ -0,0 +1,50 @@
+# Generated by Django 5.2.6 on 2026-10-18 03:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_videos', '0007_video_bitrate_ladder'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EncodingProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('category', models.CharField(blank=True, choices=[('action', 'Action'), ('adventure', 'Adventure'), ('animation', 'Animation'), ('comedy', 'Comedy'), ('crime', 'Crime'), ('documentary', 'Documentary'), ('drama', 'Drama'), ('fantasy', 'Fantasy'), ('historical', 'Historical'), ('horror', 'Horror'), ('musical', 'Musical'), ('mystery', 'Mystery'), ('romance', 'Romance'), ('science_fiction', 'Science Fiction'), ('thriller', 'Thriller'), ('war', 'War'), ('western', 'Western'), ('biography', 'Biography'), ('family', 'Family'), ('sport', 'Sport')], default='', max_length=32)),
+                ('is_default', models.BooleanField(default=False)),
+                ('video_codec', models.CharField(choices=[('h264', 'H.264 / AVC'), ('hevc', 'H.265 / HEVC')], default='h264', max_length=16)),
+                ('preset', models.CharField(blank=True, default='', max_length=16)),
+                ('segment_seconds', models.PositiveSmallIntegerField(default=6)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(condition=models.Q(('category', ''), _negated=True), fields=('category',), name='unique_category_encoding_profile'), models.UniqueConstraint(condition=models.Q(('is_default', True)), fields=('is_default',), name='single_default_encoding_profile')],
+            },
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='encoding_profile',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='videos', to='app_videos.encodingprofile'),
+        ),
+        migrations.CreateModel(
+            name='EncodingRendition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=16)),
+                ('width', models.PositiveIntegerField()),
+                ('height', models.PositiveIntegerField()),
+                ('video_bitrate', models.CharField(max_length=16)),
+                ('audio_bitrate', models.CharField(max_length=16)),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='renditions', to='app_videos.encodingprofile')),
+            ],
+            options={
+                'ordering': ['height', 'width'],
+                'constraints': [models.UniqueConstraint(fields=('profile', 'name'), name='unique_profile_rendition')],
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations
+
+
+# The ladder that was previously hardcoded as VIDEO_FORMATS / RESOLUTIONS
+DEFAULT_RENDITIONS = [
+    # (name, width, height, video_bitrate, audio_bitrate)
+    ("480p", 854, 480, "800k", "96k"),
+    ("720p", 1280, 720, "2800k", "128k"),
+    ("1080p", 1920, 1080, "5000k", "192k"),
+]
+
+
+def create_default_profile(apps, schema_editor):
+    EncodingProfile = apps.get_model("app_videos", "EncodingProfile")
+    EncodingRendition = apps.get_model("app_videos", "EncodingRendition")
+
+    profile, created = EncodingProfile.objects.get_or_create(
+        name="default", defaults={"is_default": True, "video_codec": "h264", "segment_seconds": 6}
+    )
+    if created:
+        EncodingRendition.objects.bulk_create(
+            EncodingRendition(profile=profile, name=name, width=width, height=height, video_bitrate=v_bitrate, audio_bitrate=a_bitrate)
+            for name, width, height, v_bitrate, a_bitrate in DEFAULT_RENDITIONS
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_videos', '0008_encodingprofile'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_default_profile, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 03:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_videos', '0010_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='published_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
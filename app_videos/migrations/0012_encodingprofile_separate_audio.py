@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 03:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_videos', '0011_video_published_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='encodingprofile',
+            name='audio_bitrate',
+            field=models.CharField(default='128k', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='encodingprofile',
+            name='separate_audio',
+            field=models.BooleanField(default=False),
+        ),
+    ]
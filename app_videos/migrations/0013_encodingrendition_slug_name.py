@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 04:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_videos', '0012_encodingprofile_separate_audio'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='encodingrendition',
+            name='name',
+            field=models.SlugField(db_index=False, max_length=16),
+        ),
+    ]
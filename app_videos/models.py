@@ -1,4 +1,7 @@
 import os
+import uuid
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
 
 CATEGORY_CHOICES = [
@@ -39,6 +42,24 @@ class Video(models.Model):
                               restricted to predefined CATEGORY_CHOICES.
         created_at (DateTimeField): Timestamp showing when the video record was created,
                                    automatically set on record insertion.
+        duration (FloatField): Source duration in seconds, filled in by the ffprobe stage.
+        width (PositiveIntegerField): Source frame width in pixels, filled in by the ffprobe stage.
+        height (PositiveIntegerField): Source frame height in pixels, filled in by the ffprobe stage.
+        frame_rate (FloatField): Average source frame rate in frames per second.
+        video_codec (CharField): Codec name of the source video stream (e.g. 'h264').
+        audio_codec (CharField): Codec name of the source audio stream, empty if there is none.
+        bitrate (PositiveIntegerField): Overall source bitrate in bits per second.
+        content_hash (CharField): SHA-256 hex digest of the uploaded source file, used to detect duplicates.
+        processed_at (DateTimeField): Timestamp when the processing pipeline finished, null while processing.
+        published_at (DateTimeField): Timestamp when the first rendition became playable (master playlist
+                                      written), null until then.
+        complexity_bitrate (PositiveIntegerField): Bits per second of the per-title complexity probe encode.
+        bitrate_ladder (JSONField): Per-title video bitrate per rendition name (e.g. {'480p': '640k'}),
+                                    empty when the fixed bitrates are used.
+        encoding_profile (ForeignKey): Optional EncodingProfile override for this video; when empty the
+                                       profile of the video's category (or the default profile) is used.
+        thumbnail_variants (JSONField): Resized thumbnail paths (relative to MEDIA_ROOT) per format and width,
+                                        e.g. {'webp': {'320': 'thumbnail/variants/image5_320.webp'}}.
 
     Methods:
         __str__: Returns a concise string representation including primary key, title,
@@ -51,5 +72,221 @@ class Video(models.Model):
     category = models.CharField(choices=CATEGORY_CHOICES, blank=False, null = False, default="")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Source metadata (set by the ffprobe stage before transcoding)
+    duration = models.FloatField(blank=True, null=True)
+    width = models.PositiveIntegerField(blank=True, null=True)
+    height = models.PositiveIntegerField(blank=True, null=True)
+    frame_rate = models.FloatField(blank=True, null=True)
+    video_codec = models.CharField(max_length=32, blank=True, default="")
+    audio_codec = models.CharField(max_length=32, blank=True, default="")
+    bitrate = models.PositiveIntegerField(blank=True, null=True)
+
+    content_hash = models.CharField(max_length=64, blank=True, default="", db_index=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+    published_at = models.DateTimeField(blank=True, null=True)
+    complexity_bitrate = models.PositiveIntegerField(blank=True, null=True)
+    bitrate_ladder = models.JSONField(blank=True, default=dict)
+    thumbnail_variants = models.JSONField(blank=True, default=dict)
+    encoding_profile = models.ForeignKey(
+        "EncodingProfile", on_delete=models.SET_NULL, blank=True, null=True, related_name="videos"
+    )
+
+    def __str__(self):
+        return f"{self.pk} | {self.title} | {self.description or 'Video Description'} | {self.category} | Uploaded: {self.created_at:%Y-%m-%d %H:%M}"
+
+
+class VideoRendition(models.Model):
+    """
+    Processing state of one HLS rendition of a video.
+
+    Used to make the transcode tasks idempotent and resumable: finished renditions
+    are skipped when a job is retried, and partially written renditions continue
+    after their last complete segment.
+
+    Attributes:
+        video (ForeignKey): The video this rendition belongs to.
+        name (CharField): Rendition label, e.g. '720p'.
+        segments_completed (PositiveIntegerField): Number of complete HLS segments written so far.
+        completed_at (DateTimeField): Timestamp when the rendition playlist was completed, null while pending.
+        updated_at (DateTimeField): Timestamp of the last state change.
+        bandwidth (PositiveIntegerField): Peak segment bitrate in bits per second (master playlist BANDWIDTH).
+        average_bandwidth (PositiveIntegerField): Average bitrate in bits per second (AVERAGE-BANDWIDTH).
+        codecs (CharField): RFC 6381 codec string of the produced segments, e.g. 'avc1.4D401F,mp4a.40.2'.
+    """
+    video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name="renditions")
+    name = models.CharField(max_length=16)
+    segments_completed = models.PositiveIntegerField(default=0)
+    completed_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # Measured from the produced segments when the rendition is completed
+    bandwidth = models.PositiveIntegerField(blank=True, null=True)
+    average_bandwidth = models.PositiveIntegerField(blank=True, null=True)
+    codecs = models.CharField(max_length=64, blank=True, default="")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["video", "name"], name="unique_video_rendition"),
+        ]
+
+    def __str__(self):
+        return f"{self.video_id} | {self.name} | {self.segments_completed} segments | {'completed' if self.completed_at else 'pending'}"
+
+
+VIDEO_CODEC_CHOICES = [
+    ("h264", "H.264 / AVC"),
+    ("hevc", "H.265 / HEVC"),
+]
+
+
+class EncodingProfileManager(models.Manager):
+    def for_video(self, video):
+        """
+        Returns the encoding profile that applies to a video.
+
+        The video's own profile wins over the profile of its category, which
+        wins over the default profile.
+
+        Raises:
+            EncodingProfile.DoesNotExist: If no profile applies (no default profile configured).
+        """
+        if video.encoding_profile_id:
+            return video.encoding_profile
+        profile = self.filter(category=video.category).exclude(category="").first()
+        return profile or self.get(is_default=True)
+
+
+class EncodingProfile(models.Model):
+    """
+    Editable HLS encoding ladder and encoder settings.
+
+    Attributes:
+        name (CharField): Unique profile name, e.g. 'default'.
+        category (CharField): Video category the profile applies to; empty for no category.
+        is_default (BooleanField): Whether the profile applies to videos without a category profile.
+        video_codec (CharField): Video codec of all renditions ('h264' or 'hevc').
+        preset (CharField): Encoder speed/size preset (e.g. 'veryfast', 'slow'); empty for the encoder default.
+        segment_seconds (PositiveSmallIntegerField): Target HLS segment duration in seconds.
+        separate_audio (BooleanField): Whether the audio is encoded once into a shared HLS audio rendition
+                                       (#EXT-X-MEDIA group) instead of being muxed into every video rendition.
+        audio_bitrate (CharField): Bitrate of the shared audio rendition in FFmpeg notation, e.g. '128k';
+                                   the per-rendition audio bitrates apply when the audio is muxed.
+
+    Methods:
+        formats: Returns the renditions as (name, scale, video_bitrate, audio_bitrate) tuples, lowest first.
+    """
+    name = models.CharField(max_length=50, unique=True)
+    category = models.CharField(max_length=32, choices=CATEGORY_CHOICES, blank=True, default="")
+    is_default = models.BooleanField(default=False)
+    video_codec = models.CharField(max_length=16, choices=VIDEO_CODEC_CHOICES, default="h264")
+    preset = models.CharField(max_length=16, blank=True, default="")
+    segment_seconds = models.PositiveSmallIntegerField(default=6)
+    separate_audio = models.BooleanField(default=False)
+    audio_bitrate = models.CharField(max_length=16, default="128k")
+
+    objects = EncodingProfileManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["category"], condition=~models.Q(category=""), name="unique_category_encoding_profile"),
+            models.UniqueConstraint(fields=["is_default"], condition=models.Q(is_default=True), name="single_default_encoding_profile"),
+        ]
+
+    def formats(self):
+        return [rendition.as_format() for rendition in self.renditions.all()]
+
+    def __str__(self):
+        return f"{self.name} | {self.video_codec} | {self.category or ('default' if self.is_default else '-')}"
+
+
+# Directory names next to the renditions of a video (tasks.AUDIO_RENDITION, trickplay.TRICKPLAY_DIR)
+# and in its scratch directory (source chunks, per-title complexity samples)
+RESERVED_RENDITION_NAMES = ("audio", "trickplay", "chunks", "complexity")
+
+
+class EncodingRendition(models.Model):
+    """
+    One rendition of an EncodingProfile's ladder.
+
+    The name is used as a directory name below the media and scratch
+    directories of every video and as a URL path segment, so it must be a slug
+    and must not be one of RESERVED_RENDITION_NAMES.
+
+    Attributes:
+        profile (ForeignKey): The profile this rendition belongs to.
+        name (SlugField): Rendition label and output directory name, e.g. '720p'.
+        width (PositiveIntegerField): Output width in pixels.
+        height (PositiveIntegerField): Output height in pixels.
+        video_bitrate (CharField): Target video bitrate in FFmpeg notation, e.g. '2800k'.
+        audio_bitrate (CharField): Target audio bitrate in FFmpeg notation, e.g. '128k'.
+    """
+    profile = models.ForeignKey(EncodingProfile, on_delete=models.CASCADE, related_name="renditions")
+    name = models.SlugField(max_length=16, db_index=False)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    video_bitrate = models.CharField(max_length=16)
+    audio_bitrate = models.CharField(max_length=16)
+
+    class Meta:
+        ordering = ["height", "width"]
+        constraints = [
+            models.UniqueConstraint(fields=["profile", "name"], name="unique_profile_rendition"),
+        ]
+
+    def clean(self):
+        if self.name.lower() in RESERVED_RENDITION_NAMES:
+            raise ValidationError({"name": f"'{self.name}' is reserved for other output of a video."})
+
+    def as_format(self):
+        """
+        Returns the rendition as a (name, scale, video_bitrate, audio_bitrate) tuple, as used by the transcode tasks.
+        """
+        return (self.name, f"{self.width}:{self.height}", self.video_bitrate, self.audio_bitrate)
+
+    def __str__(self):
+        return f"{self.profile.name} | {self.name} | {self.width}x{self.height} | {self.video_bitrate}"
+
+
+class UploadSession(models.Model):
+    """
+    A resumable, chunked video upload (tus-style).
+
+    The client creates a session with the total size, appends chunks at the
+    current offset until the offset reaches the size, and finalizes the session,
+    which creates the Video and starts the processing pipeline. Received bytes
+    are appended to a partial file on disk, so an interrupted upload continues
+    at the stored offset.
+
+    Attributes:
+        id (UUIDField): Random session identifier used in the upload URLs.
+        owner (ForeignKey): User who created the session.
+        filename (CharField): Original file name of the upload.
+        size (PositiveBigIntegerField): Total size of the upload in bytes.
+        offset (PositiveBigIntegerField): Number of bytes received so far.
+        title (CharField): Title of the Video created on finalize.
+        description (CharField): Description of the Video created on finalize.
+        category (CharField): Category of the Video created on finalize.
+        video (OneToOneField): The Video created on finalize, null until then.
+        created_at (DateTimeField): Timestamp when the session was created.
+        updated_at (DateTimeField): Timestamp of the last received chunk.
+
+    Methods:
+        partial_path: Returns the path of the partial upload file.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="upload_sessions")
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    title = models.CharField(max_length=80)
+    description = models.CharField(max_length=500, blank=True, default="")
+    category = models.CharField(choices=CATEGORY_CHOICES, max_length=32)
+    video = models.OneToOneField(Video, on_delete=models.SET_NULL, blank=True, null=True, related_name="upload_session")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def partial_path(self):
+        return os.path.join(settings.MEDIA_ROOT, "uploads", f"{self.pk}.part")
+
     def __str__(self):
-        return f"{self.pk} | {self.title} | {self.description or 'Video Description'} | {self.category} | Uploaded: {self.created_at:%Y-%m-%d %H:%M}"
\ No newline at end of file
+        return f"{self.pk} | {self.filename} | {self.offset}/{self.size} bytes"
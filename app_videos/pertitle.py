@@ -0,0 +1,88 @@
+"""
+Per-title encoding helpers
+
+A fast complexity probe encodes a few short samples of the source at a low
+resolution with a constant quality (CRF). The resulting bitrate tells how hard
+the title is to compress: a static slideshow needs a fraction of the bits of
+an action film for the same visual quality. The helpers below pick the
+samples and scale the measured bitrate to a per-video bitrate ladder.
+
+Constants:
+    PROBE_SCALE (str): Resolution of the complexity probe encode.
+    PROBE_CRF (int): Constant quality of the complexity probe encode.
+    MIN_BITRATE_FACTOR (float): Lowest per-title bitrate as a fraction of the fixed ladder bitrate.
+
+Functions:
+    parse_bitrate(value): Converts an FFmpeg bitrate ('800k', '5M') into bits per second.
+    sample_offsets(duration, count, length): Returns the start times of the complexity samples.
+    derive_bitrate_ladder(sample_bitrate, formats): Scales the probe bitrate to a video bitrate per rendition.
+    apply_bitrate_ladder(video, formats): Replaces the fixed video bitrates of rendition tuples with the per-title ones.
+"""
+
+PROBE_SCALE = "640:360"
+PROBE_CRF = 23
+MIN_BITRATE_FACTOR = 0.25
+
+# Bitrate grows slower than the pixel count (larger frames compress better)
+PIXEL_EXPONENT = 0.75
+
+
+def parse_bitrate(value):
+    """
+    Converts an FFmpeg bitrate string ('800k', '5M' or '96000') into bits per second.
+    """
+    value = str(value).strip().lower()
+    multiplier = {"k": 1_000, "m": 1_000_000}.get(value[-1:], 1)
+    return int(float(value.rstrip("km")) * multiplier)
+
+
+def sample_offsets(duration, count, length):
+    """
+    Returns the start times of `count` samples of `length` seconds, spread evenly over the source.
+
+    Short sources that cannot hold the samples get a single sample from the start.
+    """
+    if not duration or duration <= length * count:
+        return [0.0]
+    step = duration / count
+    return [round(step * index + (step - length) / 2, 3) for index in range(count)]
+
+
+def derive_bitrate_ladder(sample_bitrate, formats):
+    """
+    Scales the bitrate measured by the complexity probe to a video bitrate per rendition.
+
+    The result is capped at the fixed bitrate of each rendition and never drops
+    below MIN_BITRATE_FACTOR of it, so per-title encoding only ever saves bits.
+
+    Args:
+        sample_bitrate (float): Bits per second of the CRF probe encode at PROBE_SCALE.
+        formats (list): Rendition tuples of (name, scale, video_bitrate, audio_bitrate).
+
+    Returns:
+        dict: Video bitrate per rendition name, e.g. {'480p': '640k'}.
+    """
+    probe_width, probe_height = (int(part) for part in PROBE_SCALE.split(":"))
+    ladder = {}
+
+    for name, scale, v_bitrate, _ in formats:
+        width, height = (int(part) for part in scale.split(":"))
+        fixed = parse_bitrate(v_bitrate)
+        target = sample_bitrate * ((width * height) / (probe_width * probe_height)) ** PIXEL_EXPONENT
+        target = min(max(target, fixed * MIN_BITRATE_FACTOR), fixed)
+        ladder[name] = f"{round(target / 1000)}k"
+
+    return ladder
+
+
+def apply_bitrate_ladder(video, formats):
+    """
+    Returns the rendition tuples with their video bitrate replaced by the per-title ladder of the video.
+
+    Renditions missing from the ladder (or videos without one) keep their fixed bitrate.
+    """
+    ladder = video.bitrate_ladder or {}
+    return [
+        (name, scale, ladder.get(name, v_bitrate), a_bitrate)
+        for name, scale, v_bitrate, a_bitrate in formats
+    ]
@@ -0,0 +1,201 @@
+"""
+HLS playlist cache
+
+Media playlists are requested on every start and rendition switch of a
+player, but a published VOD playlist never changes. Instead of a stat and a
+read on the (network) media volume per request, playlists are cached in two
+tiers:
+
+    1. a bounded in-process LRU (settings.VIDEO_PLAYLIST_CACHE_SIZE entries per process),
+    2. the configured Django cache (Redis), shared by all web processes.
+
+The shared tier keys the playlist text by video, rendition and the playlist's
+modification time; a small version entry maps video and rendition to the
+current modification time. The transcode pipeline refreshes the version entry
+when it publishes a rendition (cache_playlist) and removes it when the media
+of a video is deleted (forget_playlists).
+
+An in-process entry is trusted without asking Redis for
+settings.VIDEO_PLAYLIST_LOCAL_TTL seconds, so most requests cost neither
+filesystem I/O nor a Redis round trip. After that, one version lookup in
+Redis confirms the entry (or fetches the new version), so other processes see
+a republished or deleted playlist at most VIDEO_PLAYLIST_LOCAL_TTL seconds late.
+
+Constants:
+    PLAYLIST_CACHE_TIMEOUT (int): Lifetime of the shared cache entries in seconds.
+
+Classes:
+    LocalEntry: One playlist in the in-process tier.
+
+Functions:
+    playlist_version_key(video_id, name): Cache key of the current playlist version of a rendition.
+    playlist_content_key(video_id, name, version): Cache key of the text of one playlist version.
+    clear_local_playlists(): Empties the in-process tier.
+    read_playlist(video_id, name): Reads a published playlist and its version from the media directory.
+    cache_playlist(video_id, name, overwrite): Reads a playlist from disk and stores it as the current version in both tiers.
+    get_playlist(video_id, name): Returns the text and modification time of a playlist, from the cache if possible.
+    forget_playlists(video_id, names): Removes the given renditions of a video from the cache.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .scratch import media_dir
+
+
+PLAYLIST_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+
+class LocalEntry(NamedTuple):
+    """
+    One playlist in the in-process tier.
+
+    Attributes:
+        version (int): Modification time of the playlist in nanoseconds.
+        text (str): The playlist text.
+        checked_at (float): time.monotonic() of the last confirmation against the shared tier.
+    """
+    version: int
+    text: str
+    checked_at: float
+
+
+# In-process LRU tier: (video_id, name) -> LocalEntry
+_local = OrderedDict()
+_local_lock = threading.Lock()
+
+
+def playlist_version_key(video_id, name):
+    """
+    Returns the cache key holding the current version (mtime in ns) of a rendition's playlist.
+    """
+    return f"hls-playlist-version:{video_id}:{name}"
+
+
+def playlist_content_key(video_id, name, version):
+    """
+    Returns the cache key of the text of one version of a rendition's playlist.
+    """
+    return f"hls-playlist:{video_id}:{name}:{version}"
+
+
+def _local_get(key):
+    with _local_lock:
+        entry = _local.get(key)
+        if entry is not None:
+            _local.move_to_end(key)
+        return entry
+
+
+def _local_put(key, version, text):
+    with _local_lock:
+        _local[key] = LocalEntry(version, text, time.monotonic())
+        _local.move_to_end(key)
+        while len(_local) > settings.VIDEO_PLAYLIST_CACHE_SIZE:
+            _local.popitem(last=False)
+
+
+def clear_local_playlists():
+    """
+    Empties the in-process tier of this process (e.g. between tests).
+    """
+    with _local_lock:
+        _local.clear()
+
+
+def read_playlist(video_id, name):
+    """
+    Reads the published playlist of a rendition.
+
+    The modification time is taken from the open file, so it always belongs to
+    the text read (playlists are replaced by rename, never rewritten in place).
+
+    Returns:
+        tuple: (text, version) with the modification time in nanoseconds as version,
+        or None if the playlist does not exist.
+    """
+    try:
+        with open(media_dir(video_id, name, "index.m3u8")) as file:
+            return file.read(), os.fstat(file.fileno()).st_mtime_ns
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+def cache_playlist(video_id, name, overwrite=True):
+    """
+    Reads a published playlist from disk and stores it as the current version in both cache tiers.
+
+    The pipeline calls this after publishing a rendition, overwriting the
+    version entry. Requests that missed the cache pass `overwrite=False`, so a
+    playlist they read just before a rewrite cannot replace the newer version.
+    Unfinished playlists (without #EXT-X-ENDLIST) are not cached.
+
+    Returns:
+        tuple: (text, version) as returned by read_playlist, or None if the playlist does not exist.
+    """
+    playlist = read_playlist(video_id, name)
+    if playlist is None:
+        return None
+
+    text, version = playlist
+    if "#EXT-X-ENDLIST" in text:
+        cache.set(playlist_content_key(video_id, name, version), text, PLAYLIST_CACHE_TIMEOUT)
+        if overwrite:
+            cache.set(playlist_version_key(video_id, name), version, PLAYLIST_CACHE_TIMEOUT)
+        else:
+            cache.add(playlist_version_key(video_id, name), version, PLAYLIST_CACHE_TIMEOUT)
+        _local_put((video_id, name), version, text)
+    return playlist
+
+
+def get_playlist(video_id, name):
+    """
+    Returns the published playlist of a rendition, from the cache if possible.
+
+    Args:
+        video_id (int): Primary key of the Video object.
+        name (str): Rendition name (e.g. '480p').
+
+    Returns:
+        tuple: (text, mtime) with the modification time as a Unix timestamp,
+        or None if the playlist does not exist.
+    """
+    entry = _local_get((video_id, name))
+    if entry is not None and time.monotonic() - entry.checked_at < settings.VIDEO_PLAYLIST_LOCAL_TTL:
+        return entry.text, entry.version / 1e9
+
+    version = cache.get(playlist_version_key(video_id, name))
+    if version is not None:
+        if entry is not None and entry.version == version:
+            text = entry.text
+        else:
+            text = cache.get(playlist_content_key(video_id, name, version))
+        if text is not None:
+            _local_put((video_id, name), version, text)
+            return text, version / 1e9
+
+    playlist = cache_playlist(video_id, name, overwrite=False)
+    if playlist is None:
+        return None
+    text, version = playlist
+    return text, version / 1e9
+
+
+def forget_playlists(video_id, names):
+    """
+    Removes the given renditions of a video from the cache, e.g. when its media is deleted.
+
+    The version entries are deleted from the shared tier and the entries of this
+    process from its in-process tier; other processes drop theirs once
+    VIDEO_PLAYLIST_LOCAL_TTL has passed.
+    """
+    cache.delete_many([playlist_version_key(video_id, name) for name in names])
+    with _local_lock:
+        for name in names:
+            _local.pop((video_id, name), None)
@@ -0,0 +1,202 @@
+"""
+Transcode progress module
+
+This module runs FFmpeg with `-progress pipe:1`, parses the key=value progress
+blocks while the process is running and stores per-rendition progress
+(frames, encoding speed, ETA) in the configured Django cache (Redis).
+
+Constants:
+    PROGRESS_TIMEOUT (int): Cache lifetime of a progress entry in seconds.
+    PROGRESS_WRITE_INTERVAL (float): Minimum number of seconds between two cache writes per tracker.
+
+Classes:
+    ProgressTracker: Aggregates the progress of one or more FFmpeg processes working on the same renditions.
+
+Functions:
+    progress_cache_key(video_id, name): Cache key of the progress entry of one rendition.
+    get_progress(video_id, names): Reads the progress entries of the given renditions.
+    parse_progress(lines): Yields one dict per FFmpeg progress block.
+    run_ffmpeg(cmd, tracker, key): Runs FFmpeg and reports its progress to a tracker.
+"""
+
+import subprocess
+import tempfile
+import threading
+import time
+from django.core.cache import cache
+from django.utils import timezone
+
+
+PROGRESS_TIMEOUT = 60 * 60 * 24
+PROGRESS_WRITE_INTERVAL = 1.0
+
+
+def progress_cache_key(video_id, name):
+    """
+    Returns the cache key of the transcode progress entry of one rendition.
+    """
+    return f"transcode-progress:{video_id}:{name}"
+
+
+def get_progress(video_id, names):
+    """
+    Reads the transcode progress of the given renditions of a video.
+
+    Args:
+        video_id (int): Primary key of the Video object.
+        names (list): Rendition names (e.g. ['480p', '720p']).
+
+    Returns:
+        dict: Progress entry per rendition name; renditions without an entry are omitted.
+    """
+    keys = {progress_cache_key(video_id, name): name for name in names}
+    return {keys[key]: value for key, value in cache.get_many(list(keys)).items()}
+
+
+def parse_progress(lines):
+    """
+    Parses FFmpeg `-progress` output.
+
+    FFmpeg writes blocks of key=value lines, each block terminated by a
+    `progress=continue` or `progress=end` line.
+
+    Args:
+        lines (Iterable[str]): Output lines of FFmpeg's progress pipe.
+
+    Yields:
+        dict: The key/value pairs of one progress block.
+    """
+    block = {}
+    for line in lines:
+        key, _, value = line.strip().partition("=")
+        if not key:
+            continue
+        block[key] = value
+        if key == "progress":
+            yield block
+            block = {}
+
+
+def _to_float(value):
+    """
+    Converts an FFmpeg progress value ('1.5x', '24.00', 'N/A') into a float, or None.
+    """
+    try:
+        return float(str(value).rstrip("x"))
+    except (TypeError, ValueError):
+        return None
+
+
+class ProgressTracker:
+    """
+    Collects the progress of the FFmpeg processes transcoding a set of renditions.
+
+    Several processes may report to the same tracker (e.g. parallel chunk
+    transcodes); each one reports under its own key, and the tracker sums
+    their encoded media time, frames and speed. The aggregated state is written
+    to the cache for every rendition name, at most once per PROGRESS_WRITE_INTERVAL.
+
+    Args:
+        video_id (int): Primary key of the Video object.
+        names (list): Rendition names covered by the tracked processes.
+        duration (float, optional): Source duration in seconds, used for percent and ETA.
+    """
+
+    def __init__(self, video_id, names, duration=None):
+        self.video_id = video_id
+        self.names = list(names)
+        self.duration = duration
+        self.processes = {}
+        self.last_write = 0.0
+        self.lock = threading.Lock()
+
+    def update(self, key, block):
+        """
+        Records a parsed FFmpeg progress block for the process identified by `key`.
+        """
+        out_time_us = _to_float(block.get("out_time_us") or block.get("out_time_ms"))
+        with self.lock:
+            self.processes[key] = {
+                "frame": int(_to_float(block.get("frame")) or 0),
+                "fps": _to_float(block.get("fps")) or 0.0,
+                "speed": _to_float(block.get("speed")) or 0.0,
+                "out_time": max(out_time_us or 0.0, 0.0) / 1_000_000,
+                "finished": block.get("progress") == "end",
+            }
+            if time.monotonic() - self.last_write >= PROGRESS_WRITE_INTERVAL:
+                self._write("running")
+
+    def finish(self):
+        """
+        Marks all tracked renditions as finished.
+        """
+        with self.lock:
+            self._write("finished")
+
+    def fail(self):
+        """
+        Marks all tracked renditions as failed.
+        """
+        with self.lock:
+            self._write("failed")
+
+    def _write(self, status):
+        processes = self.processes.values()
+        out_time = sum(p["out_time"] for p in processes)
+        # Parallel processes encode at the same time, so their speeds add up
+        speed = sum(p["speed"] for p in processes if not p["finished"])
+
+        entry = {
+            "status": status,
+            "frames": sum(p["frame"] for p in processes),
+            "fps": round(sum(p["fps"] for p in processes if not p["finished"]), 2),
+            "speed": round(speed, 3),
+            "out_time": round(out_time, 3),
+            "duration": self.duration,
+            "percent": None,
+            "eta": None,
+            "updated_at": timezone.now().isoformat(),
+        }
+        if status == "finished":
+            entry["percent"], entry["eta"] = 100.0, 0
+        elif self.duration:
+            entry["percent"] = round(min(out_time / self.duration, 1.0) * 100, 1)
+            if speed > 0:
+                entry["eta"] = round(max(self.duration - out_time, 0.0) / speed)
+
+        cache.set_many({progress_cache_key(self.video_id, name): entry for name in self.names}, PROGRESS_TIMEOUT)
+        self.last_write = time.monotonic()
+
+
+def run_ffmpeg(cmd, tracker=None, key=0):
+    """
+    Runs an FFmpeg command and reports its progress while it is running.
+
+    Without a tracker the command simply runs to completion. With a tracker,
+    `-progress pipe:1` is added and every progress block is passed to
+    `tracker.update(key, block)`. Stderr is spooled to a temporary file, so a
+    chatty FFmpeg can never block on a full pipe.
+
+    Args:
+        cmd (list): FFmpeg command line, starting with the executable.
+        tracker (ProgressTracker, optional): Receives the parsed progress blocks.
+        key (Hashable): Identifies this process within the tracker.
+
+    Raises:
+        subprocess.CalledProcessError: If FFmpeg exits with a non-zero status.
+    """
+    if tracker is None:
+        subprocess.run(cmd, capture_output=True, check=True)
+        return
+
+    cmd = [cmd[0], "-progress", "pipe:1", "-nostats", *cmd[1:]]
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr, text=True)
+        for block in parse_progress(process.stdout):
+            tracker.update(key, block)
+        returncode = process.wait()
+
+        if returncode:
+            tracker.fail()
+            stderr.seek(0)
+            raise subprocess.CalledProcessError(returncode, cmd, stderr=stderr.read())
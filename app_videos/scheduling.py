@@ -0,0 +1,96 @@
+"""
+Transcode scheduling helpers
+
+Transcode jobs are spread over three RQ queues by their estimated cost, and
+workers listen to them in priority order (`rqworker default transcode_short
+transcode transcode_long`). Short clips therefore never wait behind a long
+upload (shortest-job-first by cost class); the jobs on 'default' (e-mails,
+finalize jobs) come first and also have a worker of their own. The FFmpeg thread count of every
+job is capped by the cores available to the worker, so several workers on one
+host do not oversubscribe its CPUs.
+
+Constants:
+    TRANSCODE_QUEUES (tuple): Transcode queue names from cheapest to most expensive jobs.
+    REFERENCE_PIXELS (int): Pixel count of one cost unit (a 1080p frame).
+
+Functions:
+    estimate_cost(video, formats): Estimates the transcode cost of a video in 1080p-seconds.
+    select_transcode_queue(cost): Returns the transcode queue for a job of the given cost.
+    available_cores(): Returns the number of CPU cores the worker process may run on.
+    ffmpeg_threads(processes): Returns the FFmpeg thread budget per process of a job.
+    processing_retry(): Returns the RQ retry policy of the processing jobs.
+"""
+
+import os
+from django.conf import settings
+from rq import Retry
+
+
+TRANSCODE_QUEUES = ("transcode_short", "transcode", "transcode_long")
+REFERENCE_PIXELS = 1920 * 1080
+
+
+def estimate_cost(video, formats):
+    """
+    Estimates the transcode cost of a video as seconds of 1080p output.
+
+    Encode time grows with the source duration and the number of output pixels
+    per frame, summed over all renditions that will be produced.
+
+    Args:
+        video (Video): The probed video.
+        formats (list): Rendition tuples of (name, scale, video_bitrate, audio_bitrate) to produce.
+
+    Returns:
+        float: The estimated cost; 0 if the duration is unknown.
+    """
+    pixels = 0
+    for _, scale, *_ in formats:
+        width, height = (int(part) for part in scale.split(":"))
+        pixels += width * height
+    return (video.duration or 0) * pixels / REFERENCE_PIXELS
+
+
+def select_transcode_queue(cost):
+    """
+    Returns the transcode queue for a job of the given cost.
+
+    settings.VIDEO_SCHEDULER_COST_THRESHOLDS holds the upper cost bounds of the
+    short and the regular queue; more expensive jobs go to 'transcode_long'.
+    """
+    short_limit, regular_limit = settings.VIDEO_SCHEDULER_COST_THRESHOLDS
+    if cost <= short_limit:
+        return TRANSCODE_QUEUES[0]
+    if cost <= regular_limit:
+        return TRANSCODE_QUEUES[1]
+    return TRANSCODE_QUEUES[2]
+
+
+def available_cores():
+    """
+    Returns the number of CPU cores the current process may run on (respecting CPU affinity).
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def ffmpeg_threads(processes=1):
+    """
+    Returns the thread budget of each FFmpeg process of a transcode job.
+
+    settings.VIDEO_FFMPEG_THREADS fixes the budget; otherwise the cores available
+    to the worker are shared between the settings.VIDEO_WORKERS_PER_HOST workers
+    of the host and the `processes` FFmpeg processes the job runs in parallel.
+    """
+    if settings.VIDEO_FFMPEG_THREADS:
+        return settings.VIDEO_FFMPEG_THREADS
+    return max(1, available_cores() // (max(1, settings.VIDEO_WORKERS_PER_HOST) * max(1, processes)))
+
+
+def processing_retry():
+    """
+    Returns the RQ retry policy of the processing jobs (settings.VIDEO_TRANSCODE_RETRY_INTERVALS), or None.
+    """
+    intervals = settings.VIDEO_TRANSCODE_RETRY_INTERVALS
+    return Retry(max=len(intervals), interval=intervals) if intervals else None
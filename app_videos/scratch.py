@@ -0,0 +1,148 @@
+"""
+Scratch directory helpers
+
+FFmpeg writes its output into a scratch directory (settings.VIDEO_SCRATCH_ROOT,
+e.g. local NVMe or tmpfs) instead of the shared media volume the web
+container serves from. A rendition is only published into
+MEDIA_ROOT/video/<video_id>/ after it was verified, with a rename of the whole
+directory, so players never see half-written playlists or segments, and the
+heavy write I/O of a transcode stays off the media volume.
+
+Constants:
+    SPACE_HEADROOM (float): Safety factor applied to the estimated output size.
+
+Classes:
+    InsufficientSpaceError: Raised when the scratch or media volume cannot hold the output of a job.
+
+Functions:
+    media_dir(video_id, *parts): Returns a path inside the published media directory of a video.
+    scratch_root(): Returns the root directory of the transcode scratch space.
+    scratch_dir(video_id, *parts): Returns a path inside the scratch directory of a video.
+    estimate_output_bytes(duration, bitrates): Estimates the output size of a transcode.
+    ensure_free_space(video, bitrates): Checks that the scratch and media volumes can hold the output of a job.
+    verify_rendition(output_dir): Checks that a rendition playlist is finished and all of its segments exist.
+    publish_dir(src, dest): Moves a finished output directory into place atomically.
+"""
+
+import os
+import shutil
+from pathlib import Path
+
+from django.conf import settings
+
+from .hls import init_segment_uri, is_complete_playlist, read_media_playlist
+from .pertitle import parse_bitrate
+
+
+SPACE_HEADROOM = 1.5
+
+
+class InsufficientSpaceError(OSError):
+    """
+    Raised when a volume has not enough free space for the output of a transcode job.
+    """
+
+
+def media_dir(video_id, *parts):
+    """
+    Returns MEDIA_ROOT/video/<video_id>/<parts>, the published (served) output of a video.
+    """
+    return Path(settings.MEDIA_ROOT, "video", str(video_id), *parts)
+
+
+def scratch_root():
+    """
+    Returns settings.VIDEO_SCRATCH_ROOT, or MEDIA_ROOT/scratch when it is not configured.
+    """
+    return Path(settings.VIDEO_SCRATCH_ROOT or Path(settings.MEDIA_ROOT, "scratch"))
+
+
+def scratch_dir(video_id, *parts):
+    """
+    Returns <scratch root>/<video_id>/<parts>, where the transcode jobs of a video write their output.
+    """
+    return Path(scratch_root(), str(video_id), *parts)
+
+
+def estimate_output_bytes(duration, bitrates):
+    """
+    Estimates the bytes written for `duration` seconds at the given bitrates ('800k', '96k', ...).
+    """
+    return int((duration or 0) * sum(parse_bitrate(bitrate) for bitrate in bitrates if bitrate) / 8)
+
+
+def ensure_free_space(video, bitrates):
+    """
+    Checks that the scratch and the media volume can hold the output of a transcode job.
+
+    The estimated output size (see estimate_output_bytes) times SPACE_HEADROOM
+    plus settings.VIDEO_MIN_FREE_SPACE must be free on both volumes; a volume
+    shared by both is checked once.
+
+    Args:
+        video (Video): The probed video.
+        bitrates (list): Target bitrates of all streams the job writes.
+
+    Raises:
+        InsufficientSpaceError: If a volume has not enough free space; the job is retried later.
+    """
+    required = estimate_output_bytes(video.duration, bitrates) * SPACE_HEADROOM + settings.VIDEO_MIN_FREE_SPACE
+    volumes = {}
+    for root in (scratch_root(), Path(settings.MEDIA_ROOT)):
+        root.mkdir(parents=True, exist_ok=True)
+        volumes.setdefault(os.stat(root).st_dev, root)
+
+    for root in volumes.values():
+        free = shutil.disk_usage(root).free
+        if free < required:
+            raise InsufficientSpaceError(f"{root} has {free} bytes free, video {video.pk} needs {int(required)}.")
+
+
+def verify_rendition(output_dir):
+    """
+    Checks that the playlist of a rendition is finished and every segment (and init segment) it lists exists.
+
+    Raises:
+        FileNotFoundError: If the playlist is unfinished or a listed file is missing or empty.
+    """
+    index = Path(output_dir) / "index.m3u8"
+    if not is_complete_playlist(index):
+        raise FileNotFoundError(f"{index} is missing or unfinished.")
+
+    segments = read_media_playlist(index)
+    uris = {segment.uri for segment in segments} | set(filter(None, (init_segment_uri(segment) for segment in segments)))
+    for uri in uris:
+        path = Path(output_dir) / uri
+        if not path.is_file() or not path.stat().st_size:
+            raise FileNotFoundError(f"{path} is listed in {index} but missing or empty.")
+
+
+def publish_dir(src, dest):
+    """
+    Moves a finished output directory from the scratch space to `dest` atomically.
+
+    On the same filesystem this is a single rename. Otherwise the directory is
+    first copied next to `dest` and then renamed into place, so `dest` only
+    ever appears complete. An existing `dest` (e.g. from an earlier run) is
+    replaced.
+    """
+    src, dest = Path(src), Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+
+    staged = src
+    if os.stat(src).st_dev != os.stat(dest.parent).st_dev:
+        staged = dest.with_name(f".{dest.name}.incoming")
+        shutil.rmtree(staged, ignore_errors=True)
+        shutil.copytree(src, staged)
+
+    if dest.exists():
+        previous = dest.with_name(f".{dest.name}.previous")
+        shutil.rmtree(previous, ignore_errors=True)
+        os.rename(dest, previous)
+        os.rename(staged, dest)
+        shutil.rmtree(previous, ignore_errors=True)
+    else:
+        os.rename(staged, dest)
+
+    if staged is not src:
+        shutil.rmtree(src, ignore_errors=True)
@@ -4,31 +4,39 @@ Video processing signals module
 This module contains signal handlers that manage post-save and post-delete behaviors for the Video model.
 These handlers integrate with Django RQ to enqueue asynchronous video processing tasks and handle media file cleanup.
 
-Constants:
-    VIDEO_FORMATS (list): Preset video quality specifications for transcoding.
-
 Functions:
-    video_post_save: Enqueues HLS video conversion and playlist creation tasks after a new Video instance is saved with a video file.
-    auto_delete_file_on_delete: Cleans up video and thumbnail files from the filesystem when a Video instance is deleted.
+    video_pre_save: Stores the SHA-256 hash computed during upload as the Video's content hash.
+    video_post_save: Enqueues the scheduling job that probes a new upload and enqueues its processing pipeline
+                     as an RQ dependency graph on cost-based transcode queues. Depending on
+                     settings.VIDEO_TRANSCODE_MODE, all renditions are produced by a single decode ('ladder'),
+                     by parallel chunk transcodes ('chunked') or by one parallel job per rendition
+                     ('per_rendition'). Duplicates of processed uploads reuse the existing output instead.
+    auto_delete_file_on_delete: Schedules the removal of a deleted Video's media files in a background job.
 """
 
-import shutil
-from pathlib import Path
-from django.conf import settings
 import django_rq
-from .tasks import convert_video_to_hls, create_master_playlist, create_thumbnail
+from .cleanup import schedule_media_deletion, video_media_paths
+from .scheduling import TRANSCODE_QUEUES, processing_retry
+from .tasks import find_processed_duplicate, reuse_processed_video, schedule_video
 from .models import Video
 from django.dispatch import receiver
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.db import transaction
 
 
-VIDEO_FORMATS = [
-    #("name", "scale", "video_bitrate", "audio_bitrate")
-    ("480p", "854:480", "800k", "96k"),
-    ("720p", "1280:720", "2800k", "128k"),
-    ("1080p", "1920:1080", "5000k", "192k"),
-]
+@receiver(pre_save, sender=Video)
+def video_pre_save(sender, instance, **kwargs):
+    """
+    Signal handler triggered before saving a Video instance.
+
+    Copies the SHA-256 digest that the hashing upload handlers computed while the
+    file was being received onto the Video, so duplicates can be detected without
+    reading the file again.
+    """
+    if instance.content_hash or not instance.video_file or instance.video_file._committed:
+        return
+    instance.content_hash = getattr(instance.video_file.file, "sha256", "")
+
 
 @receiver(post_save, sender=Video)
 def video_post_save(sender, instance, created, **kwargs):
@@ -36,23 +44,34 @@ def video_post_save(sender, instance, created, **kwargs):
     Signal handler triggered after saving a Video instance.
 
     If a new Video with an associated video_file is created, this function
-    enqueues asynchronous RQ tasks to convert the video into multiple HLS resolutions
-    (480p, 720p, 1080p) and to create the master playlist.
+    enqueues the scheduling job (see schedule_video) on the short transcode queue.
+    It probes the source, estimates the transcode cost and enqueues the
+    transcode, trickplay, thumbnail and finalize jobs on the queues matching
+    their cost. The renditions come from the video's encoding profile (the
+    video's own profile, else the profile of its category, else the default
+    profile). In 'ladder' mode a single task decodes the source once and writes
+    every resolution and the trickplay sprite sheets; in 'chunked' mode a single
+    task transcodes keyframe-aligned chunks of the source in parallel; in
+    'per_rendition' mode one task is enqueued per resolution.
+
+    If an already processed Video has the same content hash, a single task
+    reuses its HLS output and thumbnail instead of transcoding again. Uploads
+    without a hash yet (resumable uploads) are checked by schedule_video once
+    probe_video has hashed them.
+
+    All processing jobs are idempotent and resumable, so they are retried
+    automatically (settings.VIDEO_TRANSCODE_RETRY_INTERVALS) when they fail or
+    their worker is killed.
     """
     if created and instance.video_file:
         def enqueue_tasks():
-            queue = django_rq.get_queue('default', autocommit=True)
-
-            queue.enqueue(convert_video_to_hls, instance.id, *VIDEO_FORMATS[0])  # 480p
-            queue.enqueue(convert_video_to_hls, instance.id, *VIDEO_FORMATS[1])  # 720p
-            queue.enqueue(convert_video_to_hls, instance.id, *VIDEO_FORMATS[2])  # 1080p
-
-            if not instance.thumbnail:
-                queue.enqueue(create_thumbnail, instance.id)
-                
-            queue.enqueue(create_master_playlist, instance.id)
-
+            duplicate = find_processed_duplicate(instance)
+            if duplicate:
+                django_rq.get_queue('default', autocommit=True).enqueue(reuse_processed_video, instance.id, duplicate.id)
+                return
 
+            queue = django_rq.get_queue(TRANSCODE_QUEUES[0], autocommit=True)
+            queue.enqueue(schedule_video, instance.id, retry=processing_retry())
 
         transaction.on_commit(enqueue_tasks)
 
@@ -62,15 +81,9 @@ def auto_delete_file_on_delete(sender, instance, **kwargs):
     """
     Signal handler triggered after deleting a Video instance.
 
-    This function removes the associated video directory and thumbnail image file from
-    the filesystem to clean up storage when the Video object is deleted.
+    The video directory (video/<video.pk>), the uploaded source, the thumbnail
+    and its variants are removed by a background job once the transaction
+    commits, batched with every other Video deleted in the same transaction
+    (see schedule_media_deletion). The delete itself never touches the disk.
     """
-    video_dir = Path(settings.MEDIA_ROOT) / f"video/{instance.pk}"
-    if video_dir.exists() and video_dir.is_dir():
-        # Remove entire directory tree containing video files (=> delete folder video/<video.pk>)
-        shutil.rmtree(video_dir)
-
-    if instance.thumbnail:
-        path = Path(instance.thumbnail.path)
-        if path.exists():
-            path.unlink()
+    schedule_media_deletion(video_media_paths(instance))
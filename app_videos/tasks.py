@@ -5,27 +5,261 @@ This module defines utility functions to manage video processing workflows such
 moving thumbnails, transcoding videos to HLS formats at multiple resolutions, and creating
 a master HLS playlist.
 
+The rendition ladder and the encoder settings come from the EncodingProfile
+that applies to a video (see EncodingProfile.objects.for_video).
+
+FFmpeg writes into the scratch directory of a video (see app_videos.scratch);
+finished renditions are verified and moved into MEDIA_ROOT/video/<video_id>/
+as a whole, next to the master playlist.
+
 Constants:
-    RESOLUTIONS (list): Standardized video output resolutions used for HLS transcoding.
+    GOP_SECONDS (int): Keyframe interval in seconds; segment lengths should be a multiple of it.
+    VIDEO_ENCODERS (dict): FFmpeg encoder per EncodingProfile video codec.
+    AUDIO_RENDITION (str): Output directory and rendition name of the shared audio rendition.
+    AUDIO_GROUP_ID (str): GROUP-ID of the shared audio rendition in the master playlist.
 
 Functions:
+    hash_file(path): Computes the SHA-256 hex digest of a file in streaming fashion.
+    find_processed_duplicate(video): Returns an already processed Video with the same content hash.
+    probe_video(video_id): Runs ffprobe on the uploaded source and stores its metadata on the Video.
+    select_renditions(video, formats): Drops renditions that would upscale the probed source.
+    analyze_complexity(video_id, formats): Runs the per-title complexity probe and stores a per-video bitrate ladder.
     clean_up_video(video_id): Deletes the original video file from storage and clears the database field.
     move_video_thumbnail(video_id): Moves and renames the thumbnail image to a permanent media directory.
+    create_thumbnail_variants(video_id): Writes the responsive WebP/AVIF/JPEG variants of the thumbnail.
+    create_trickplay(video_id): Generates the trickplay sprite sheets and WebVTT index in a separate FFmpeg pass.
     convert_video_to_hls(video_id, name, scale, v_bitrate, a_bitrate): Uses FFmpeg to transcode a video to HLS format.
-    create_master_playlist(video_id): Generates a master playlist referencing all resolution-specific playlists and triggers cleanup tasks.
+    convert_audio_to_hls(video_id): Encodes the audio once into the shared HLS audio rendition.
+    convert_video_to_hls_ladder(video_id, formats): Decodes the source once and transcodes it into all HLS renditions.
+    convert_video_to_hls_chunked(video_id, formats): Splits the source at keyframes and transcodes the chunks in parallel.
+    create_master_playlist(video_id): Generates a master playlist referencing all finished resolution-specific playlists.
+    publish_video(video_id): Rewrites the master playlist and marks the video playable once a rendition is finished.
+    finalize_video(video_id): Writes the master playlist, moves the thumbnail and removes the source once all renditions exist.
+    schedule_video(video_id): Probes a new upload and enqueues its processing jobs on queues matching their cost.
+    reuse_processed_video(video_id, source_id): Reuses the HLS output and thumbnail of an identical, already processed upload.
 """
 
+import hashlib
+import json
+import math
+import os
+import shutil
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import django_rq
 from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
 from pathlib import Path
-from .models import Video
+from .hls import (
+    codec_string, init_segment_uri, is_complete_playlist, read_media_playlist, segment_byte_size,
+    write_master_playlist, write_media_playlist
+)
+from .models import EncodingProfile, Video, VideoRendition
+from .playlist_cache import cache_playlist
+from .pertitle import PROBE_CRF, PROBE_SCALE, apply_bitrate_ladder, derive_bitrate_ladder, sample_offsets
+from .progress import ProgressTracker, run_ffmpeg
+from .scheduling import TRANSCODE_QUEUES, estimate_cost, ffmpeg_threads, processing_retry, select_transcode_queue
+from .scratch import ensure_free_space, media_dir, publish_dir, scratch_dir, verify_rendition
+from .thumbnails import write_thumbnail_variants
+from .trickplay import TRICKPLAY_DIR, TRICKPLAY_INDEX, tile_size, trickplay_filter, trickplay_output_args, write_trickplay_vtt
+
+
+GOP_SECONDS = 2
+DEFAULT_FRAME_RATE = 24
+
+VIDEO_ENCODERS = {
+    "h264": "h264",
+    "hevc": "libx265",
+}
+
+AUDIO_RENDITION = "audio"
+AUDIO_GROUP_ID = "audio"
+
+
+def parse_frame_rate(value):
+    """
+    Converts an ffprobe frame rate fraction (e.g. '30000/1001') into frames per second.
+
+    Returns None for missing or undefined rates such as '0/0'.
+    """
+    if not value:
+        return None
+    numerator, _, denominator = value.partition("/")
+    try:
+        rate = float(numerator) / float(denominator or 1)
+    except (ValueError, ZeroDivisionError):
+        return None
+    return round(rate, 3) or None
+
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """
+    Computes the SHA-256 hex digest of a file without loading it into memory.
+    """
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def find_processed_duplicate(video):
+    """
+    Returns an already processed Video with the same content hash as the given one, or None.
+    """
+    if not video.content_hash:
+        return None
+    return (
+        Video.objects.filter(content_hash=video.content_hash, processed_at__isnull=False)
+        .exclude(pk=video.pk)
+        .order_by("pk")
+        .first()
+    )
+
+
+def probe_video(video_id):
+    """
+    Probes the uploaded source with ffprobe and stores its metadata on the Video.
+
+    Records duration, resolution, frame rate, video/audio codec and overall bitrate,
+    which are later used to pick the rendition ladder and the keyframe interval.
+    Sources that were not hashed during upload get their content hash here, so
+    later duplicates of them can be detected.
+
+    Args:
+        video_id (int): Primary key of the Video object.
+
+    Returns:
+        Video: The updated Video instance.
+    """
+    video = Video.objects.get(pk=video_id)
+
+    cmd = [
+        "ffprobe",
+        "-v", "error",
+        "-print_format", "json",
+        "-show_format",
+        "-show_streams",
+        video.video_file.path
+    ]
+    result = subprocess.run(cmd, capture_output=True, check=True, text=True)
+    data = json.loads(result.stdout or "{}")
+
+    streams = data.get("streams", [])
+    video_stream = next((s for s in streams if s.get("codec_type") == "video"), {})
+    audio_stream = next((s for s in streams if s.get("codec_type") == "audio"), {})
+    source_format = data.get("format", {})
+
+    duration = source_format.get("duration") or video_stream.get("duration")
+    bitrate = source_format.get("bit_rate")
+
+    video.duration = float(duration) if duration else None
+    video.width = video_stream.get("width")
+    video.height = video_stream.get("height")
+    video.frame_rate = parse_frame_rate(video_stream.get("avg_frame_rate")) or parse_frame_rate(video_stream.get("r_frame_rate"))
+    video.video_codec = video_stream.get("codec_name", "")
+    video.audio_codec = audio_stream.get("codec_name", "")
+    video.bitrate = int(bitrate) if bitrate else None
+    if not video.content_hash:
+        video.content_hash = hash_file(video.video_file.path)
+    video.save(update_fields=["duration", "width", "height", "frame_rate", "video_codec", "audio_codec", "bitrate", "content_hash"])
+    return video
+
+
+def ensure_probed(video):
+    """
+    Returns the given Video with source metadata, probing the source first if needed.
+    """
+    if video.height is None and video.video_file:
+        return probe_video(video.pk)
+    return video
+
+
+def select_renditions(video, formats):
+    """
+    Filters a rendition ladder down to the renditions that make sense for the probed source.
+
+    A rendition is dropped when it is larger than the source in both dimensions,
+    i.e. when producing it would only upscale. The lowest rendition is always kept,
+    so every video gets at least one playable stream. Without probe data the
+    ladder is returned unchanged.
+
+    Args:
+        video (Video): Video with source metadata.
+        formats (list): Rendition tuples whose second item is the scale in WIDTH:HEIGHT format.
+
+    Returns:
+        list: The renditions to produce, in ladder order.
+    """
+    if not video.width or not video.height:
+        return list(formats)
+
+    selected = []
+    for video_format in formats:
+        width, height = (int(value) for value in video_format[1].split(":"))
+        if width <= video.width or height <= video.height:
+            selected.append(video_format)
+    return selected or list(formats[:1])
+
+
+def analyze_complexity(video_id, formats):
+    """
+    Runs the per-title complexity probe and stores a per-video bitrate ladder.
+
+    A few samples of settings.VIDEO_COMPLEXITY_SAMPLE_SECONDS, spread over the
+    source, are encoded at PROBE_SCALE with constant quality (CRF). Their
+    average bitrate is scaled to every rendition (see derive_bitrate_ladder)
+    and used instead of the fixed bitrates by the transcode tasks.
+    Does nothing if the video already has a bitrate ladder.
+
+    Args:
+        video_id (int): Primary key of the Video object.
+        formats (list): Rendition tuples of (name, scale, video_bitrate, audio_bitrate).
+
+    Returns:
+        Video: The updated Video instance.
+    """
+    video = ensure_probed(Video.objects.get(pk=video_id))
+    if video.bitrate_ladder:
+        return video
 
+    sample_dir = scratch_dir(video_id, "complexity")
+    sample_dir.mkdir(parents=True, exist_ok=True)
+    length = settings.VIDEO_COMPLEXITY_SAMPLE_SECONDS
+    total_bytes = total_seconds = 0
 
-RESOLUTIONS = [
-    ("480p", "854:480"),
-    ("720p", "1280:720"),
-    ("1080p", "1920:1080"),
-]
+    for index, offset in enumerate(sample_offsets(video.duration, settings.VIDEO_COMPLEXITY_SAMPLES, length)):
+        sample = sample_dir / f"sample_{index:02d}.mp4"
+        cmd = [
+            "ffmpeg", "-y",
+            "-ss", f"{offset:.3f}", "-t", str(length),
+            "-i", video.video_file.path,
+            "-map", "0:v:0", "-an",
+            "-vf", f"scale={PROBE_SCALE}",
+            "-c:v", "h264", "-preset", "veryfast", "-crf", str(PROBE_CRF),
+            str(sample)
+        ]
+        subprocess.run(cmd, capture_output=True, check=True)
+        total_bytes += sample.stat().st_size
+        total_seconds += min(length, video.duration - offset) if video.duration else length
+
+    shutil.rmtree(sample_dir)
+
+    video.complexity_bitrate = round(total_bytes * 8 / total_seconds)
+    video.bitrate_ladder = derive_bitrate_ladder(video.complexity_bitrate, formats)
+    video.save(update_fields=["complexity_bitrate", "bitrate_ladder"])
+    return video
+
+
+def gop_size(frame_rate):
+    """
+    Returns the keyframe interval in frames for the given source frame rate.
+
+    The interval spans GOP_SECONDS at the real frame rate, so every segment
+    starts on a keyframe in all renditions.
+    """
+    return max(1, round((frame_rate or DEFAULT_FRAME_RATE) * GOP_SECONDS))
 
 def clean_up_video(video_id):
     """
@@ -47,8 +281,11 @@ def create_thumbnail(video_id):
     This function extracts a single frame (at the 5-second mark) from the video file
     and saves it as a PNG image in the 'thumbnail' directory under MEDIA_ROOT.
     The resulting thumbnail path is then stored in the corresponding Video model instance.
+    Does nothing if the video already has a thumbnail (e.g. when the job is retried).
     """
     video = Video.objects.get(pk=video_id)
+    if video.thumbnail:
+        return
     src_video = Path(video.video_file.path)
 
     dest_dir = Path(settings.MEDIA_ROOT) / "thumbnail"
@@ -99,6 +336,281 @@ def move_video_thumbnail(video_id):
         video.save(update_fields=['thumbnail'])
 
 
+def create_thumbnail_variants(video_id):
+    """
+    Writes resized, compressed variants of the video's thumbnail for responsive images.
+
+    The widths and formats come from settings.VIDEO_THUMBNAIL_WIDTHS and
+    settings.VIDEO_THUMBNAIL_FORMATS; the variant paths are stored in
+    Video.thumbnail_variants. Does nothing if the video has no thumbnail.
+    """
+    video = Video.objects.get(pk=video_id)
+    if not video.thumbnail:
+        return
+
+    src = Path(video.thumbnail.path)
+    video.thumbnail_variants = write_thumbnail_variants(
+        src, src.stem, settings.VIDEO_THUMBNAIL_WIDTHS, settings.VIDEO_THUMBNAIL_FORMATS
+    )
+    video.save(update_fields=["thumbnail_variants"])
+
+
+def create_trickplay(video_id):
+    """
+    Generates the trickplay sprite sheets and WebVTT index of a video in a separate FFmpeg pass.
+
+    The ladder transcode produces them in its own decode pass; this task covers
+    the other transcode modes and resumed ladder transcodes. Does nothing if
+    trickplay is disabled (settings.VIDEO_TRICKPLAY) or the index is already
+    published. The images are written to the scratch directory and published
+    together with their index.
+    """
+    video = ensure_probed(Video.objects.get(pk=video_id))
+    if not settings.VIDEO_TRICKPLAY or media_dir(video_id, TRICKPLAY_DIR, TRICKPLAY_INDEX).exists():
+        return
+    output_dir = scratch_dir(video_id, TRICKPLAY_DIR)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    cmd = [
+        "ffmpeg", "-y",
+        "-i", video.video_file.path,
+        "-vf", trickplay_filter(video),
+        *trickplay_output_args(output_dir),
+    ]
+    subprocess.run(cmd, capture_output=True, check=True)
+
+    write_trickplay_vtt(output_dir / TRICKPLAY_INDEX, video.duration or 0, *tile_size(video))
+    publish_dir(output_dir, media_dir(video_id, TRICKPLAY_DIR))
+
+
+def build_hls_output_args(output_dir, name, v_bitrate, a_bitrate, frame_rate=None, chunk_index=None, ts_offset=None, resume_from=None, profile=None, threads=None):
+    """
+    Builds the FFmpeg encoder and HLS muxer arguments for a single rendition.
+
+    The arguments are shared by the per-rendition and the single-decode ladder
+    transcodes, so both modes produce identical segments and playlists.
+    settings.VIDEO_HLS_SEGMENT_TYPE selects MPEG-TS (.ts) or CMAF fragmented
+    MP4 (.m4s with an init segment); settings.VIDEO_HLS_SINGLE_FILE writes one
+    media file per rendition that the playlist addresses with byte ranges.
+
+    Args:
+        output_dir (Path): Directory receiving the rendition playlist and segments.
+        name (str): Label for the resolution (e.g., '480p').
+        v_bitrate (str | None): Target video bitrate (e.g., '800k'); None writes an audio-only rendition.
+        a_bitrate (str | None): Target audio bitrate (e.g., '96k'); None writes a video-only rendition
+            (the audio is then served by the shared audio rendition).
+        frame_rate (float, optional): Probed source frame rate used for the keyframe interval.
+        chunk_index (int, optional): Index of the source chunk when transcoding in chunked mode;
+            writes a per-chunk playlist and chunk-prefixed segment names.
+        ts_offset (float, optional): Start time of the chunk (or of the resume point) in the
+            source, so segment timestamps continue seamlessly.
+        resume_from (int, optional): Number of complete segments already written; the
+            remaining segments are numbered from there and listed in resume.m3u8.
+        profile (EncodingProfile, optional): Video codec, encoder preset and segment length;
+            the model defaults (H.264, 6 s segments) when omitted.
+        threads (int, optional): Thread cap of the video encoder; FFmpeg's automatic choice when omitted.
+
+    Returns:
+        list: FFmpeg output arguments ending with the rendition playlist path.
+    """
+    profile = profile or EncodingProfile()
+    if chunk_index is not None:
+        playlist = output_dir / f"chunk_{chunk_index:04d}.m3u8"
+        base_name = f"{name}_{chunk_index:04d}"
+    elif resume_from:
+        playlist = output_dir / "resume.m3u8"
+        base_name = name
+    else:
+        playlist = output_dir / "index.m3u8"
+        base_name = name
+    gop = str(gop_size(frame_rate))
+    offset_args = ["-output_ts_offset", f"{ts_offset:.6f}"] if ts_offset else []
+    resume_args = ["-start_number", str(resume_from)] if resume_from else []
+
+    if settings.VIDEO_HLS_SEGMENT_TYPE == "fmp4":
+        extension = "m4s"
+        container_args = ["-hls_segment_type", "fmp4", "-hls_fmp4_init_filename", f"{base_name}_init.mp4"]
+        if v_bitrate and profile.video_codec == "hevc":
+            # Apple players only accept HEVC in fMP4 with the hvc1 sample entry
+            container_args += ["-tag:v", "hvc1"]
+    else:
+        extension = "ts"
+        container_args = []
+
+    if settings.VIDEO_HLS_SINGLE_FILE:
+        # One media file per rendition, segments are addressed with #EXT-X-BYTERANGE
+        ts_pattern = output_dir / f"{base_name}.{extension}"
+        container_args += ["-hls_flags", "single_file"]
+    else:
+        ts_pattern = output_dir / f"{base_name}_%03d.{extension}"
+
+    audio_args = ["-c:a", "aac", "-ar", "48000", "-b:a", a_bitrate] if a_bitrate else ["-an"]
+    if v_bitrate:
+        video_args = [
+            "-c:v", VIDEO_ENCODERS[profile.video_codec], "-profile:v", "main", "-crf", "20",
+            *(["-preset", profile.preset] if profile.preset else []),
+            *(["-threads", str(threads)] if threads else []),
+            "-sc_threshold", "0", "-g", gop, "-keyint_min", gop,
+            "-force_key_frames", f"expr:gte(t,n_forced*{profile.segment_seconds})",
+            "-b:v", v_bitrate, "-maxrate", v_bitrate, "-bufsize", "2M",
+        ]
+    else:
+        video_args = ["-vn"]
+
+    return [
+        *offset_args,
+        *audio_args,
+        *video_args,
+        "-hls_time", str(profile.segment_seconds),
+        "-hls_playlist_type", "vod",
+        *container_args,
+        *resume_args,
+        "-hls_segment_filename", str(ts_pattern),
+        str(playlist)
+    ]
+
+
+def get_rendition_states(video, names):
+    """
+    Returns the VideoRendition state record per rendition name, creating missing ones.
+    """
+    return {name: VideoRendition.objects.get_or_create(video=video, name=name)[0] for name in names}
+
+
+def is_finished_rendition(output_dir):
+    """
+    Checks whether the playlist of a rendition is finished and contains no unmerged resumed segments.
+    """
+    return is_complete_playlist(output_dir / "index.m3u8") and not (output_dir / "resume.m3u8").exists()
+
+
+def get_pending_renditions(video, formats):
+    """
+    Returns the rendition state records and the renditions of `formats` that still need transcoding.
+
+    A rendition whose playlist is already finished (e.g. the worker was killed
+    right after FFmpeg exited, or after the rendition was published) is
+    recorded as completed instead of being transcoded again.
+
+    Args:
+        video (Video): The video being transcoded.
+        formats (list): Rendition tuples whose first item is the rendition name.
+
+    Returns:
+        tuple: (dict of VideoRendition per name, list of pending rendition tuples)
+    """
+    states = get_rendition_states(video, [name for name, *_ in formats])
+    pending = []
+
+    for video_format in formats:
+        state = states[video_format[0]]
+        for output_dir in (scratch_dir(video.pk, state.name), media_dir(video.pk, state.name)):
+            if not state.completed_at and is_finished_rendition(output_dir):
+                complete_rendition(state, output_dir)
+        if not state.completed_at:
+            pending.append(video_format)
+
+    return states, pending
+
+
+def load_resume_point(output_dir):
+    """
+    Returns the complete segments an interrupted transcode already wrote for a rendition.
+
+    FFmpeg lists a segment in the playlist only after the segment is closed, so
+    every listed segment is complete; a half-written trailing segment is simply
+    overwritten on resume. Segments of an interrupted earlier resume (resume.m3u8)
+    are merged into index.m3u8 first.
+
+    Args:
+        output_dir (Path): Directory of the rendition.
+
+    Returns:
+        list: Segment tuples of the complete segments, empty if the rendition has to start over.
+
+    Single-file renditions cannot be appended to and always start over.
+    """
+    index = output_dir / "index.m3u8"
+    resume = output_dir / "resume.m3u8"
+    if settings.VIDEO_HLS_SINGLE_FILE:
+        resume.unlink(missing_ok=True)
+        return []
+    segments = read_media_playlist(index) if index.exists() else []
+
+    if resume.exists():
+        segments += read_media_playlist(resume)
+        write_media_playlist(index, segments, ended=False)
+        resume.unlink()
+
+    return segments
+
+
+def measure_rendition(state, output_dir):
+    """
+    Measures the bitrates and codecs of a rendition from the segments actually produced.
+
+    Sets `bandwidth` to the peak segment bitrate and `average_bandwidth` to the
+    bitrate over the whole rendition (both in bits per second), and `codecs` to
+    the RFC 6381 codec string that ffprobe reports for the first segment (or
+    for the fMP4 init segment). The state is not saved.
+
+    Args:
+        state (VideoRendition): The rendition state to update.
+        output_dir (Path): Directory of the rendition.
+    """
+    segments = read_media_playlist(output_dir / "index.m3u8")
+    if not segments:
+        return
+
+    total_bytes = 0
+    peak = 0.0
+    for segment in segments:
+        size = segment_byte_size(segment, output_dir)
+        total_bytes += size
+        if segment.duration > 0:
+            peak = max(peak, size * 8 / segment.duration)
+    total_duration = sum(segment.duration for segment in segments)
+
+    state.bandwidth = round(peak)
+    state.average_bandwidth = round(total_bytes * 8 / total_duration) if total_duration else None
+
+    probe_target = output_dir / (init_segment_uri(segments[0]) or segments[0].uri)
+    cmd = ["ffprobe", "-v", "error", "-print_format", "json", "-show_streams", str(probe_target)]
+    result = subprocess.run(cmd, capture_output=True, check=True, text=True)
+    streams = json.loads(result.stdout or "{}").get("streams", [])
+    state.codecs = ",".join(filter(None, (codec_string(stream) for stream in streams)))
+
+
+def complete_rendition(state, output_dir):
+    """
+    Finishes the playlist of a transcoded rendition and records it as completed.
+
+    After a resumed transcode the newly written segments (resume.m3u8) are
+    appended to the already complete segments in index.m3u8. The bitrates and
+    codecs for the master playlist are measured as well. A rendition in the
+    scratch directory is verified (see verify_rendition) and then moved into
+    MEDIA_ROOT/video/<video_id>/<name> as a whole; the published playlist
+    replaces the cached version (see cache_playlist).
+    """
+    index = output_dir / "index.m3u8"
+    resume = output_dir / "resume.m3u8"
+
+    if resume.exists():
+        write_media_playlist(index, read_media_playlist(index) + read_media_playlist(resume))
+        resume.unlink()
+
+    verify_rendition(output_dir)
+    measure_rendition(state, output_dir)
+    state.segments_completed = len(read_media_playlist(index))
+
+    published_dir = media_dir(state.video_id, state.name)
+    if output_dir != published_dir:
+        publish_dir(output_dir, published_dir)
+    cache_playlist(state.video_id, state.name)
+    state.completed_at = timezone.now()
+    state.save(update_fields=["segments_completed", "completed_at", "bandwidth", "average_bandwidth", "codecs", "updated_at"])
+
+
 def convert_video_to_hls(video_id, name, scale, v_bitrate, a_bitrate):
     """
     Converts an uploaded video into an HLS stream at a specific resolution and bitrate using FFmpeg.
@@ -109,52 +621,617 @@ def convert_video_to_hls(video_id, name, scale, v_bitrate, a_bitrate):
         scale (str): Video scaling dimension in WIDTH:HEIGHT format.
         v_bitrate (str): Target video bitrate (e.g., '800k').
         a_bitrate (str): Target audio bitrate (e.g., '96k').
+
+    The task is a no-op when the rendition would only upscale the probed source
+    or was already completed. A partially written rendition resumes after its
+    last complete segment. A per-title bitrate ladder of the video (see
+    analyze_complexity) replaces `v_bitrate`. Codec, preset and segment length
+    come from the video's encoding profile, whose ladder also decides whether
+    the rendition would upscale the source. With a separate audio rendition in
+    the profile, only the video is encoded (see convert_audio_to_hls).
     """
-    video = Video.objects.get(pk=video_id)
+    video = ensure_probed(Video.objects.get(pk=video_id))
+    profile = EncodingProfile.objects.for_video(video)
+    if name not in [selected for selected, *_ in select_renditions(video, profile.formats())]:
+        return
+    v_bitrate = video.bitrate_ladder.get(name, v_bitrate)
+    if profile.separate_audio:
+        a_bitrate = None
+
+    states, pending = get_pending_renditions(video, [(name, scale)])
+    if not pending:
+        return
+    state = states[name]
     video_path = video.video_file.path
+    ensure_free_space(video, [v_bitrate, a_bitrate])
 
-    output_dir = Path(f"media/video/{video_id}/{name}")
+    output_dir = scratch_dir(video_id, name)
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    playlist = output_dir / "index.m3u8"
-    ts_pattern = output_dir / f"{name}_%03d.ts"
+    segments = load_resume_point(output_dir)
+    offset = sum(segment.duration for segment in segments)
+    state.segments_completed = len(segments)
+    state.save(update_fields=["segments_completed", "updated_at"])
 
+    # The thread budget caps the decoder and the scale filter as well as the encoder
+    threads = ffmpeg_threads()
     cmd = [
         "ffmpeg", "-y",
+        *(["-ss", f"{offset:.6f}"] if segments else []),
+        "-threads", str(threads),
         "-i", video_path,
+        "-filter_threads", str(threads),
         "-vf", f"scale={scale}",
-        "-c:a", "aac", "-ar", "48000", "-b:a", a_bitrate,
-        "-c:v", "h264", "-profile:v", "main", "-crf", "20",
-        "-sc_threshold", "0", "-g", "48", "-keyint_min", "48",
-        "-b:v", v_bitrate, "-maxrate", v_bitrate, "-bufsize", "2M",
-        "-hls_time", "6",
-        "-hls_playlist_type", "vod",
-        "-hls_segment_filename", str(ts_pattern),
-        str(playlist)
+        *build_hls_output_args(
+            output_dir, name, v_bitrate, a_bitrate, video.frame_rate, ts_offset=offset, resume_from=len(segments),
+            profile=profile, threads=threads
+        ),
     ]
 
-    subprocess.run(cmd, capture_output=True, check=True)
+    tracker = ProgressTracker(video_id, [name], video.duration)
+    run_ffmpeg(cmd, tracker)
+    complete_rendition(state, output_dir)
+    publish_video(video_id)
+    tracker.finish()
+
+
+def convert_audio_to_hls(video_id):
+    """
+    Encodes the audio track of a video once into the shared HLS audio rendition.
+
+    Used by profiles with `separate_audio`: instead of re-encoding and storing
+    the same audio in every video rendition, it is encoded a single time at the
+    profile's audio bitrate into MEDIA_ROOT/video/<id>/audio/, and the master
+    playlist references it as an #EXT-X-MEDIA audio group. No-op for profiles
+    with muxed audio, sources without audio and completed audio renditions;
+    an interrupted encode resumes after its last complete segment.
+
+    Args:
+        video_id (int): Primary key of the Video object.
+    """
+    video = ensure_probed(Video.objects.get(pk=video_id))
+    profile = EncodingProfile.objects.for_video(video)
+    if not profile.separate_audio or not video.audio_codec:
+        return
+
+    states, pending = get_pending_renditions(video, [(AUDIO_RENDITION,)])
+    if not pending:
+        return
+    state = states[AUDIO_RENDITION]
+    ensure_free_space(video, [profile.audio_bitrate])
+
+    output_dir = scratch_dir(video_id, AUDIO_RENDITION)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    segments = load_resume_point(output_dir)
+    offset = sum(segment.duration for segment in segments)
+    state.segments_completed = len(segments)
+    state.save(update_fields=["segments_completed", "updated_at"])
+
+    cmd = [
+        "ffmpeg", "-y",
+        *(["-ss", f"{offset:.6f}"] if segments else []),
+        "-i", video.video_file.path,
+        "-map", "0:a:0",
+        *build_hls_output_args(
+            output_dir, AUDIO_RENDITION, None, profile.audio_bitrate, ts_offset=offset, resume_from=len(segments), profile=profile
+        ),
+    ]
+    run_ffmpeg(cmd)
+    complete_rendition(state, output_dir)
+    publish_video(video_id)
+
+
+def build_ladder_command(input_path, video_id, formats, frame_rate=None, chunk_index=None, ts_offset=None, resume_from=None, trickplay=None, profile=None, threads=None):
+    """
+    Builds a single-decode FFmpeg command that writes one HLS output per rendition.
+
+    A `split` filter fans the decoded frames out to one `scale` filter per
+    rendition, and every scaled stream is encoded into its own HLS output.
+    With `trickplay`, one more branch of the split writes the trickplay sprite sheets.
+    Profiles with a separate audio rendition get video-only outputs.
+
+    Args:
+        input_path (str | Path): Source file (or source chunk) to transcode.
+        video_id (int): Primary key of the Video object, used for the output directories.
+        formats (list): Rendition tuples of (name, scale, video_bitrate, audio_bitrate).
+        frame_rate (float, optional): Probed source frame rate used for the keyframe interval.
+        chunk_index (int, optional): Index of the source chunk in chunked mode.
+        ts_offset (float, optional): Start time of the chunk in the source, or the resume point.
+        resume_from (int, optional): Number of complete segments already written per rendition;
+            the input is then seeked to `ts_offset`.
+        trickplay (str, optional): Trickplay filter chain (see trickplay_filter).
+        profile (EncodingProfile, optional): Encoder settings shared by all renditions.
+        threads (int, optional): Thread budget of the whole process. It caps the decoder and the
+            filter graph, and is shared by the rendition encoders; FFmpeg's automatic choice when omitted.
+
+    Returns:
+        list: The FFmpeg command line.
+    """
+    branches = len(formats) + (1 if trickplay else 0)
+    split_labels = "".join(f"[v{index}]" for index in range(branches))
+    filter_graph = [f"[0:v]split={branches}{split_labels}"]
+    output_args = []
+    encoder_threads = max(1, threads // len(formats)) if threads else None
+    muxed_audio = not (profile and profile.separate_audio)
+
+    for index, (name, scale, v_bitrate, a_bitrate) in enumerate(formats):
+        output_dir = scratch_dir(video_id, name)
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        filter_graph.append(f"[v{index}]scale={scale}[out{index}]")
+        output_args += [
+            "-map", f"[out{index}]", *(["-map", "0:a:0?"] if muxed_audio else []),
+            *build_hls_output_args(
+                output_dir, name, v_bitrate, a_bitrate if muxed_audio else None, frame_rate, chunk_index, ts_offset, resume_from,
+                profile, encoder_threads
+            ),
+        ]
+
+    if trickplay:
+        output_dir = scratch_dir(video_id, TRICKPLAY_DIR)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        filter_graph.append(f"[v{len(formats)}]{trickplay}[trickplay]")
+        output_args += ["-map", "[trickplay]", *trickplay_output_args(output_dir)]
+
+    return [
+        "ffmpeg", "-y",
+        *(["-ss", f"{ts_offset:.6f}"] if resume_from else []),
+        *(["-threads", str(threads)] if threads else []),
+        "-i", str(input_path),
+        *(["-filter_complex_threads", str(threads)] if threads else []),
+        "-filter_complex", ";".join(filter_graph),
+        *output_args,
+    ]
+
+
+def convert_video_to_hls_ladder(video_id, formats):
+    """
+    Converts an uploaded video into all HLS renditions with a single FFmpeg process.
+
+    The source is decoded only once and fanned out to every rendition (see
+    build_ladder_command). This replaces one full decode per rendition.
+    Renditions that would upscale the probed source are skipped, and a
+    per-title bitrate ladder of the video replaces the fixed bitrates.
+
+    Completed renditions are skipped when the job is retried. If the remaining
+    renditions were interrupted, all of them are cut back to the segment count
+    of the least advanced one and the transcode resumes from there.
+
+    The trickplay sprite sheets are written by the same decode pass; a resumed
+    transcode creates them in a separate pass instead (see create_trickplay).
+
+    Args:
+        video_id (int): Primary key of the Video object.
+        formats (list): Rendition tuples of (name, scale, video_bitrate, audio_bitrate).
+    """
+    video = ensure_probed(Video.objects.get(pk=video_id))
+    formats = apply_bitrate_ladder(video, select_renditions(video, formats))
+
+    states, formats = get_pending_renditions(video, formats)
+    if not formats:
+        create_trickplay(video_id)
+        return
+
+    ensure_free_space(video, [bitrate for _, _, *bitrates in formats for bitrate in bitrates])
+    output_dirs = {name: scratch_dir(video_id, name) for name, *_ in formats}
+    resume_points = {name: load_resume_point(output_dir) for name, output_dir in output_dirs.items()}
+    resume_from = min(len(segments) for segments in resume_points.values())
+
+    for name, segments in resume_points.items():
+        if len(segments) > resume_from:
+            write_media_playlist(output_dirs[name] / "index.m3u8", segments[:resume_from], ended=False)
+        states[name].segments_completed = resume_from
+        states[name].save(update_fields=["segments_completed", "updated_at"])
+    offset = sum(segment.duration for segment in resume_points[formats[0][0]][:resume_from])
+
+    trickplay = None
+    if settings.VIDEO_TRICKPLAY and not resume_from and not media_dir(video_id, TRICKPLAY_DIR, TRICKPLAY_INDEX).exists():
+        trickplay = trickplay_filter(video)
+
+    cmd = build_ladder_command(
+        video.video_file.path, video_id, formats, video.frame_rate, ts_offset=offset, resume_from=resume_from,
+        trickplay=trickplay, profile=EncodingProfile.objects.for_video(video), threads=ffmpeg_threads()
+    )
+    tracker = ProgressTracker(video_id, list(output_dirs), video.duration)
+    run_ffmpeg(cmd, tracker)
+    for name, output_dir in output_dirs.items():
+        complete_rendition(states[name], output_dir)
+    publish_video(video_id)
+
+    if trickplay:
+        write_trickplay_vtt(scratch_dir(video_id, TRICKPLAY_DIR, TRICKPLAY_INDEX), video.duration or 0, *tile_size(video))
+        publish_dir(scratch_dir(video_id, TRICKPLAY_DIR), media_dir(video_id, TRICKPLAY_DIR))
+    else:
+        create_trickplay(video_id)
+    tracker.finish()
+
+
+def split_video_into_chunks(video_path, chunk_dir, chunk_seconds):
+    """
+    Splits a source video at keyframes into chunks of roughly `chunk_seconds` each.
+
+    The streams are copied, not re-encoded, so splitting only costs disk I/O.
+    Every chunk starts on a source keyframe and therefore decodes independently.
+    A finished split is reused when the job is retried.
+
+    Args:
+        video_path (str): Path of the uploaded source video.
+        chunk_dir (Path): Directory receiving the chunk files.
+        chunk_seconds (int): Target chunk length in seconds.
+
+    Returns:
+        list: (chunk_path, start_seconds) tuples in playback order.
+    """
+    chunk_dir.mkdir(parents=True, exist_ok=True)
+    chunk_list = chunk_dir / "chunks.csv"
+
+    if not chunk_list.exists():
+        # The list is only renamed into place once the split has finished
+        partial_list = chunk_dir / "chunks.part.csv"
+        cmd = [
+            "ffmpeg", "-y",
+            "-i", video_path,
+            "-map", "0:v:0", "-map", "0:a:0?",
+            "-c", "copy",
+            "-f", "segment",
+            "-segment_time", str(chunk_seconds),
+            "-reset_timestamps", "1",
+            "-segment_list", str(partial_list),
+            "-segment_list_type", "csv",
+            str(chunk_dir / "chunk_%04d.mkv")
+        ]
+        subprocess.run(cmd, capture_output=True, check=True)
+        partial_list.rename(chunk_list)
+
+    chunks = []
+    for line in chunk_list.read_text().splitlines():
+        filename, start, _ = line.rsplit(",", 2)
+        chunks.append((chunk_dir / filename, float(start)))
+    return chunks
+
+
+def stitch_chunk_playlists(video_id, name, chunk_count):
+    """
+    Combines the per-chunk playlists of a rendition into its final index.m3u8.
+
+    The chunk playlists are removed afterwards; their segments stay in place
+    and are referenced by the combined playlist.
+    """
+    output_dir = scratch_dir(video_id, name)
+    segments = []
+
+    for chunk_index in range(chunk_count):
+        chunk_playlist = output_dir / f"chunk_{chunk_index:04d}.m3u8"
+        segments += read_media_playlist(chunk_playlist)
+
+    write_media_playlist(output_dir / "index.m3u8", segments)
+
+    for chunk_index in range(chunk_count):
+        (output_dir / f"chunk_{chunk_index:04d}.m3u8").unlink(missing_ok=True)
+
+
+def convert_video_to_hls_chunked(video_id, formats):
+    """
+    Converts an uploaded video into all HLS renditions by transcoding keyframe-aligned chunks in parallel.
+
+    The source is split at keyframes into chunks of settings.VIDEO_CHUNK_SECONDS,
+    rounded up to a multiple of the profile's segment length. Every chunk is transcoded into all
+    renditions with its own single-decode FFmpeg process; up to
+    settings.VIDEO_CHUNK_WORKERS processes run at the same time. The chunk
+    segments keep their source timestamps and are finally stitched into one
+    playlist per rendition. Per-title bitrates apply as in the ladder mode.
+
+    When the job is retried, completed renditions and chunks whose playlists
+    are already finished for every rendition are skipped.
+
+    Args:
+        video_id (int): Primary key of the Video object.
+        formats (list): Rendition tuples of (name, scale, video_bitrate, audio_bitrate).
+    """
+    video = ensure_probed(Video.objects.get(pk=video_id))
+    formats = apply_bitrate_ladder(video, select_renditions(video, formats))
+
+    states, formats = get_pending_renditions(video, formats)
+    if not formats:
+        create_trickplay(video_id)
+        return
+
+    profile = EncodingProfile.objects.for_video(video)
+    chunk_seconds = math.ceil(settings.VIDEO_CHUNK_SECONDS / profile.segment_seconds) * profile.segment_seconds
+    ensure_free_space(video, [bitrate for _, _, *bitrates in formats for bitrate in bitrates])
+    chunk_dir = scratch_dir(video_id, "chunks")
+    chunks = split_video_into_chunks(video.video_file.path, chunk_dir, chunk_seconds)
+    workers = max(1, settings.VIDEO_CHUNK_WORKERS)
+    threads = ffmpeg_threads(processes=min(workers, len(chunks)))
+    tracker = ProgressTracker(video_id, [name for name, *_ in formats], video.duration)
+
+    def transcode_chunk(chunk):
+        chunk_index, (chunk_path, start) = chunk
+        if all(is_complete_playlist(scratch_dir(video_id, name, f"chunk_{chunk_index:04d}.m3u8")) for name, *_ in formats):
+            return
+        cmd = build_ladder_command(chunk_path, video_id, formats, video.frame_rate, chunk_index, start, profile=profile, threads=threads)
+        run_ffmpeg(cmd, tracker, chunk_index)
+
+    # Every worker thread only waits on its own FFmpeg child process
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(transcode_chunk, enumerate(chunks)))
+
+    for name, *_ in formats:
+        stitch_chunk_playlists(video_id, name, len(chunks))
+        complete_rendition(states[name], scratch_dir(video_id, name))
+    publish_video(video_id)
+    tracker.finish()
+
+    shutil.rmtree(chunk_dir, ignore_errors=True)
 
 
 def create_master_playlist(video_id):
     """
     Creates an HLS master playlist that references multiple resolution playlists for adaptive streaming.
 
-    This function writes an .m3u8 master file listing all resolution-specific playlists,
-    then triggers cleanup tasks to remove the original upload and move the thumbnail.
+    This function writes an .m3u8 master file listing the resolution-specific playlists
+    of the video's encoding profile selected for the probed source that have been transcoded. Every variant carries the BANDWIDTH,
+    AVERAGE-BANDWIDTH and CODECS measured from its segments, plus RESOLUTION and
+    FRAME-RATE, in ascending bandwidth order. Renditions that are still being
+    transcoded are left out, and the file is replaced atomically, so the
+    playlist can be rewritten while players are fetching it.
+
+    With a separate audio rendition (see convert_audio_to_hls) the master
+    playlist declares it as an #EXT-X-MEDIA audio group, and the bandwidths
+    and codecs of every variant include the audio. Nothing is written until
+    the audio rendition is finished, since the video renditions carry no audio.
 
     Args:
         video_id (int): Primary key of the Video object.
+
+    Returns:
+        int: The number of variants listed in the master playlist.
     """
-    video_dir = Path(f"media/video/{video_id}")
+    video = ensure_probed(Video.objects.get(pk=video_id))
+    video_dir = media_dir(video_id)
+    video_dir.mkdir(parents=True, exist_ok=True)
     master_path = video_dir / "master.m3u8"
 
-    # Needed for format
-    playlist_lines = ["#EXTM3U"]
+    profile = EncodingProfile.objects.for_video(video)
+    renditions = select_renditions(video, profile.formats())
+    separate_audio = profile.separate_audio and bool(video.audio_codec)
+    names = [name for name, *_ in renditions] + ([AUDIO_RENDITION] if separate_audio else [])
+    states = get_rendition_states(video, names)
+
+    for name in names:
+        state = states[name]
+        if is_finished_rendition(video_dir / name) and state.bandwidth is None:
+            measure_rendition(state, video_dir / name)
+            state.save(update_fields=["bandwidth", "average_bandwidth", "codecs", "updated_at"])
+
+    audio = audio_state = None
+    if separate_audio:
+        if not is_finished_rendition(video_dir / AUDIO_RENDITION):
+            return 0
+        audio = {"group_id": AUDIO_GROUP_ID, "name": "Main", "uri": f"{AUDIO_RENDITION}/index.m3u8"}
+        audio_state = states[AUDIO_RENDITION]
+
+    variants = []
+    for name, scale, *_ in renditions:
+        state = states[name]
+        if not is_finished_rendition(video_dir / name):
+            continue
+
+        variant = {
+            "uri": f"{name}/index.m3u8",
+            "bandwidth": state.bandwidth,
+            "average_bandwidth": state.average_bandwidth,
+            "codecs": state.codecs,
+            "resolution": scale.replace(":", "x"),
+            "frame_rate": video.frame_rate,
+        }
+        if audio_state:
+            variant["bandwidth"] = (state.bandwidth or 0) + (audio_state.bandwidth or 0)
+            if state.average_bandwidth and audio_state.average_bandwidth:
+                variant["average_bandwidth"] = state.average_bandwidth + audio_state.average_bandwidth
+            codecs = f"{state.codecs},{audio_state.codecs}".split(",")
+            variant["codecs"] = ",".join(dict.fromkeys(filter(None, codecs)))
+        variants.append(variant)
+
+    write_master_playlist(master_path, variants, audio)
+    return len(variants)
+
+
+def publish_video(video_id):
+    """
+    Rewrites the master playlist with every finished rendition and marks the video as published.
+
+    Called whenever a transcode job completes renditions, so a video becomes
+    playable as soon as its first (lowest) rendition is ready and the higher
+    renditions are added to the master playlist as they finish. The video row
+    is locked while the playlist is written, so concurrent rendition jobs
+    cannot replace a newer master playlist with an older one.
+
+    Args:
+        video_id (int): Primary key of the Video object.
+    """
+    with transaction.atomic():
+        video = Video.objects.select_for_update().get(pk=video_id)
+        if create_master_playlist(video_id) and video.published_at is None:
+            video.published_at = timezone.now()
+            video.save(update_fields=["published_at"])
+
+
+def schedule_video(video_id):
+    """
+    Probes a new upload and enqueues its processing jobs as an RQ dependency graph.
+
+    The transcode cost is estimated from the probed duration and the output
+    pixels of the renditions that will be produced (see estimate_cost), and the
+    transcode jobs are enqueued on the matching transcode queue, so short clips
+    are never stuck behind long uploads. In 'per_rendition' mode every
+    rendition is scheduled by its own cost. With settings.VIDEO_PER_TITLE the
+    complexity analysis runs first.
+
+    Uploads that were not hashed while being received (e.g. resumable uploads)
+    are hashed by probe_video; if an already processed video has the same
+    content, only the job reusing its output is enqueued.
+
+    With settings.VIDEO_PROGRESSIVE_PUBLISH (opt-in) the lowest rendition is
+    enqueued at the front of its queue, in 'ladder' and 'chunked' mode as a job
+    of its own ahead of the other renditions, at the price of a second decode
+    of the source. The video is then published as soon as that rendition is
+    ready (see publish_video) instead of after the slowest one. By default the
+    ladder job decodes the source once for all renditions.
+    A separate audio rendition of the profile is encoded by its own cheap job
+    on the short queue, also enqueued at the front. The cheap thumbnail job always goes to the
+    short queue, and the finalize job on the 'default' queue only starts after
+    all other jobs succeeded.
+
+    Args:
+        video_id (int): Primary key of the Video object.
+    """
+    video = probe_video(video_id)
+    duplicate = find_processed_duplicate(video)
+    if duplicate:
+        django_rq.get_queue('default', autocommit=True).enqueue(reuse_processed_video, video_id, duplicate.id)
+        return
+
+    profile = EncodingProfile.objects.for_video(video)
+    formats = profile.formats()
+    selected = select_renditions(video, formats)
+    retry = processing_retry()
+
+    def transcode_queue(cost_formats):
+        return django_rq.get_queue(select_transcode_queue(estimate_cost(video, cost_formats)), autocommit=True)
 
-    for name, scale in RESOLUTIONS:
-        playlist_lines.append(f'#EXT-X-STREAM-INF:RESOLUTION={scale.replace(":", "x")}\n{name}/index.m3u8')
-    master_path.write_text("\n".join(playlist_lines))
+    short_queue = django_rq.get_queue(TRANSCODE_QUEUES[0], autocommit=True)
+    queue = transcode_queue(selected)
 
+    source_job = None
+    if settings.VIDEO_PER_TITLE:
+        source_job = short_queue.enqueue(analyze_complexity, video_id, formats, retry=retry)
+
+    jobs = []
+    remaining = selected
+    if settings.VIDEO_PROGRESSIVE_PUBLISH and len(selected) > 1:
+        # The lowest rendition is the fastest to encode and makes the video playable
+        lowest, *remaining = selected
+        jobs.append(transcode_queue([lowest]).enqueue(
+            convert_video_to_hls, video_id, *lowest, depends_on=source_job, retry=retry, at_front=True
+        ))
+        queue = transcode_queue(remaining)
+
+    if settings.VIDEO_TRANSCODE_MODE == "ladder":
+        jobs.append(queue.enqueue(convert_video_to_hls_ladder, video_id, remaining, depends_on=source_job, retry=retry))
+    elif settings.VIDEO_TRANSCODE_MODE == "chunked":
+        jobs.append(queue.enqueue(convert_video_to_hls_chunked, video_id, remaining, depends_on=source_job, retry=retry))
+    else:
+        jobs += [
+            transcode_queue([video_format]).enqueue(convert_video_to_hls, video_id, *video_format, depends_on=source_job, retry=retry)
+            for video_format in remaining
+        ]
+
+    if profile.separate_audio and video.audio_codec:
+        jobs.append(short_queue.enqueue(convert_audio_to_hls, video_id, retry=retry, at_front=True))
+
+    if settings.VIDEO_TRANSCODE_MODE != "ladder" and settings.VIDEO_TRICKPLAY:
+        jobs.append(queue.enqueue(create_trickplay, video_id, retry=retry))
+
+    if not video.thumbnail:
+        jobs.append(short_queue.enqueue(create_thumbnail, video_id, retry=retry))
+
+    # Runs only after every transcode and thumbnail job finished successfully
+    django_rq.get_queue('default', autocommit=True).enqueue(finalize_video, video_id, depends_on=jobs, retry=retry)
+
+
+def finalize_video(video_id):
+    """
+    Finishes the processing pipeline of a video.
+
+    Runs as an RQ job that depends on every transcode and thumbnail job of the video,
+    so it only starts after all of them succeeded. It writes the master playlist,
+    moves the thumbnail into place, writes its responsive variants and finally
+    removes the original upload and what is left of the scratch directory.
+
+    Args:
+        video_id (int): Primary key of the Video object.
+    """
+    publish_video(video_id)
     move_video_thumbnail(video_id)
-    clean_up_video(video_id)
\ No newline at end of file
+    create_thumbnail_variants(video_id)
+    clean_up_video(video_id)
+    shutil.rmtree(scratch_dir(video_id), ignore_errors=True)
+    Video.objects.filter(pk=video_id).update(processed_at=timezone.now())
+
+
+def link_tree(src_dir, dest_dir):
+    """
+    Recreates a directory tree using hard links instead of copies.
+
+    Hard links share the data blocks of the source files, so the copy costs no
+    extra disk space, and deleting either tree later leaves the other intact.
+    Falls back to a real copy if the destination is on another filesystem.
+    """
+    for src in Path(src_dir).rglob("*"):
+        dest = Path(dest_dir) / src.relative_to(src_dir)
+        if src.is_dir():
+            dest.mkdir(parents=True, exist_ok=True)
+            continue
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        dest.unlink(missing_ok=True)
+        try:
+            os.link(src, dest)
+        except OSError:
+            shutil.copy2(src, dest)
+
+
+def reuse_processed_video(video_id, source_id):
+    """
+    Completes a duplicate upload by reusing the output of an identical, already processed video.
+
+    Instead of transcoding, the HLS directory and thumbnail of the source video
+    are hard-linked to the new video, the probed source metadata is copied and
+    the duplicate upload is removed. A thumbnail uploaded for the new video is kept.
+
+    Args:
+        video_id (int): Primary key of the new (duplicate) Video object.
+        source_id (int): Primary key of the processed Video with the same content hash.
+    """
+    video = Video.objects.get(pk=video_id)
+    source = Video.objects.get(pk=source_id)
+
+    link_tree(media_dir(source_id), media_dir(video_id))
+
+    if video.thumbnail:
+        move_video_thumbnail(video_id)
+        create_thumbnail_variants(video_id)
+        video.refresh_from_db()
+    elif source.thumbnail:
+        src = Path(source.thumbnail.path)
+        dest = src.with_name(f"image{video_id}{src.suffix}")
+        if not dest.exists():
+            os.link(src, dest)
+        video.thumbnail.name = str(dest.relative_to(settings.MEDIA_ROOT))
+
+        video.thumbnail_variants = {}
+        for name, widths in source.thumbnail_variants.items():
+            for width, variant in widths.items():
+                src = Path(settings.MEDIA_ROOT) / variant
+                dest = src.with_name(src.name.replace(f"image{source_id}_", f"image{video_id}_", 1))
+                if not dest.exists():
+                    os.link(src, dest)
+                video.thumbnail_variants.setdefault(name, {})[width] = str(dest.relative_to(settings.MEDIA_ROOT))
+
+    copied_fields = [
+        "duration", "width", "height", "frame_rate", "video_codec", "audio_codec", "bitrate",
+        "complexity_bitrate", "bitrate_ladder",
+    ]
+    for field in copied_fields:
+        setattr(video, field, getattr(source, field))
+    video.processed_at = video.published_at = timezone.now()
+    video.save(update_fields=["thumbnail", "thumbnail_variants", *copied_fields, "processed_at", "published_at"])
+
+    for rendition in source.renditions.all():
+        VideoRendition.objects.update_or_create(
+            video=video, name=rendition.name,
+            defaults={"segments_completed": rendition.segments_completed, "completed_at": rendition.completed_at},
+        )
+
+    clean_up_video(video_id)
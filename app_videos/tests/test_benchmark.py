@@ -0,0 +1,158 @@
+"""
+test_benchmark.py
+-----------------
+Tests for the transcode benchmark suite.
+
+These tests verify that:
+    • Clip specifications are parsed and invalid ones are rejected.
+    • The benchmark generates lavfi clips, runs the real tasks in the configured transcode mode and
+      reports timings and output stats per rendition without leaving Video rows behind.
+    • The peak RSS of a task is that of its own child processes, not the worker's lifetime maximum.
+    • Reports are compared task by task against a baseline.
+
+FFmpeg is never executed; `subprocess.run` writes the files FFmpeg would produce. Only the
+peak RSS test starts real (Python) child processes.
+"""
+
+import json
+import subprocess
+import sys
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+
+from app_videos.benchmark import compare_reports, measure, parse_clip_spec
+from app_videos.models import Video
+
+
+def fake_ffmpeg(cmd, *args, **kwargs):
+    """
+    Simulates ffprobe (a 1280x720 source) and the files written by FFmpeg.
+    """
+    if cmd[0] == "ffprobe":
+        data = {
+            "streams": [
+                {"codec_type": "video", "codec_name": "h264", "width": 1280, "height": 720, "avg_frame_rate": "30/1"},
+                {"codec_type": "audio", "codec_name": "aac"},
+            ],
+            "format": {"duration": "10.0", "bit_rate": "2000000"},
+        }
+        return subprocess.CompletedProcess(args=cmd, returncode=0, stdout=json.dumps(data), stderr="")
+
+    if "-hls_segment_filename" in cmd:
+        # One output per rendition (several in a ladder command)
+        for index in [i for i, arg in enumerate(cmd) if arg == "-hls_segment_filename"]:
+            for number in range(2):
+                Path(cmd[index + 1].replace("%03d", f"{number:03d}")).write_bytes(b"\0" * 1000)
+            Path(cmd[index + 2]).write_text(
+                f"#EXTM3U\n#EXTINF:6.000000,\n{Path(cmd[index + 1].replace('%03d', '000')).name}\n"
+                f"#EXTINF:4.000000,\n{Path(cmd[index + 1].replace('%03d', '001')).name}\n#EXT-X-ENDLIST\n"
+            )
+    elif cmd[0] == "ffmpeg" and cmd[-1] != "-version":
+        Path(cmd[-1]).write_bytes(b"\0" * 100)
+    return subprocess.CompletedProcess(args=cmd, returncode=0, stdout="ffmpeg version test\n", stderr="")
+
+
+def test_parse_clip_spec():
+    """
+    Ensures clip specifications are parsed into (width, height, seconds) tuples.
+    """
+    assert parse_clip_spec("640x360:10, 1920x1080:60") == [(640, 360, 10), (1920, 1080, 60)]
+    with pytest.raises(ValueError):
+        parse_clip_spec("720p:10")
+
+
+def run_benchmark_command(tmp_path, **options):
+    """
+    Runs the benchmark command with simulated FFmpeg and returns the report of its only clip.
+    """
+    output = tmp_path / "report.json"
+    with patch("app_videos.tasks.subprocess.run", side_effect=fake_ffmpeg), \
+            patch("app_videos.benchmark.subprocess.run", side_effect=fake_ffmpeg), \
+            patch("app_videos.tasks.run_ffmpeg", side_effect=fake_ffmpeg):
+        call_command("benchmark_transcode", clips="1280x720:10", output=str(output), stdout=StringIO(), **options)
+
+    report = json.loads(output.read_text())
+    return report, report["clips"][0]
+
+
+def test_benchmark_command_reports_tasks(db, tmp_path, monkeypatch, settings):
+    """
+    Ensures every task is measured, the renditions below the source resolution are counted and no rows remain.
+    """
+    monkeypatch.chdir(tmp_path)
+    settings.MEDIA_ROOT = tmp_path / "media"
+    settings.VIDEO_TRICKPLAY = False
+
+    report, clip = run_benchmark_command(tmp_path, mode="per_rendition")
+
+    assert report["transcode_mode"] == "per_rendition"
+    assert clip["clip"] == "1280x720:10"
+    assert [(task["task"], task.get("rendition")) for task in clip["tasks"]] == [
+        ("probe_video", None),
+        ("convert_video_to_hls", "480p"),
+        ("convert_video_to_hls", "720p"),
+        ("create_thumbnail", None),
+        ("create_master_playlist", None),
+    ]
+    # FFmpeg is simulated, so no child process is measured
+    assert all(task["wall_seconds"] >= 0 and task["peak_rss_kb"] == 0 for task in clip["tasks"])
+    playlist_bytes = clip["renditions"]["720p"]["bytes"] - 2000
+    assert clip["renditions"]["720p"]["segments"] == 2
+    assert 0 < playlist_bytes < 200
+    assert (tmp_path / "media/benchmark/testsrc_1280x720_10s_30fps.mp4").exists()
+    assert not Video.objects.exists()
+    assert not (tmp_path / "media/video").exists() or not any((tmp_path / "media/video").iterdir())
+
+
+def test_benchmark_measures_ladder_mode(db, tmp_path, monkeypatch, settings):
+    """
+    Ensures the configured ladder mode is benchmarked as one task for all renditions and reported as such.
+    """
+    monkeypatch.chdir(tmp_path)
+    settings.MEDIA_ROOT = tmp_path / "media"
+    settings.VIDEO_TRICKPLAY = False
+    settings.VIDEO_TRANSCODE_MODE = "ladder"
+
+    report, clip = run_benchmark_command(tmp_path)
+
+    assert report["transcode_mode"] == "ladder"
+    assert [task["task"] for task in clip["tasks"]] == [
+        "probe_video", "convert_video_to_hls_ladder", "create_thumbnail", "create_master_playlist",
+    ]
+    assert {name: stats["segments"] for name, stats in clip["renditions"].items()} == {"480p": 2, "720p": 2}
+
+
+def test_measure_reports_peak_rss_per_task():
+    """
+    Ensures the peak RSS belongs to the child processes of the measured task, not to earlier, larger ones.
+    """
+    def allocate(megabytes):
+        subprocess.run([sys.executable, "-c", f"b = bytearray({megabytes} * 1024 * 1024)"], check=True)
+
+    large = measure(allocate, 400)["peak_rss_kb"]
+    small = measure(allocate, 1)["peak_rss_kb"]
+
+    # A forked child starts from the RSS of the worker, so compare the two rather than the small one alone
+    assert large > 400 * 1024
+    assert 0 < small < large - 200 * 1024
+    assert measure(lambda: None)["peak_rss_kb"] == 0
+
+
+def test_compare_reports_matches_tasks():
+    """
+    Ensures the wall times are compared per clip, task and rendition.
+    """
+    def report(seconds):
+        return {"clips": [{"clip": "640x360:10", "tasks": [
+            {"task": "convert_video_to_hls", "rendition": "480p", "wall_seconds": seconds},
+            {"task": "create_thumbnail", "wall_seconds": 1.0},
+        ]}]}
+
+    assert compare_reports(report(2.5), report(2.0)) == [
+        ("640x360:10", "convert_video_to_hls", "480p", 2.0, 2.5, 0.25),
+        ("640x360:10", "create_thumbnail", "", 1.0, 1.0, 0.0),
+    ]
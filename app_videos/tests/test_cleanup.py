@@ -0,0 +1,156 @@
+"""
+test_cleanup.py
+---------------
+Tests for the asynchronous media cleanup and the orphan reconciler.
+
+These tests verify that:
+    • Deleting videos only enqueues one background job per transaction with the media of all of them.
+    • A deletion rolled back with its transaction or savepoint does not end up in the batch of a later one.
+    • The deletion job removes files and directories below MEDIA_ROOT only, and keeps media of existing videos.
+    • The reconciler finds media without a matching Video or UploadSession row.
+"""
+
+from collections import defaultdict
+from io import StringIO
+from unittest.mock import Mock, patch
+
+import pytest
+from django.core.management import call_command
+from django.db import transaction
+
+from app_videos.cleanup import delete_media_files, find_orphaned_media
+from app_videos.models import Video
+
+
+@pytest.fixture
+def mock_queues():
+    """
+    Mocks django_rq.get_queue with one Mock queue per queue name.
+    """
+    queues = defaultdict(Mock)
+    with patch("django_rq.get_queue", side_effect=lambda name, **kwargs: queues[name]):
+        yield queues
+
+
+@pytest.fixture
+def media_root(tmp_path, settings):
+    """
+    Uses a temporary MEDIA_ROOT.
+    """
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+def create_videos(count):
+    """
+    Creates `count` processed videos with a thumbnail (without triggering the processing pipeline).
+    """
+    return [
+        Video.objects.create(title=f"Video {index}", description="", category="Comedy", thumbnail=f"thumbnail/image{index}.png")
+        for index in range(count)
+    ]
+
+
+def test_bulk_delete_enqueues_one_batch(db, mock_queues, django_capture_on_commit_callbacks):
+    """
+    Ensures deleting several videos in one transaction enqueues a single job with the media of all of them.
+    """
+    videos = create_videos(3)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            Video.objects.filter(pk__in=[video.pk for video in videos]).delete()
+
+    calls = mock_queues["default"].enqueue.call_args_list
+    assert len(calls) == 1
+    assert calls[0].args[0] is delete_media_files
+    assert sorted(calls[0].args[1]) == sorted(
+        [f"video/{video.pk}" for video in videos] + [f"thumbnail/image{index}.png" for index in range(3)]
+    )
+
+
+def test_rolled_back_delete_is_not_batched(db, mock_queues, django_capture_on_commit_callbacks):
+    """
+    Ensures the media of a deletion that was rolled back is never scheduled.
+    """
+    kept, deleted = create_videos(2)
+    kept_pk, deleted_pk = kept.pk, deleted.pk
+
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            kept.delete()
+            transaction.set_rollback(True)
+        with transaction.atomic():
+            deleted.delete()
+
+    calls = mock_queues["default"].enqueue.call_args_list
+    assert len(calls) == 1
+    assert calls[0].args[1] == [f"video/{deleted_pk}", "thumbnail/image1.png"]
+    assert Video.objects.filter(pk=kept_pk).exists()
+
+
+def test_savepoint_rollback_starts_new_batch(db, mock_queues, django_capture_on_commit_callbacks):
+    """
+    Ensures a batch started in a rolled back savepoint is not extended by later deletions of the transaction.
+    """
+    kept, deleted = create_videos(2)
+    kept_pk, deleted_pk = kept.pk, deleted.pk
+
+    with django_capture_on_commit_callbacks(execute=True):
+        with transaction.atomic():
+            with transaction.atomic():
+                kept.delete()
+                transaction.set_rollback(True)
+            deleted.delete()
+
+    calls = mock_queues["default"].enqueue.call_args_list
+    assert len(calls) == 1
+    assert calls[0].args[1] == [f"video/{deleted_pk}", "thumbnail/image1.png"]
+    assert Video.objects.filter(pk=kept_pk).exists()
+
+
+def test_delete_media_files(db, media_root):
+    """
+    Ensures files and trees below MEDIA_ROOT are removed, while existing videos and outside paths are left alone.
+    """
+    existing = create_videos(1)[0]
+    (media_root / "video/99").mkdir(parents=True)
+    (media_root / "video/99/index.m3u8").write_text("#EXTM3U\n")
+    (media_root / f"video/{existing.pk}").mkdir()
+    (media_root / "thumbnail").mkdir()
+    (media_root / "thumbnail/image99.png").write_bytes(b"png")
+    outside = media_root.parent / "outside.txt"
+    outside.write_text("keep")
+
+    delete_media_files(["video/99", "thumbnail/image99.png", f"video/{existing.pk}", "../outside.txt", "video/missing"])
+
+    assert not (media_root / "video/99").exists()
+    assert not (media_root / "thumbnail/image99.png").exists()
+    assert (media_root / f"video/{existing.pk}").exists()
+    assert outside.exists()
+
+
+def test_reconcile_media_finds_orphans(db, media_root):
+    """
+    Ensures the reconciler lists unreferenced uploads, thumbnails, HLS directories and partial uploads, and deletes them.
+    """
+    video = create_videos(1)[0]
+    for directory in ("video/tmp", "thumbnail/tmp", f"video/{video.pk}", "video/4242", "uploads"):
+        (media_root / directory).mkdir(parents=True, exist_ok=True)
+    (media_root / "video/tmp/orphan.mp4").write_bytes(b"mp4")
+    (media_root / "thumbnail/tmp/orphan.png").write_bytes(b"png")
+    (media_root / "thumbnail/image0.png").write_bytes(b"png")
+    (media_root / "uploads/00000000-0000-0000-0000-000000000000.part").write_bytes(b"part")
+
+    assert find_orphaned_media(min_age=0) == [
+        "thumbnail/tmp/orphan.png",
+        "uploads/00000000-0000-0000-0000-000000000000.part",
+        "video/4242",
+        "video/tmp/orphan.mp4",
+    ]
+    assert find_orphaned_media() == []
+
+    call_command("reconcile_media", delete=True, min_age=0, stdout=StringIO())
+    assert find_orphaned_media(min_age=0) == []
+    assert (media_root / "thumbnail/image0.png").exists()
+    assert (media_root / f"video/{video.pk}").exists()
@@ -0,0 +1,87 @@
+"""
+test_deduplication.py
+---------------------
+Tests for content-addressed deduplication of video uploads.
+
+These tests verify that:
+    • The hashing upload handlers attach the SHA-256 digest to the uploaded file.
+    • A new Video whose content hash matches a processed Video only enqueues the reuse task.
+    • Reusing a processed Video hard-links its HLS output and thumbnail instead of copying them.
+"""
+
+import hashlib
+import os
+from unittest.mock import Mock, patch
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+
+from app_videos.models import Video
+from app_videos.tasks import reuse_processed_video
+from app_videos.uploadhandlers import HashingTemporaryFileUploadHandler
+
+
+def test_hashing_upload_handler_attaches_sha256():
+    """
+    Ensures the upload handler hashes the chunks while receiving them.
+    """
+    handler = HashingTemporaryFileUploadHandler()
+    handler.new_file("video_file", "movie.mp4", "video/mp4", 11)
+    handler.receive_data_chunk(b"hello ", 0)
+    handler.receive_data_chunk(b"world", 6)
+    uploaded = handler.file_complete(11)
+
+    assert uploaded.sha256 == hashlib.sha256(b"hello world").hexdigest()
+
+
+def test_duplicate_upload_enqueues_reuse_only(db):
+    """
+    Ensures an upload identical to a processed video skips the transcode pipeline.
+    """
+    original = Video.objects.create(
+        title="Original", video_file="", category="comedy",
+        content_hash="a" * 64, processed_at=timezone.now()
+    )
+    upload = SimpleUploadedFile("dummy.mp4", b"dummy content")
+    upload.sha256 = "a" * 64
+
+    with patch("django_rq.get_queue") as mock_get_queue, \
+            patch("django.db.transaction.on_commit", side_effect=lambda func: func()):
+        mock_queue = mock_get_queue.return_value
+        mock_queue.enqueue = Mock()
+        duplicate = Video.objects.create(title="Duplicate", video_file=upload, category="comedy")
+
+    assert duplicate.content_hash == "a" * 64
+    assert mock_queue.enqueue.call_count == 1
+    assert mock_queue.enqueue.call_args.args == (reuse_processed_video, duplicate.pk, original.pk)
+
+
+def test_reuse_processed_video_hard_links_output(db, tmp_path, monkeypatch, settings):
+    """
+    Ensures the duplicate gets hard links to the original HLS files and thumbnail.
+    """
+    monkeypatch.chdir(tmp_path)
+    settings.MEDIA_ROOT = tmp_path / "media"
+
+    original = Video.objects.create(
+        title="Original", category="comedy", height=720,
+        content_hash="b" * 64, processed_at=timezone.now()
+    )
+    original_dir = tmp_path / f"media/video/{original.pk}"
+    (original_dir / "480p").mkdir(parents=True)
+    (original_dir / "master.m3u8").write_text("#EXTM3U")
+    (original_dir / "480p/480p_000.ts").write_bytes(b"\0" * 188)
+    (tmp_path / "media/thumbnail").mkdir(parents=True)
+    (tmp_path / f"media/thumbnail/image{original.pk}.png").write_bytes(b"png")
+    Video.objects.filter(pk=original.pk).update(thumbnail=f"thumbnail/image{original.pk}.png")
+
+    duplicate = Video.objects.create(title="Duplicate", category="comedy", content_hash="b" * 64)
+    reuse_processed_video(duplicate.pk, original.pk)
+
+    duplicate.refresh_from_db()
+    segment = tmp_path / f"media/video/{duplicate.pk}/480p/480p_000.ts"
+    assert os.path.samefile(segment, original_dir / "480p/480p_000.ts")
+    assert (tmp_path / f"media/video/{duplicate.pk}/master.m3u8").exists()
+    assert duplicate.thumbnail.name == f"thumbnail/image{duplicate.pk}.png"
+    assert duplicate.height == 720
+    assert duplicate.processed_at is not None
@@ -0,0 +1,68 @@
+"""
+test_progress.py
+----------------
+Tests for the live transcode progress instrumentation.
+
+These tests verify that:
+    • FFmpeg `-progress` output is parsed into one dict per progress block.
+    • The progress tracker stores frames, speed, percent and ETA per rendition in the cache.
+    • The progress endpoint returns the stored entries to authenticated users only.
+"""
+
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from app_videos.progress import ProgressTracker, get_progress, parse_progress
+
+
+FFMPEG_PROGRESS_OUTPUT = [
+    "frame=120\n", "fps=48.00\n", "out_time_us=5000000\n", "speed=2.00x\n", "progress=continue\n",
+    "frame=240\n", "fps=48.00\n", "out_time_us=10000000\n", "speed=2.00x\n", "progress=continue\n",
+]
+
+
+def test_parse_progress_yields_blocks():
+    """
+    Ensures every progress block (terminated by a `progress=` line) is yielded separately.
+    """
+    blocks = list(parse_progress(FFMPEG_PROGRESS_OUTPUT))
+
+    assert len(blocks) == 2
+    assert blocks[1]["frame"] == "240"
+    assert blocks[1]["out_time_us"] == "10000000"
+
+
+def test_progress_tracker_stores_eta_per_rendition(test_video):
+    """
+    Ensures the tracker writes frames, speed, percent and ETA for every tracked rendition.
+
+    10 s of a 30 s video encoded at 2x realtime leaves 20 s of media, i.e. an ETA of 10 s.
+    """
+    tracker = ProgressTracker(test_video.pk, ["480p", "720p"], duration=30.0)
+    for block in parse_progress(FFMPEG_PROGRESS_OUTPUT):
+        tracker.update(0, block)
+    tracker._write("running")
+
+    progress = get_progress(test_video.pk, ["480p", "720p", "1080p"])
+    assert set(progress) == {"480p", "720p"}
+    assert progress["480p"]["frames"] == 240
+    assert progress["480p"]["speed"] == 2.0
+    assert progress["480p"]["percent"] == 33.3
+    assert progress["480p"]["eta"] == 10
+
+    tracker.finish()
+    assert get_progress(test_video.pk, ["720p"])["720p"]["status"] == "finished"
+
+
+def test_progress_endpoint(auth_client, test_video):
+    """
+    Ensures the progress endpoint returns the cached progress and rejects unauthenticated requests.
+    """
+    ProgressTracker(test_video.pk, ["480p"], duration=30.0).finish()
+    url = reverse("video-progress", args=[test_video.pk])
+
+    assert APIClient().get(url).status_code == 401
+
+    response = auth_client.get(url)
+    assert response.status_code == 200
+    assert response.json()["renditions"]["480p"]["percent"] == 100.0
@@ -0,0 +1,198 @@
+"""
+test_scheduling.py
+------------------
+Tests for the cost-based transcode scheduling.
+
+These tests verify that:
+    • The transcode cost grows with duration and output pixels and selects the matching queue.
+    • The FFmpeg thread budget is shared between the workers of a host and parallel processes.
+    • `schedule_video` enqueues the pipeline (conversions, trickplay, thumbnail, finalize)
+      as a dependency graph on the queues matching the cost of its jobs.
+    • By default the ladder is transcoded by a single job (one decode of the source); with
+      progressive publishing the lowest rendition is enqueued first, as a job of its own.
+    • A separate audio rendition gets its own job on the short queue.
+    • An upload identical to a processed video (hashed while probing) only enqueues the job reusing its output.
+"""
+
+from collections import defaultdict
+from unittest.mock import Mock, patch
+
+import pytest
+from django.utils import timezone
+
+from app_videos.models import EncodingProfile, Video
+from app_videos.scheduling import estimate_cost, ffmpeg_threads, select_transcode_queue
+from app_videos.tasks import schedule_video
+
+
+@pytest.fixture
+def mock_queues():
+    """
+    Mocks django_rq.get_queue with one Mock queue per queue name and skips the ffprobe stage.
+
+    Yields:
+        dict: Mock queue per queue name.
+    """
+    queues = defaultdict(Mock)
+    with patch("django_rq.get_queue", side_effect=lambda name, **kwargs: queues[name]), \
+            patch("app_videos.tasks.probe_video", side_effect=lambda pk: Video.objects.get(pk=pk)):
+        yield queues
+
+
+def probed(video, duration, width=1920, height=1080):
+    """
+    Stores probe results on the video, as the ffprobe stage would.
+    """
+    video.duration, video.width, video.height, video.frame_rate = duration, width, height, 25.0
+    video.save()
+    return video
+
+
+def enqueued(queues):
+    """
+    Returns (queue name, task name) of every enqueued job.
+    """
+    return [
+        (name, call.args[0].__name__)
+        for name, queue in queues.items()
+        for call in queue.enqueue.call_args_list
+    ]
+
+
+def test_cost_selects_queue(test_video, settings):
+    """
+    Ensures short clips go to the short queue and a 2-hour upload to the long queue.
+    """
+    formats = EncodingProfile.objects.get(is_default=True).formats()
+    settings.VIDEO_SCHEDULER_COST_THRESHOLDS = [1000, 5000]
+
+    assert estimate_cost(probed(test_video, 60), formats) == pytest.approx(60 * (1 + 0.444 + 0.198), rel=0.01)
+    assert select_transcode_queue(estimate_cost(test_video, formats)) == "transcode_short"
+    assert select_transcode_queue(estimate_cost(probed(test_video, 1800), formats)) == "transcode"
+    assert select_transcode_queue(estimate_cost(probed(test_video, 7200), formats)) == "transcode_long"
+
+
+def test_ffmpeg_threads_share_cores(settings):
+    """
+    Ensures the thread budget divides the available cores between workers and parallel processes.
+    """
+    settings.VIDEO_FFMPEG_THREADS = 0
+    settings.VIDEO_WORKERS_PER_HOST = 2
+    with patch("app_videos.scheduling.available_cores", return_value=16):
+        assert ffmpeg_threads() == 8
+        assert ffmpeg_threads(processes=4) == 2
+        assert ffmpeg_threads(processes=32) == 1
+
+    settings.VIDEO_FFMPEG_THREADS = 3
+    assert ffmpeg_threads(processes=4) == 3
+
+
+def test_schedule_video_ladder_mode(test_video, mock_queues):
+    """
+    Ensures a short video is transcoded on the short queue and finalize depends on the transcode and thumbnail jobs.
+
+    By default a single ladder job decodes the source once for all renditions.
+    """
+    probed(test_video, 60)
+    schedule_video(test_video.pk)
+
+    assert sorted(enqueued(mock_queues)) == [
+        ("default", "finalize_video"),
+        ("transcode_short", "convert_video_to_hls_ladder"),
+        ("transcode_short", "create_thumbnail"),
+    ]
+    ladder_call = mock_queues["transcode_short"].enqueue.call_args_list[0]
+    assert [name for name, *_ in ladder_call.args[2]] == ["480p", "720p", "1080p"]
+
+    finalize_call = mock_queues["default"].enqueue.call_args
+    assert len(finalize_call.kwargs["depends_on"]) == 2
+    assert finalize_call.kwargs["retry"].max == 3
+
+
+def test_schedule_video_progressive_publish(test_video, mock_queues, settings):
+    """
+    Ensures progressive publishing enqueues the lowest rendition at the front as its own job
+    and the ladder job only transcodes the higher renditions.
+    """
+    settings.VIDEO_PROGRESSIVE_PUBLISH = True
+    probed(test_video, 60)
+    schedule_video(test_video.pk)
+
+    lowest_call, ladder_call, _ = mock_queues["transcode_short"].enqueue.call_args_list
+    assert lowest_call.args[0].__name__ == "convert_video_to_hls"
+    assert lowest_call.args[2] == "480p"
+    assert lowest_call.kwargs["at_front"] is True
+    assert ladder_call.args[0].__name__ == "convert_video_to_hls_ladder"
+    assert [name for name, *_ in ladder_call.args[2]] == ["720p", "1080p"]
+    assert len(mock_queues["default"].enqueue.call_args.kwargs["depends_on"]) == 3
+
+
+def test_schedule_video_per_rendition_mode(test_video, mock_queues, settings):
+    """
+    Ensures 'per_rendition' mode schedules every rendition by its own cost and adds a trickplay job.
+
+    For a 40-minute 1080p source the 480p rendition fits the short queue, 720p the
+    regular queue, while 1080p and the whole-source trickplay pass land on the long queue.
+    """
+    settings.VIDEO_TRANSCODE_MODE = "per_rendition"
+    settings.VIDEO_SCHEDULER_COST_THRESHOLDS = [1000, 2000]
+    probed(test_video, 2400)
+    schedule_video(test_video.pk)
+
+    assert sorted(enqueued(mock_queues)) == [
+        ("default", "finalize_video"),
+        ("transcode", "convert_video_to_hls"),
+        ("transcode_long", "convert_video_to_hls"),
+        ("transcode_long", "create_trickplay"),
+        ("transcode_short", "convert_video_to_hls"),
+        ("transcode_short", "create_thumbnail"),
+    ]
+    assert len(mock_queues["default"].enqueue.call_args.kwargs["depends_on"]) == 5
+
+
+def test_schedule_video_per_title(test_video, mock_queues, settings):
+    """
+    Ensures per-title encoding adds a complexity analysis job that the transcode job depends on.
+    """
+    settings.VIDEO_PER_TITLE = True
+    probed(test_video, 60)
+    schedule_video(test_video.pk)
+
+    calls = mock_queues["transcode_short"].enqueue.call_args_list
+    assert [call.args[0].__name__ for call in calls[:2]] == ["analyze_complexity", "convert_video_to_hls_ladder"]
+    assert calls[1].kwargs["depends_on"] is mock_queues["transcode_short"].enqueue.return_value
+
+
+def test_schedule_video_separate_audio(test_video, mock_queues):
+    """
+    Ensures a profile with a separate audio rendition enqueues the audio encode on the short queue before finalize.
+    """
+    EncodingProfile.objects.filter(is_default=True).update(separate_audio=True)
+    probed(test_video, 60)
+    test_video.audio_codec = "aac"
+    test_video.save()
+    schedule_video(test_video.pk)
+
+    audio_calls = [
+        call for call in mock_queues["transcode_short"].enqueue.call_args_list if call.args[0].__name__ == "convert_audio_to_hls"
+    ]
+    assert len(audio_calls) == 1
+    assert audio_calls[0].kwargs["at_front"] is True
+    # Ladder, audio and thumbnail jobs
+    assert len(mock_queues["default"].enqueue.call_args.kwargs["depends_on"]) == 3
+
+
+def test_schedule_video_reuses_processed_duplicate(test_video, mock_queues):
+    """
+    Ensures an upload that turns out to be identical to a processed video is not transcoded.
+    """
+    original = Video.objects.create(
+        title="Original", video_file="", category="drama", content_hash="0" * 64, processed_at=timezone.now(),
+    )
+    test_video.content_hash = original.content_hash
+    probed(test_video, 60)
+
+    schedule_video(test_video.pk)
+
+    assert enqueued(mock_queues) == [("default", "reuse_processed_video")]
+    assert mock_queues["default"].enqueue.call_args.args[1:] == (test_video.pk, original.pk)
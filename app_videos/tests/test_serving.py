@@ -0,0 +1,361 @@
+"""
+test_serving.py
+---------------
+Tests for the media serving views (HLS playlists, segments, trickplay files).
+
+These tests verify that:
+    • Served media playlists sign every segment and init segment URI with a playback token.
+    • Segments are only served with a valid, unexpired playback token of their video, without a database query.
+    • Segments are served with the content type of their container (MPEG-TS or fMP4).
+    • Byte-range requests, as used by single-file renditions, return 206 Partial Content.
+    • Several ranges are streamed as multipart/byteranges, unsatisfiable ranges return 416 and a stale If-Range
+      returns the full file.
+    • The trickplay WebVTT index and sprite sheets are served; other files in the directory are not.
+    • Segments are cacheable as immutable; playlists carry validators and are revalidated with 304 Not Modified.
+    • Finished media playlists are served from the playlist cache without filesystem access until the
+      pipeline republishes or deletes them; the in-process tier skips Redis within VIDEO_PLAYLIST_LOCAL_TTL.
+    • With an offloading delivery backend, files are handed to the front proxy via X-Accel-Redirect or X-Sendfile.
+"""
+
+import time
+
+import pytest
+from django.core.cache import cache
+from django.utils.http import http_date
+
+from app_videos.api.tokens import PLAYBACK_TOKEN_EXPIRY_STEP, issue_playback_token, sign_playback
+from app_videos.api.utils import parse_range_header
+from app_videos.playlist_cache import cache_playlist, forget_playlists, playlist_version_key
+
+
+@pytest.fixture
+def media_root(tmp_path, settings):
+    """
+    Points MEDIA_ROOT at a temporary directory containing a small fMP4 rendition of video 1.
+
+    Returns:
+        Path: The rendition directory MEDIA_ROOT/video/1/480p.
+    """
+    settings.MEDIA_ROOT = tmp_path
+    rendition_dir = tmp_path / "video/1/480p"
+    rendition_dir.mkdir(parents=True)
+    (rendition_dir / "480p.m4s").write_bytes(bytes(range(256)) * 4)
+    (rendition_dir / "480p_000.ts").write_bytes(b"\x47" * 188)
+    return rendition_dir
+
+
+def signed(url, video_id=1):
+    """
+    Appends a valid playback token of the video to a segment URL.
+    """
+    return f"{url}?token={issue_playback_token(video_id)}"
+
+
+def test_serve_segment_content_types(auth_client, media_root):
+    """
+    Ensures MPEG-TS and CMAF segments are served with their respective content types.
+    """
+    response = auth_client.get(signed("/api/video/1/480p/480p_000.ts"))
+    assert response.status_code == 200
+    assert response["Content-Type"] == "video/mp2t"
+
+    response = auth_client.get(signed("/api/video/1/480p/480p.m4s"))
+    assert response.status_code == 200
+    assert response["Content-Type"] == "video/iso.segment"
+    assert response["Accept-Ranges"] == "bytes"
+
+
+def test_serve_segment_byte_range(auth_client, media_root):
+    """
+    Ensures a byte-range request returns only the requested bytes with 206 and Content-Range.
+    """
+    response = auth_client.get(signed("/api/video/1/480p/480p.m4s"), HTTP_RANGE="bytes=10-19")
+
+    assert response.status_code == 206
+    assert response["Content-Range"] == "bytes 10-19/1024"
+    assert b"".join(response.streaming_content) == bytes(range(10, 20))
+
+
+def test_serve_trickplay_files(auth_client, media_root):
+    """
+    Ensures the trickplay index and sprite sheets are served with their content types and other files are not.
+    """
+    trickplay_dir = media_root.parent / "trickplay"
+    trickplay_dir.mkdir()
+    (trickplay_dir / "thumbnails.vtt").write_text("WEBVTT\n")
+    (trickplay_dir / "sprite_000.jpg").write_bytes(b"\xff\xd8\xff")
+
+    response = auth_client.get("/api/video/1/trickplay/thumbnails.vtt")
+    assert response.status_code == 200
+    assert response["Content-Type"] == "text/vtt"
+
+    response = auth_client.get("/api/video/1/trickplay/sprite_000.jpg")
+    assert response.status_code == 200
+    assert response["Content-Type"] == "image/jpeg"
+
+    assert auth_client.get("/api/video/1/trickplay/sprite_001.jpg").status_code == 404
+    assert auth_client.get("/api/video/1/trickplay/index.m3u8").status_code == 404
+
+
+def test_serve_segment_x_accel_redirect(auth_client, media_root, settings):
+    """
+    Ensures nginx delivery returns an empty response with the internal redirect and the content type.
+    """
+    settings.VIDEO_DELIVERY_BACKEND = "x-accel-redirect"
+    settings.VIDEO_ACCEL_REDIRECT_PREFIX = "/protected-media/"
+
+    response = auth_client.get(signed("/api/video/1/480p/480p.m4s"), HTTP_RANGE="bytes=10-19")
+
+    assert response.status_code == 200
+    assert response["X-Accel-Redirect"] == "/protected-media/video/1/480p/480p.m4s"
+    assert response["Content-Type"] == "video/iso.segment"
+    assert response.content == b""
+
+
+def test_serve_segment_x_sendfile(auth_client, media_root, settings):
+    """
+    Ensures X-Sendfile delivery names the absolute file path and missing files still return 404.
+    """
+    settings.VIDEO_DELIVERY_BACKEND = "x-sendfile"
+
+    response = auth_client.get(signed("/api/video/1/480p/480p_000.ts"))
+    assert response.status_code == 200
+    assert response["X-Sendfile"] == str((media_root / "480p_000.ts").resolve())
+    assert response.content == b""
+
+    assert auth_client.get(signed("/api/video/1/480p/480p_001.ts")).status_code == 404
+
+
+def test_offloaded_files_require_authorization(api_client, media_root, settings):
+    """
+    Ensures unauthorized requests are rejected before any file is handed to the proxy.
+    """
+    settings.VIDEO_DELIVERY_BACKEND = "x-accel-redirect"
+
+    response = api_client.get("/api/video/1/480p/480p.m4s")
+
+    assert response.status_code == 403
+    assert "X-Accel-Redirect" not in response
+
+
+def test_serve_playlist_signs_segment_uris(auth_client, media_root):
+    """
+    Ensures the media playlist carries a token of its video on every segment and EXT-X-MAP URI.
+    """
+    (media_root / "index.m3u8").write_text(
+        "#EXTM3U\n#EXT-X-VERSION:7\n#EXT-X-TARGETDURATION:6\n#EXT-X-MAP:URI=\"480p_init.mp4\"\n"
+        "#EXTINF:6.000000,\n480p_000.m4s\n#EXTINF:6.000000,\n480p_001.m4s\n#EXT-X-ENDLIST\n"
+    )
+
+    response = auth_client.get("/api/video/1/480p/index.m3u8")
+
+    assert response.status_code == 200
+    assert response["Content-Type"] == "application/vnd.apple.mpegurl"
+    lines = response.content.decode().splitlines()
+    token = lines[-2].split("?token=", 1)[1]
+    assert f'#EXT-X-MAP:URI="480p_init.mp4?token={token}"' in lines
+    assert f"480p_000.m4s?token={token}" in lines
+    assert lines[-1] == "#EXT-X-ENDLIST"
+
+
+def test_segment_requires_valid_playback_token(db, api_client, media_root, django_assert_num_queries):
+    """
+    Ensures segments are served with a valid token without any query, and rejected with a missing,
+    forged, expired or foreign token.
+    """
+    with django_assert_num_queries(0):
+        assert api_client.get(signed("/api/video/1/480p/480p_000.ts")).status_code == 200
+
+    expired = int(time.time()) - 1
+    for token in ("", "123.abc", "²³.abc", f"{expired}.{sign_playback(1, expired)}", issue_playback_token(2)):
+        assert api_client.get(f"/api/video/1/480p/480p_000.ts?token={token}").status_code == 403
+
+
+def test_segment_cache_headers_and_not_modified(auth_client, media_root, settings):
+    """
+    Ensures segments are marked immutable with validators and If-None-Match / If-Modified-Since return 304.
+    """
+    response = auth_client.get(signed("/api/video/1/480p/480p_000.ts"))
+    assert response["Cache-Control"] == settings.VIDEO_CACHE_CONTROL["segment"]
+    assert "immutable" in response["Cache-Control"]
+    etag, last_modified = response["ETag"], response["Last-Modified"]
+
+    response = auth_client.get(signed("/api/video/1/480p/480p_000.ts"), HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert response["ETag"] == etag
+    assert response["Cache-Control"] == settings.VIDEO_CACHE_CONTROL["segment"]
+    assert response.content == b""
+
+    response = auth_client.get(signed("/api/video/1/480p/480p_000.ts"), HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == 304
+
+    response = auth_client.get(signed("/api/video/1/480p/480p_000.ts"), HTTP_IF_NONE_MATCH='"0-0"')
+    assert response.status_code == 200
+
+
+def test_master_playlist_revalidation(auth_client, media_root):
+    """
+    Ensures the master playlist gets a new ETag when it is rewritten, so a stale copy is not confirmed.
+    """
+    master = media_root.parent / "master.m3u8"
+    master.write_text("#EXTM3U\n")
+
+    response = auth_client.get("/api/video/1/master.m3u8")
+    assert response["Cache-Control"] == "private, no-cache"
+    etag = response["ETag"]
+    assert auth_client.get("/api/video/1/master.m3u8", HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    master.write_text("#EXTM3U\n#EXT-X-VERSION:3\n")
+    response = auth_client.get("/api/video/1/master.m3u8", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response["ETag"] != etag
+
+
+def test_media_playlist_not_modified(auth_client, media_root, monkeypatch):
+    """
+    Ensures a signed media playlist is validated by its content ETag only, so an If-Modified-Since
+    revalidation after the tokens rotated returns the playlist with the new tokens.
+    """
+    playlist = media_root / "index.m3u8"
+    playlist.write_text("#EXTM3U\n#EXTINF:6.000000,\n480p_000.ts\n#EXT-X-ENDLIST\n")
+
+    response = auth_client.get("/api/video/1/480p/index.m3u8")
+    assert "Last-Modified" not in response
+    assert auth_client.get("/api/video/1/480p/index.m3u8")["ETag"] == response["ETag"]
+    assert auth_client.get("/api/video/1/480p/index.m3u8", HTTP_IF_NONE_MATCH=response["ETag"]).status_code == 304
+    old_body = response.content
+
+    # One expiry step later the playlist is signed with a new token, although the file is unchanged
+    later = time.time() + PLAYBACK_TOKEN_EXPIRY_STEP
+    monkeypatch.setattr(time, "time", lambda: later)
+    response = auth_client.get("/api/video/1/480p/index.m3u8", HTTP_IF_MODIFIED_SINCE=http_date(later))
+    assert response.status_code == 200
+    assert response.content != old_body
+
+
+def test_parse_range_header():
+    """
+    Ensures ranges are clamped, merged and sorted, and malformed or unsatisfiable headers are told apart.
+    """
+    assert parse_range_header("bytes=0-9", 100) == [(0, 9)]
+    assert parse_range_header("bytes=90-200", 100) == [(90, 99)]
+    assert parse_range_header("bytes=-10", 100) == [(90, 99)]
+    assert parse_range_header("bytes=50-59, 0-9, 5-20, 21-30", 100) == [(0, 30), (50, 59)]
+    assert parse_range_header("bytes=100-", 100) == []
+    assert parse_range_header(None, 100) is None
+    assert parse_range_header("bytes=9-0", 100) is None
+    assert parse_range_header("items=0-9", 100) is None
+
+
+def test_serve_segment_multiple_ranges(auth_client, media_root):
+    """
+    Ensures a multi-range request returns a streamed multipart/byteranges body with a correct Content-Length.
+    """
+    response = auth_client.get(signed("/api/video/1/480p/480p.m4s"), HTTP_RANGE="bytes=0-3,100-103")
+
+    assert response.status_code == 206
+    content_type, _, boundary = response["Content-Type"].partition("; boundary=")
+    assert content_type == "multipart/byteranges"
+    body = b"".join(response.streaming_content)
+    assert int(response["Content-Length"]) == len(body)
+    assert body == (
+        f"--{boundary}\r\nContent-Type: video/iso.segment\r\nContent-Range: bytes 0-3/1024\r\n\r\n".encode()
+        + bytes(range(4)) + b"\r\n"
+        + f"--{boundary}\r\nContent-Type: video/iso.segment\r\nContent-Range: bytes 100-103/1024\r\n\r\n".encode()
+        + bytes(range(100, 104)) + b"\r\n"
+        + f"--{boundary}--\r\n".encode()
+    )
+
+
+def test_serve_segment_unsatisfiable_range(auth_client, media_root):
+    """
+    Ensures a range beyond the end of the file returns 416 with the file size and no cache headers.
+    """
+    response = auth_client.get(signed("/api/video/1/480p/480p.m4s"), HTTP_RANGE="bytes=2000-")
+
+    assert response.status_code == 416
+    assert response["Content-Range"] == "bytes */1024"
+    assert "Cache-Control" not in response
+
+
+def test_serve_segment_if_range(auth_client, media_root):
+    """
+    Ensures the range is served if If-Range matches the current ETag and the full file otherwise.
+    """
+    etag = auth_client.get(signed("/api/video/1/480p/480p.m4s"))["ETag"]
+
+    response = auth_client.get(signed("/api/video/1/480p/480p.m4s"), HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE=etag)
+    assert response.status_code == 206
+
+    response = auth_client.get(signed("/api/video/1/480p/480p.m4s"), HTTP_RANGE="bytes=0-9", HTTP_IF_RANGE='"0-0"')
+    assert response.status_code == 200
+    assert len(b"".join(response.streaming_content)) == 1024
+
+
+def test_media_playlist_served_from_cache(auth_client, media_root, monkeypatch):
+    """
+    Ensures a finished playlist is read from disk once, then served from the cache, and that
+    republishing it replaces the cached version.
+    """
+    playlist = media_root / "index.m3u8"
+    playlist.write_text("#EXTM3U\n#EXTINF:6.000000,\n480p_000.ts\n#EXT-X-ENDLIST\n")
+    assert b"480p_000.ts" in auth_client.get("/api/video/1/480p/index.m3u8").content
+
+    def no_disk_access(*args, **kwargs):
+        raise AssertionError("The playlist was read from disk.")
+
+    monkeypatch.setattr("app_videos.playlist_cache.read_playlist", no_disk_access)
+    response = auth_client.get("/api/video/1/480p/index.m3u8")
+    assert response.status_code == 200
+    assert b"480p_000.ts" in response.content
+    monkeypatch.undo()
+
+    # The pipeline publishes a new version of the rendition
+    playlist.write_text("#EXTM3U\n#EXTINF:6.000000,\n480p_new.ts\n#EXT-X-ENDLIST\n")
+    cache_playlist(1, "480p")
+    assert b"480p_new.ts" in auth_client.get("/api/video/1/480p/index.m3u8").content
+
+    playlist.unlink()
+    forget_playlists(1, ["480p"])
+    assert auth_client.get("/api/video/1/480p/index.m3u8").status_code == 404
+
+
+def test_unfinished_playlist_is_not_cached(auth_client, media_root):
+    """
+    Ensures a playlist without #EXT-X-ENDLIST is read from disk on every request.
+    """
+    playlist = media_root / "index.m3u8"
+    playlist.write_text("#EXTM3U\n#EXTINF:6.000000,\n480p_000.ts\n")
+    auth_client.get("/api/video/1/480p/index.m3u8")
+
+    playlist.write_text("#EXTM3U\n#EXTINF:6.000000,\n480p_000.ts\n#EXTINF:6.000000,\n480p_001.ts\n")
+    assert b"480p_001.ts" in auth_client.get("/api/video/1/480p/index.m3u8").content
+
+
+def test_local_playlist_tier_skips_shared_cache(auth_client, media_root, settings, monkeypatch):
+    """
+    Ensures the in-process tier serves a playlist without a shared cache lookup within its TTL and
+    picks up a version published by another process afterwards.
+    """
+    settings.VIDEO_PLAYLIST_LOCAL_TTL = 60
+    playlist = media_root / "index.m3u8"
+    playlist.write_text("#EXTM3U\n#EXTINF:6.000000,\n480p_000.ts\n#EXT-X-ENDLIST\n")
+    auth_client.get("/api/video/1/480p/index.m3u8")
+
+    def no_shared_cache(*args, **kwargs):
+        raise AssertionError("The shared cache was queried.")
+
+    monkeypatch.setattr(cache, "get", no_shared_cache)
+    assert b"480p_000.ts" in auth_client.get("/api/video/1/480p/index.m3u8").content
+    monkeypatch.undo()
+
+    # Another process republishes the rendition; this process only sees it once the TTL expired
+    playlist.write_text("#EXTM3U\n#EXTINF:6.000000,\n480p_new.ts\n#EXT-X-ENDLIST\n")
+    stale_version = cache.get(playlist_version_key(1, "480p"))
+    cache.delete(playlist_version_key(1, "480p"))
+    assert b"480p_000.ts" in auth_client.get("/api/video/1/480p/index.m3u8").content
+
+    settings.VIDEO_PLAYLIST_LOCAL_TTL = 0
+    response = auth_client.get("/api/video/1/480p/index.m3u8")
+    assert b"480p_new.ts" in response.content
+    assert cache.get(playlist_version_key(1, "480p")) != stale_version
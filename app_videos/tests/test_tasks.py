@@ -0,0 +1,576 @@
+"""
+test_tasks.py
+-------------
+Unit tests for the FFmpeg based video processing tasks.
+
+These tests verify that:
+    • The single-decode ladder transcode builds one FFmpeg command that splits the
+      decoded source and writes one HLS output per rendition.
+    • The ffprobe stage stores source metadata on the Video.
+    • Renditions above the source resolution are dropped and the keyframe interval
+      follows the real frame rate.
+    • Chunked mode transcodes every keyframe-aligned chunk separately and stitches
+      the chunk segments into one playlist per rendition.
+    • The FFmpeg thread budget caps the decoder and the filter graph, and is shared by the encoders.
+    • Interrupted renditions resume after their last complete segment and completed
+      renditions are skipped when a job runs again.
+    • The CMAF/fMP4 single-file output mode and its byte-range playlists.
+    • Trickplay sprite sheets come from the ladder decode pass and are indexed by a WebVTT track.
+    • Per-title encoding derives a bitrate ladder from the complexity probe and the transcode uses it.
+    • Encoding profiles (default, per category, per video) drive ladder, codec, preset and segment length.
+    • Rendition names are slugs and cannot take the directory of other output of a video.
+    • The master playlist carries measured BANDWIDTH/AVERAGE-BANDWIDTH/CODECS in ascending order.
+    • Videos are published with their first finished rendition and the master playlist grows as renditions finish.
+    • Profiles with a separate audio rendition encode the audio once and reference it as an audio group.
+    • FFmpeg writes into the scratch space; renditions are verified before they are published to MEDIA_ROOT,
+      and jobs do not start without enough free space.
+
+FFmpeg itself is never executed; `subprocess.run` is mocked and the generated
+command line is inspected instead.
+"""
+
+import json
+import subprocess
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from django.core.exceptions import ValidationError
+
+from app_videos.hls import Segment, read_media_playlist, write_media_playlist
+from app_videos.models import RESERVED_RENDITION_NAMES, EncodingProfile, EncodingRendition, VideoRendition
+from app_videos.pertitle import derive_bitrate_ladder, sample_offsets
+from app_videos.scratch import InsufficientSpaceError
+from app_videos.tasks import (
+    AUDIO_RENDITION, analyze_complexity, build_ladder_command, convert_audio_to_hls, convert_video_to_hls,
+    convert_video_to_hls_chunked, convert_video_to_hls_ladder, create_master_playlist, create_trickplay, probe_video,
+    select_renditions
+)
+from app_videos.trickplay import TRICKPLAY_DIR
+
+
+def ffprobe_result(width=1920, height=1080, frame_rate="30000/1001"):
+    """
+    Builds a fake ffprobe JSON result for a source with the given video properties.
+    """
+    data = {
+        "streams": [
+            {"codec_type": "video", "codec_name": "h264", "profile": "Main", "level": 31,
+             "width": width, "height": height, "avg_frame_rate": frame_rate, "r_frame_rate": frame_rate},
+            {"codec_type": "audio", "codec_name": "aac", "profile": "LC"},
+        ],
+        "format": {"duration": "120.5", "bit_rate": "4500000"},
+    }
+    return subprocess.CompletedProcess(args=["ffprobe"], returncode=0, stdout=json.dumps(data), stderr="")
+
+
+def write_fake_outputs(cmd):
+    """
+    Simulates the files FFmpeg would write for the given command line.
+
+    Segment splits get a two-chunk CSV list, HLS outputs get a playlist with a
+    single 6 s segment named after the segment pattern and complexity samples
+    get 250 kB (400 kbit/s over 5 s).
+    """
+    if Path(cmd[-1]).name.startswith("sample_"):
+        Path(cmd[-1]).write_bytes(b"\0" * 250_000)
+    if "-segment_list" in cmd:
+        Path(cmd[cmd.index("-segment_list") + 1]).write_text("chunk_0000.mkv,0.000000,60.000000\nchunk_0001.mkv,60.000000,90.500000\n")
+    for index, arg in enumerate(cmd):
+        if arg == "-hls_segment_filename":
+            segment = Path(cmd[index + 1].replace("%03d", "000"))
+            segment.write_bytes(b"\0" * 188)
+            Path(cmd[index + 2]).write_text(f"#EXTM3U\n#EXTINF:6.000000,\n{segment.name}\n#EXT-X-ENDLIST\n")
+
+
+@pytest.fixture(autouse=True)
+def media_root(tmp_path, settings):
+    """
+    Publishes the task output to tmp_path/media, with the scratch space at its default location inside it.
+    """
+    settings.MEDIA_ROOT = tmp_path / "media"
+    settings.VIDEO_SCRATCH_ROOT = ""
+    return settings.MEDIA_ROOT
+
+
+@pytest.fixture
+def video_formats(db):
+    """
+    Returns the rendition tuples of the default encoding profile created by the data migration.
+    """
+    return EncodingProfile.objects.get(is_default=True).formats()
+
+
+@pytest.fixture
+def mock_ffmpeg():
+    """
+    Mocks subprocess.run for the tasks module; ffprobe calls return a 1080p source.
+    Source hashing is mocked as well, since the test sources do not exist on disk.
+
+    Yields:
+        Mock: The patched subprocess.run, used to inspect FFmpeg command lines.
+    """
+    def fake_run(cmd, *args, **kwargs):
+        if cmd[0] == "ffprobe":
+            return fake_run.probe
+        fake_run.commands.append(cmd)
+        write_fake_outputs(cmd)
+        return subprocess.CompletedProcess(args=cmd, returncode=0)
+
+    fake_run.probe = ffprobe_result()
+    fake_run.commands = []
+    with patch("app_videos.tasks.subprocess.run", side_effect=fake_run) as mock_run, \
+            patch("app_videos.tasks.run_ffmpeg", side_effect=fake_run), \
+            patch("app_videos.tasks.hash_file", return_value="0" * 64):
+        mock_run.fake = fake_run
+        yield mock_run
+
+
+def ffmpeg_calls(mock_run):
+    """
+    Returns the FFmpeg command lines run through the mocked subprocess.run and run_ffmpeg.
+    """
+    return mock_run.fake.commands
+
+
+def test_convert_video_to_hls_ladder_decodes_once(test_video, tmp_path, monkeypatch, mock_ffmpeg, video_formats):
+    """
+    Ensures the ladder transcode runs a single FFmpeg process for all renditions.
+
+    The command must contain exactly one input, a split filter with one branch per
+    rendition (plus one for the trickplay sprite sheets) and one HLS playlist output per rendition.
+    """
+    monkeypatch.chdir(tmp_path)
+
+    convert_video_to_hls_ladder(test_video.pk, video_formats)
+
+    commands = ffmpeg_calls(mock_ffmpeg)
+    assert len(commands) == 1
+    cmd = commands[0]
+
+    assert cmd.count("-i") == 1
+    filter_graph = cmd[cmd.index("-filter_complex") + 1]
+    assert filter_graph.startswith("[0:v]split=4[v0][v1][v2][v3]")
+    assert "[v3]fps=1/10,scale=160:90,tile=10x10[trickplay]" in filter_graph
+    for name, scale, _, _ in video_formats:
+        assert f"scale={scale}" in filter_graph
+        assert str(tmp_path / f"media/scratch/{test_video.pk}/{name}/index.m3u8") in cmd
+        assert (tmp_path / f"media/video/{test_video.pk}/{name}/index.m3u8").exists()
+
+
+def test_probe_video_stores_source_metadata(test_video, mock_ffmpeg):
+    """
+    Ensures the ffprobe stage records duration, resolution, frame rate, codecs and bitrate.
+    """
+    video = probe_video(test_video.pk)
+    video.refresh_from_db()
+
+    assert video.duration == 120.5
+    assert (video.width, video.height) == (1920, 1080)
+    assert video.frame_rate == 29.97
+    assert (video.video_codec, video.audio_codec) == ("h264", "aac")
+    assert video.bitrate == 4500000
+
+
+def test_select_renditions_drops_upscales(test_video, video_formats):
+    """
+    Ensures renditions above the source resolution are skipped, keeping at least the lowest one.
+    """
+    test_video.width, test_video.height = 854, 480
+    assert [f[0] for f in select_renditions(test_video, video_formats)] == ["480p"]
+
+    test_video.width, test_video.height = 640, 360
+    assert [f[0] for f in select_renditions(test_video, video_formats)] == ["480p"]
+
+    test_video.width, test_video.height = 1920, 800
+    assert [f[0] for f in select_renditions(test_video, video_formats)] == ["480p", "720p", "1080p"]
+
+
+def test_ladder_skips_upscales_and_aligns_gop(test_video, tmp_path, monkeypatch, mock_ffmpeg, video_formats):
+    """
+    Ensures a 720p 50 fps source is encoded without 1080p and with a 2 s keyframe interval.
+    """
+    monkeypatch.chdir(tmp_path)
+    mock_ffmpeg.fake.probe = ffprobe_result(width=1280, height=720, frame_rate="50/1")
+
+    convert_video_to_hls_ladder(test_video.pk, video_formats)
+
+    cmd = ffmpeg_calls(mock_ffmpeg)[0]
+    assert cmd[cmd.index("-filter_complex") + 1].startswith("[0:v]split=3[v0][v1][v2]")
+    assert not any("1080p" in arg for arg in cmd)
+    assert cmd[cmd.index("-g") + 1] == "100"
+
+
+def test_chunked_transcode_stitches_chunk_playlists(test_video, tmp_path, monkeypatch, mock_ffmpeg, settings, video_formats):
+    """
+    Ensures chunked mode splits the source once, transcodes each chunk with its source offset
+    and stitches the chunk segments into one playlist per rendition.
+    """
+    monkeypatch.chdir(tmp_path)
+    settings.VIDEO_CHUNK_WORKERS = 2
+
+    with patch("app_videos.tasks.ffmpeg_threads", return_value=4):
+        convert_video_to_hls_chunked(test_video.pk, video_formats)
+
+    split_cmd, *chunk_cmds = ffmpeg_calls(mock_ffmpeg)
+    assert "-segment_time" in split_cmd
+    assert len(chunk_cmds) == 2
+    assert any("60.000000" in cmd for cmd in chunk_cmds)
+    assert all(input_and_filter_threads(cmd) == ("4", "4") for cmd in chunk_cmds)
+
+    video_dir = tmp_path / f"media/video/{test_video.pk}"
+    assert [segment.uri for segment in read_media_playlist(video_dir / "720p/index.m3u8")] == ["720p_0000_000.ts", "720p_0001_000.ts"]
+    assert "#EXT-X-ENDLIST" in (video_dir / "720p/index.m3u8").read_text()
+    assert not list((video_dir / "720p").glob("chunk_*.m3u8"))
+    assert not (video_dir / "chunks").exists()
+
+
+def input_and_filter_threads(cmd):
+    """
+    Returns the input-side -threads value and the -filter_complex_threads / -filter_threads value of a command.
+    """
+    input_index = cmd.index("-i")
+    assert cmd.index("-threads") < input_index
+    filter_option = "-filter_complex_threads" if "-filter_complex" in cmd else "-filter_threads"
+    return cmd[cmd.index("-threads") + 1], cmd[cmd.index(filter_option) + 1]
+
+
+def test_thread_budget_caps_decoder_filters_and_encoders(test_video, tmp_path, monkeypatch, mock_ffmpeg, video_formats):
+    """
+    Ensures the transcode commands limit the decoder and the filter graph to the thread budget, not only the encoders.
+    """
+    monkeypatch.chdir(tmp_path)
+
+    cmd = build_ladder_command(tmp_path / "chunk_0000.mp4", test_video.pk, video_formats, threads=6)
+    assert input_and_filter_threads(cmd) == ("6", "6")
+    assert [cmd[index + 1] for index, arg in enumerate(cmd) if arg == "-threads"][1:] == ["2", "2", "2"]
+
+    cmd = build_ladder_command(tmp_path / "chunk_0000.mp4", test_video.pk, video_formats)
+    assert "-threads" not in cmd and "-filter_complex_threads" not in cmd
+
+    with patch("app_videos.tasks.ffmpeg_threads", return_value=6):
+        convert_video_to_hls(test_video.pk, *video_formats[0])
+    cmd = ffmpeg_calls(mock_ffmpeg)[-1]
+    assert input_and_filter_threads(cmd) == ("6", "6")
+    assert [cmd[index + 1] for index, arg in enumerate(cmd) if arg == "-threads"] == ["6", "6"]
+
+
+def test_convert_video_to_hls_resumes_after_last_complete_segment(test_video, tmp_path, monkeypatch, mock_ffmpeg, video_formats):
+    """
+    Ensures an interrupted rendition continues after its complete segments and is skipped once completed.
+
+    The partial playlist lists two complete 6 s segments, so FFmpeg must seek to 12 s,
+    number new segments from 2 and write them to resume.m3u8, which is merged afterwards.
+    The partial output lives in the scratch directory; the merged rendition is published to MEDIA_ROOT.
+    """
+    monkeypatch.chdir(tmp_path)
+    scratch = tmp_path / f"media/scratch/{test_video.pk}/480p"
+    scratch.mkdir(parents=True)
+    (scratch / "index.m3u8").write_text(
+        "#EXTM3U\n#EXTINF:6.000000,\n480p_000.ts\n#EXTINF:6.000000,\n480p_001.ts\n"
+    )
+    (scratch / "480p_000.ts").write_bytes(b"\0" * 188)
+    (scratch / "480p_001.ts").write_bytes(b"\0" * 188)
+    output_dir = tmp_path / f"media/video/{test_video.pk}/480p"
+
+    convert_video_to_hls(test_video.pk, *video_formats[0])
+
+    cmd = ffmpeg_calls(mock_ffmpeg)[0]
+    assert cmd[cmd.index("-ss") + 1] == "12.000000"
+    assert cmd[cmd.index("-start_number") + 1] == "2"
+    assert cmd[-1].endswith("resume.m3u8")
+
+    assert len(read_media_playlist(output_dir / "index.m3u8")) == 3
+    assert "#EXT-X-ENDLIST" in (output_dir / "index.m3u8").read_text()
+    assert not (output_dir / "resume.m3u8").exists()
+    assert not scratch.exists()
+    state = VideoRendition.objects.get(video=test_video, name="480p")
+    assert state.completed_at is not None
+    assert state.segments_completed == 3
+
+    convert_video_to_hls(test_video.pk, *video_formats[0])
+    assert len(ffmpeg_calls(mock_ffmpeg)) == 1
+
+
+def test_ladder_skips_completed_renditions(test_video, tmp_path, monkeypatch, mock_ffmpeg, video_formats):
+    """
+    Ensures a retried ladder job only transcodes the renditions that are not completed yet.
+    """
+    monkeypatch.chdir(tmp_path)
+    convert_video_to_hls_ladder(test_video.pk, video_formats)
+    VideoRendition.objects.filter(video=test_video, name="1080p").update(completed_at=None)
+    (tmp_path / f"media/video/{test_video.pk}/1080p/index.m3u8").write_text("#EXTM3U\n")
+
+    convert_video_to_hls_ladder(test_video.pk, video_formats)
+
+    cmd = ffmpeg_calls(mock_ffmpeg)[1]
+    assert cmd[cmd.index("-filter_complex") + 1].startswith("[0:v]split=1[v0]")
+    assert any("1080p" in arg for arg in cmd)
+
+
+def test_ladder_fmp4_single_file_mode(test_video, tmp_path, monkeypatch, mock_ffmpeg, settings, video_formats):
+    """
+    Ensures the fMP4 single-file mode writes one .m4s file with an init segment per rendition.
+    """
+    monkeypatch.chdir(tmp_path)
+    settings.VIDEO_HLS_SEGMENT_TYPE = "fmp4"
+    settings.VIDEO_HLS_SINGLE_FILE = True
+
+    convert_video_to_hls_ladder(test_video.pk, video_formats)
+
+    cmd = ffmpeg_calls(mock_ffmpeg)[0]
+    assert cmd.count("fmp4") == 3
+    assert cmd.count("single_file") == 3
+    assert str(tmp_path / f"media/scratch/{test_video.pk}/480p/480p.m4s") in cmd
+    assert "480p_init.mp4" in cmd
+
+
+def test_byte_range_playlist_round_trip(tmp_path):
+    """
+    Ensures EXT-X-MAP and EXT-X-BYTERANGE entries survive reading and rewriting a playlist.
+    """
+    playlist = tmp_path / "index.m3u8"
+    segments = [
+        Segment(6.0, "480p.m4s", "1000@720", 'URI="480p.m4s",BYTERANGE="720@0"'),
+        Segment(4.5, "480p.m4s", "800@1720", 'URI="480p.m4s",BYTERANGE="720@0"'),
+    ]
+    write_media_playlist(playlist, segments)
+
+    text = playlist.read_text()
+    assert "#EXT-X-VERSION:7" in text
+    assert text.count("#EXT-X-MAP:") == 1
+    assert read_media_playlist(playlist) == segments
+
+
+def test_master_playlist_has_measured_attributes(test_video, tmp_path, monkeypatch, mock_ffmpeg, video_formats):
+    """
+    Ensures the master playlist lists every rendition with bandwidth, codecs, resolution and frame rate.
+
+    The fake 480p rendition has three times the segment bytes of 720p, so it must be listed last.
+    """
+    monkeypatch.chdir(tmp_path)
+    convert_video_to_hls_ladder(test_video.pk, video_formats[:2])
+    segment = tmp_path / f"media/video/{test_video.pk}/480p/480p_000.ts"
+    segment.write_bytes(b"\0" * 564)
+    VideoRendition.objects.filter(video=test_video, name="480p").update(bandwidth=None)
+
+    create_master_playlist(test_video.pk)
+
+    lines = (tmp_path / f"media/video/{test_video.pk}/master.m3u8").read_text().splitlines()
+    stream_infs = [line for line in lines if line.startswith("#EXT-X-STREAM-INF:")]
+    assert stream_infs[0] == (
+        '#EXT-X-STREAM-INF:BANDWIDTH=251,AVERAGE-BANDWIDTH=251,CODECS="avc1.4D401F,mp4a.40.2",'
+        'RESOLUTION=1280x720,FRAME-RATE=29.970'
+    )
+    assert "BANDWIDTH=752," in stream_infs[-1]
+    assert lines[-1] == "480p/index.m3u8"
+
+
+def test_video_is_published_with_first_rendition(test_video, tmp_path, monkeypatch, mock_ffmpeg, video_formats):
+    """
+    Ensures the master playlist is written as soon as the lowest rendition is done and is extended by later renditions.
+
+    A rendition whose playlist is still being written (no #EXT-X-ENDLIST yet) must not be listed.
+    """
+    monkeypatch.chdir(tmp_path)
+    video_dir = tmp_path / f"media/video/{test_video.pk}"
+    (video_dir / "720p").mkdir(parents=True)
+    (video_dir / "720p/index.m3u8").write_text("#EXTM3U\n#EXTINF:6.000000,\n720p_000.ts\n")
+
+    convert_video_to_hls(test_video.pk, *video_formats[0])
+
+    test_video.refresh_from_db()
+    assert test_video.published_at is not None
+    assert [line for line in (video_dir / "master.m3u8").read_text().splitlines() if not line.startswith("#")] == ["480p/index.m3u8"]
+
+    published_at = test_video.published_at
+    convert_video_to_hls(test_video.pk, *video_formats[1])
+
+    test_video.refresh_from_db()
+    assert test_video.published_at == published_at
+    assert [line for line in (video_dir / "master.m3u8").read_text().splitlines() if not line.startswith("#")] == [
+        "480p/index.m3u8", "720p/index.m3u8"
+    ]
+    assert not list(video_dir.glob(".*.tmp"))
+
+
+def test_separate_audio_rendition_group(test_video, tmp_path, monkeypatch, mock_ffmpeg, video_formats):
+    """
+    Ensures video renditions are encoded without audio and the audio is encoded once into a shared group.
+
+    The video is only published once the audio rendition exists; every variant then
+    references the group and its BANDWIDTH includes the audio (188 + 188 bytes over 6 s).
+    """
+    monkeypatch.chdir(tmp_path)
+    EncodingProfile.objects.filter(is_default=True).update(separate_audio=True, audio_bitrate="160k")
+    video_dir = tmp_path / f"media/video/{test_video.pk}"
+
+    convert_video_to_hls_ladder(test_video.pk, video_formats[:2])
+
+    ladder_cmd = ffmpeg_calls(mock_ffmpeg)[0]
+    assert "0:a:0?" not in ladder_cmd
+    assert ladder_cmd.count("-an") == 3  # two renditions plus the trickplay output
+    assert "-c:a" not in ladder_cmd
+    test_video.refresh_from_db()
+    assert test_video.published_at is None
+
+    convert_audio_to_hls(test_video.pk)
+
+    audio_cmd = ffmpeg_calls(mock_ffmpeg)[-1]
+    assert audio_cmd[audio_cmd.index("-b:a") + 1] == "160k"
+    assert "-vn" in audio_cmd
+    assert audio_cmd[-1].endswith("audio/index.m3u8")
+
+    lines = (video_dir / "master.m3u8").read_text().splitlines()
+    assert '#EXT-X-MEDIA:TYPE=AUDIO,GROUP-ID="audio",NAME="Main",DEFAULT=YES,AUTOSELECT=YES,URI="audio/index.m3u8"' in lines
+    stream_infs = [line for line in lines if line.startswith("#EXT-X-STREAM-INF:")]
+    assert len(stream_infs) == 2
+    assert all(line.endswith(',AUDIO="audio"') for line in stream_infs)
+    assert stream_infs[0].startswith('#EXT-X-STREAM-INF:BANDWIDTH=502,AVERAGE-BANDWIDTH=502,CODECS="avc1.4D401F,mp4a.40.2"')
+    test_video.refresh_from_db()
+    assert test_video.published_at is not None
+
+
+def test_ladder_writes_trickplay_vtt(test_video, tmp_path, monkeypatch, mock_ffmpeg, video_formats):
+    """
+    Ensures the ladder transcode indexes its trickplay sprite sheets with a WebVTT track.
+
+    The 120.5 s source yields 13 tiles of 160x90; tile 11 sits in row 1, column 1
+    of the first sheet and the last cue ends at the source duration.
+    """
+    monkeypatch.chdir(tmp_path)
+    convert_video_to_hls_ladder(test_video.pk, video_formats)
+
+    cues = (tmp_path / f"media/video/{test_video.pk}/trickplay/thumbnails.vtt").read_text().strip().split("\n\n")
+    assert cues[0].startswith("WEBVTT")
+    assert len([cue for cue in cues if "-->" in cue]) == 13
+    assert cues[1] == "00:00:00.000 --> 00:00:10.000\nsprite_000.jpg#xywh=0,0,160,90"
+    assert cues[12] == "00:01:50.000 --> 00:02:00.000\nsprite_000.jpg#xywh=160,90,160,90"
+    assert cues[13] == "00:02:00.000 --> 00:02:00.500\nsprite_000.jpg#xywh=320,90,160,90"
+
+    # Already complete: a separate trickplay pass does nothing
+    create_trickplay(test_video.pk)
+    assert len(ffmpeg_calls(mock_ffmpeg)) == 1
+
+
+def test_derive_bitrate_ladder_caps_and_floors(video_formats):
+    """
+    Ensures per-title bitrates scale with the pixel count, never exceed the fixed ladder and never drop below its floor.
+    """
+    assert sample_offsets(120.5, 4, 5) == [12.562, 42.688, 72.812, 102.938]
+    assert sample_offsets(12, 4, 5) == [0.0]
+
+    assert derive_bitrate_ladder(400_000, video_formats) == {"480p": "616k", "720p": "1131k", "1080p": "2078k"}
+    assert derive_bitrate_ladder(10_000, video_formats) == {"480p": "200k", "720p": "700k", "1080p": "1250k"}
+    assert derive_bitrate_ladder(10_000_000, video_formats) == {"480p": "800k", "720p": "2800k", "1080p": "5000k"}
+
+
+def test_per_title_ladder_is_used_by_transcode(test_video, tmp_path, monkeypatch, mock_ffmpeg, video_formats):
+    """
+    Ensures the complexity probe stores a bitrate ladder on the video and the ladder transcode encodes with it.
+    """
+    monkeypatch.chdir(tmp_path)
+
+    video = analyze_complexity(test_video.pk, video_formats)
+    assert video.complexity_bitrate == 400_000
+    assert video.bitrate_ladder == {"480p": "616k", "720p": "1131k", "1080p": "2078k"}
+
+    probe_commands = ffmpeg_calls(mock_ffmpeg)
+    assert len(probe_commands) == 4
+    sample_dir = tmp_path / f"media/scratch/{test_video.pk}/complexity"
+    assert all(Path(cmd[-1]).parent == sample_dir for cmd in probe_commands)
+    assert sample_dir.parent.is_dir() and not sample_dir.exists()
+    assert all(cmd[cmd.index("-crf") + 1] == "23" for cmd in probe_commands)
+
+    convert_video_to_hls_ladder(test_video.pk, video_formats)
+    cmd = ffmpeg_calls(mock_ffmpeg)[-1]
+    bitrates = [cmd[index + 1] for index, arg in enumerate(cmd) if arg == "-b:v"]
+    assert bitrates == ["616k", "1131k", "2078k"]
+
+
+def test_encoding_profile_overrides(test_video, tmp_path, monkeypatch, mock_ffmpeg, video_formats):
+    """
+    Ensures a category profile replaces the default ladder and encoder settings, and a video's own profile wins over both.
+    """
+    monkeypatch.chdir(tmp_path)
+    assert video_formats == [
+        ("480p", "854:480", "800k", "96k"),
+        ("720p", "1280:720", "2800k", "128k"),
+        ("1080p", "1920:1080", "5000k", "192k"),
+    ]
+
+    comedy = EncodingProfile.objects.create(name="comedy", category="Comedy", video_codec="hevc", preset="slow", segment_seconds=4)
+    EncodingRendition.objects.create(profile=comedy, name="360p", width=640, height=360, video_bitrate="500k", audio_bitrate="96k")
+    assert EncodingProfile.objects.for_video(test_video) == comedy
+
+    convert_video_to_hls(test_video.pk, "360p", "640:360", "500k", "96k")
+    cmd = ffmpeg_calls(mock_ffmpeg)[0]
+    assert cmd[cmd.index("-c:v") + 1] == "libx265"
+    assert cmd[cmd.index("-preset") + 1] == "slow"
+    assert cmd[cmd.index("-hls_time") + 1] == "4"
+
+    create_master_playlist(test_video.pk)
+    master = (tmp_path / f"media/video/{test_video.pk}/master.m3u8").read_text()
+    assert "360p/index.m3u8" in master and "480p" not in master
+
+    test_video.encoding_profile = EncodingProfile.objects.get(is_default=True)
+    test_video.save(update_fields=["encoding_profile"])
+    assert EncodingProfile.objects.for_video(test_video).name == "default"
+
+
+@pytest.mark.parametrize("name", ["../x", "a/b", "720p.", "audio", "Trickplay", "chunks", "complexity"])
+def test_rendition_name_must_be_safe_directory(db, name):
+    """
+    Ensures rendition names that escape the video directory or collide with its other output are rejected.
+    """
+    profile = EncodingProfile.objects.get(is_default=True)
+    rendition = EncodingRendition(profile=profile, name=name, width=640, height=360, video_bitrate="500k", audio_bitrate="96k")
+    with pytest.raises(ValidationError) as error:
+        rendition.full_clean()
+    assert "name" in error.value.message_dict
+
+    rendition.name = "360p"
+    rendition.full_clean()
+    assert {AUDIO_RENDITION, TRICKPLAY_DIR} <= set(RESERVED_RENDITION_NAMES)
+
+
+def test_rendition_is_published_from_scratch(test_video, tmp_path, mock_ffmpeg, settings, video_formats):
+    """
+    Ensures FFmpeg writes into the configured scratch directory and the finished rendition is moved to MEDIA_ROOT.
+    """
+    settings.VIDEO_SCRATCH_ROOT = tmp_path / "nvme"
+
+    convert_video_to_hls(test_video.pk, *video_formats[0])
+
+    cmd = ffmpeg_calls(mock_ffmpeg)[0]
+    assert cmd[-1] == str(tmp_path / f"nvme/{test_video.pk}/480p/index.m3u8")
+    published = tmp_path / f"media/video/{test_video.pk}/480p"
+    assert (published / "index.m3u8").exists()
+    assert (published / "480p_000.ts").exists()
+    assert not (tmp_path / f"nvme/{test_video.pk}/480p").exists()
+
+
+def test_incomplete_rendition_is_not_published(test_video, tmp_path, mock_ffmpeg, video_formats):
+    """
+    Ensures a rendition whose playlist lists a missing segment fails verification and stays in the scratch space.
+    """
+    def write_without_segments(cmd, *args, **kwargs):
+        playlist = Path(cmd[-1])
+        playlist.write_text("#EXTM3U\n#EXTINF:6.000000,\n480p_000.ts\n#EXT-X-ENDLIST\n")
+
+    with patch("app_videos.tasks.run_ffmpeg", side_effect=write_without_segments), pytest.raises(FileNotFoundError):
+        convert_video_to_hls(test_video.pk, *video_formats[0])
+
+    assert not (tmp_path / f"media/video/{test_video.pk}/480p").exists()
+    assert VideoRendition.objects.get(video=test_video, name="480p").completed_at is None
+
+
+def test_transcode_requires_free_space(test_video, tmp_path, mock_ffmpeg, settings, video_formats):
+    """
+    Ensures a transcode job fails before running FFmpeg when the volumes cannot hold its output.
+    """
+    settings.VIDEO_MIN_FREE_SPACE = 2 ** 62
+
+    with pytest.raises(InsufficientSpaceError):
+        convert_video_to_hls_ladder(test_video.pk, video_formats)
+    assert ffmpeg_calls(mock_ffmpeg) == []
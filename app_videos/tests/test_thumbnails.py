@@ -0,0 +1,67 @@
+"""
+test_thumbnails.py
+------------------
+Tests for the responsive thumbnail variants.
+
+These tests verify that:
+    • The thumbnail stage writes compressed variants at the configured widths without upscaling.
+    • The video list returns a srcset string of the variant URLs per image format.
+    • Variants are served with the content type of their format.
+"""
+
+import pytest
+from PIL import Image
+from django.urls import reverse
+
+from app_videos.tasks import create_thumbnail_variants
+
+
+@pytest.fixture
+def video_with_thumbnail(test_video, tmp_path, settings):
+    """
+    Gives the test video a 1000x562 PNG thumbnail in a temporary MEDIA_ROOT.
+    """
+    settings.MEDIA_ROOT = tmp_path
+    settings.VIDEO_THUMBNAIL_WIDTHS = [320, 640, 1280]
+    settings.VIDEO_THUMBNAIL_FORMATS = ["webp", "jpeg"]
+    (tmp_path / "thumbnail").mkdir()
+    Image.new("RGB", (1000, 562), "teal").save(tmp_path / f"thumbnail/image{test_video.pk}.png")
+    test_video.thumbnail.name = f"thumbnail/image{test_video.pk}.png"
+    test_video.save(update_fields=["thumbnail"])
+    return test_video
+
+
+def test_create_thumbnail_variants_skips_upscales(video_with_thumbnail, tmp_path):
+    """
+    Ensures variants are written per format for every width up to the source width, keeping the aspect ratio.
+    """
+    create_thumbnail_variants(video_with_thumbnail.pk)
+    video_with_thumbnail.refresh_from_db()
+
+    pk = video_with_thumbnail.pk
+    assert video_with_thumbnail.thumbnail_variants == {
+        "webp": {"320": f"thumbnail/variants/image{pk}_320.webp", "640": f"thumbnail/variants/image{pk}_640.webp"},
+        "jpeg": {"320": f"thumbnail/variants/image{pk}_320.jpg", "640": f"thumbnail/variants/image{pk}_640.jpg"},
+    }
+    with Image.open(tmp_path / f"thumbnail/variants/image{pk}_320.webp") as image:
+        assert image.format == "WEBP"
+        assert image.size == (320, 180)
+
+
+def test_video_list_returns_thumbnail_srcset(auth_client, video_with_thumbnail):
+    """
+    Ensures the video list exposes the variants as srcset strings and the variant URLs serve the images.
+    """
+    create_thumbnail_variants(video_with_thumbnail.pk)
+
+    response = auth_client.get(reverse("video-list"))
+    srcset = response.json()[0]["thumbnail_srcset"]
+
+    webp_320 = reverse("video-thumbnail-variant", args=[video_with_thumbnail.pk, 320, "webp"])
+    assert srcset["webp"].startswith(f"http://testserver{webp_320} 320w, ")
+    assert srcset["webp"].endswith(" 640w")
+
+    response = auth_client.get(webp_320)
+    assert response.status_code == 200
+    assert response["Content-Type"] == "image/webp"
+    assert auth_client.get(reverse("video-thumbnail-variant", args=[video_with_thumbnail.pk, 1280, "webp"])).status_code == 404
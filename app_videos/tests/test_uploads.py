@@ -0,0 +1,122 @@
+"""
+test_uploads.py
+---------------
+Tests for the resumable, chunked upload API.
+
+These tests verify that:
+    • Staff users can create an upload session, append chunks at the current offset
+      and resume after reading the offset with HEAD.
+    • Chunks at a wrong offset, with a wrong content type or beyond the announced size are rejected.
+    • Finalizing moves the file into the video storage and creates the Video, which starts the pipeline.
+    • A finalize that fails before the commit leaves the partial file in place and can be repeated.
+    • Non-staff users cannot upload.
+"""
+
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from django.db import DatabaseError
+from django.urls import reverse
+
+from app_videos.models import Video
+from app_videos.tasks import schedule_video
+
+CHUNK_TYPE = "application/offset+octet-stream"
+
+
+@pytest.fixture
+def staff_client(auth_client, test_user, tmp_path, settings):
+    """
+    Returns the authenticated client with a staff user and a temporary MEDIA_ROOT.
+    """
+    settings.MEDIA_ROOT = tmp_path
+    test_user.is_staff = True
+    test_user.save(update_fields=["is_staff"])
+    return auth_client
+
+
+@pytest.fixture
+def upload_url(staff_client):
+    """
+    Creates an upload session for a 10-byte file and returns its URL.
+    """
+    response = staff_client.post(
+        reverse("upload-create"),
+        {"filename": "movie.mp4", "size": 10, "title": "Upload", "description": "", "category": "drama"},
+        format="json",
+    )
+    assert response.status_code == 201
+    assert response["Upload-Offset"] == "0"
+    return response["Location"]
+
+
+def test_chunked_upload_resumes_and_finalizes(staff_client, upload_url, tmp_path, django_capture_on_commit_callbacks):
+    """
+    Ensures chunks are appended at the stored offset and finalize creates the Video from the assembled file.
+    """
+    response = staff_client.patch(upload_url, b"01234", content_type=CHUNK_TYPE, HTTP_UPLOAD_OFFSET="0")
+    assert response.status_code == 204
+    assert response["Upload-Offset"] == "5"
+
+    # The client lost its state and asks for the offset before resuming
+    assert staff_client.head(upload_url)["Upload-Offset"] == "5"
+    assert staff_client.patch(upload_url, b"01234", content_type=CHUNK_TYPE, HTTP_UPLOAD_OFFSET="0").status_code == 409
+
+    finalize_url = f"{upload_url}finalize/"
+    assert staff_client.post(finalize_url).status_code == 409
+
+    assert staff_client.patch(upload_url, b"56789", content_type=CHUNK_TYPE, HTTP_UPLOAD_OFFSET="5").status_code == 204
+
+    with patch("django_rq.get_queue") as mock_get_queue:
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            response = staff_client.post(finalize_url)
+    assert response.status_code == 201
+    assert len(callbacks) == 2  # the file is moved, then video_post_save enqueues the pipeline
+    assert mock_get_queue.return_value.enqueue.call_args.args[0] is schedule_video
+
+    video = Video.objects.get(pk=response.json()["video_id"])
+    assert video.title == "Upload"
+    assert Path(video.video_file.path).read_bytes() == b"0123456789"
+    assert video.video_file.name == "video/tmp/movie.mp4"
+    assert not any((tmp_path / "uploads").iterdir())
+
+    # Finalizing again is idempotent
+    assert staff_client.post(finalize_url).json() == {"video_id": video.pk}
+
+
+def test_failed_finalize_keeps_partial_file(staff_client, upload_url, tmp_path, django_capture_on_commit_callbacks):
+    """
+    Ensures a finalize that fails before the commit leaves the partial file in place, so it can be repeated.
+    """
+    assert staff_client.patch(upload_url, b"0123456789", content_type=CHUNK_TYPE, HTTP_UPLOAD_OFFSET="0").status_code == 204
+    finalize_url = f"{upload_url}finalize/"
+
+    with patch("app_videos.api.views.Video.objects.create", side_effect=DatabaseError):
+        with pytest.raises(DatabaseError):
+            staff_client.post(finalize_url)
+    assert [path.read_bytes() for path in (tmp_path / "uploads").iterdir()] == [b"0123456789"]
+    assert not Video.objects.exists()
+
+    with patch("django_rq.get_queue"):
+        with django_capture_on_commit_callbacks(execute=True):
+            response = staff_client.post(finalize_url)
+    assert response.status_code == 201
+    assert Path(Video.objects.get().video_file.path).read_bytes() == b"0123456789"
+
+
+def test_upload_rejects_invalid_chunks(staff_client, upload_url):
+    """
+    Ensures a wrong content type (415) and a chunk beyond the announced size (413) are rejected.
+    """
+    assert staff_client.patch(upload_url, b"01234", content_type="application/json", HTTP_UPLOAD_OFFSET="0").status_code == 415
+    assert staff_client.patch(upload_url, b"0123456789AB", content_type=CHUNK_TYPE, HTTP_UPLOAD_OFFSET="0").status_code == 413
+    assert staff_client.head(upload_url)["Upload-Offset"] == "0"
+
+
+def test_upload_requires_staff(auth_client):
+    """
+    Ensures users without staff status cannot create uploads.
+    """
+    response = auth_client.post(reverse("upload-create"), {"filename": "a.mp4", "size": 1, "title": "t", "category": "drama"}, format="json")
+    assert response.status_code == 403
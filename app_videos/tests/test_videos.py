@@ -7,8 +7,8 @@ Integration and unit tests for video API endpoints and signal-based background p
 These tests verify that:
     • Authenticated users can successfully retrieve video lists and HLS playlist files.
     • Unauthorized requests to video endpoints are properly rejected (HTTP 401).
-    • The video post_save signal automatically enqueues background tasks for video
-      conversion (480p, 720p, 1080p) and master playlist creation via RQ.
+    • The video post_save signal automatically enqueues the scheduling task that
+      builds the processing pipeline (conversion, master playlist creation) via RQ.
 
 
 The tests ensure correct behavior of the video-serving API, secure authentication via
@@ -18,7 +18,6 @@ Cookie-based JWT, and reliable asynchronous task scheduling through Django signa
 from django.contrib.auth import get_user_model
 from app_videos.models import Video
 from django.urls import reverse
-from django.http import FileResponse
 from unittest.mock import Mock, patch
 from django.core.files.uploadedfile import SimpleUploadedFile
 
@@ -75,7 +74,7 @@ def test_serve_hls_playlist_success(auth_client):
     Sends a GET request for a specific .m3u8 playlist as an authenticated user and
     checks that:
       - the request is successful (HTTP 200),
-      - the response is a Django FileResponse,
+      - the playlist is not stored in shared caches (its segment URIs are signed),
       - the content type is correct for an HLS playlist.
     """
     video = Video.objects.create(
@@ -87,7 +86,7 @@ def test_serve_hls_playlist_success(auth_client):
     url = "/api/video/1/480p/index.m3u8"
     response = auth_client.get(url)
     assert response.status_code == 200
-    assert isinstance(response, FileResponse)
+    assert response['Cache-Control'] == 'private, no-cache'
     assert response['Content-Type'] == 'application/vnd.apple.mpegurl'
 
 
@@ -107,13 +106,11 @@ def run_on_commit_immediately(func):
 
 def test_video_post_save_signal_enqueues_tasks(db):
     """
-    Ensures the Video post_save signal enqueues conversion/master tasks.
+    Ensures the Video post_save signal enqueues the scheduling job on the short transcode queue.
 
     This test mocks the RQ queue and creates a new Video instance with a video_file,
-    then verifies that the signal handler enqueues 4 tasks:
-        - 3 for HLS conversion (480p, 720p, 1080p)
-        - 1 for thumbnail creation
-        - 1 for master playlist creation
+    then verifies that the signal handler enqueues exactly one task, `schedule_video`,
+    which probes the source and enqueues the rest of the pipeline (see test_scheduling.py).
     """
     with patch("django_rq.get_queue") as mock_get_queue:
         mock_queue = mock_get_queue.return_value
@@ -128,4 +125,6 @@ def test_video_post_save_signal_enqueues_tasks(db):
                 category="Test"
             )
         
-        assert mock_queue.enqueue.call_count == 5
+        assert mock_queue.enqueue.call_count == 1
+        assert mock_queue.enqueue.call_args.args[0].__name__ == "schedule_video"
+        mock_get_queue.assert_called_once_with("transcode_short", autocommit=True)
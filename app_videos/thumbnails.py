@@ -0,0 +1,84 @@
+"""
+Responsive thumbnail helpers
+
+This module uses Pillow to turn the full-size thumbnail of a video into small,
+compressed variants (WebP and optionally AVIF/JPEG) at a few standard widths,
+so list pages can load an image that matches the size of the tile.
+
+Constants:
+    THUMBNAIL_FORMATS (dict): Pillow format name, file extension, MIME type and save options per variant format.
+    VARIANT_DIR (str): Directory of the variants, relative to MEDIA_ROOT.
+
+Functions:
+    supported_formats(formats): Returns the requested formats the installed Pillow can encode.
+    variant_widths(source_width, widths): Returns the widths to generate without upscaling.
+    write_thumbnail_variants(src, stem, widths, formats): Writes the variants of an image and returns their paths.
+"""
+
+from pathlib import Path
+from django.conf import settings
+from PIL import Image, features
+
+
+THUMBNAIL_FORMATS = {
+    "avif": {"format": "AVIF", "extension": "avif", "content_type": "image/avif", "options": {"quality": 60}},
+    "webp": {"format": "WEBP", "extension": "webp", "content_type": "image/webp", "options": {"quality": 80, "method": 4}},
+    "jpeg": {"format": "JPEG", "extension": "jpg", "content_type": "image/jpeg",
+             "options": {"quality": 80, "optimize": True, "progressive": True}},
+}
+
+VARIANT_DIR = "thumbnail/variants"
+
+
+def supported_formats(formats):
+    """
+    Returns the requested variant formats that are known and that the installed Pillow can encode.
+    """
+    return [
+        name for name in formats
+        if name in THUMBNAIL_FORMATS and (name == "jpeg" or features.check(name))
+    ]
+
+
+def variant_widths(source_width, widths):
+    """
+    Returns the variant widths to generate for a source image without upscaling.
+
+    Widths above the source width are dropped; a source narrower than every
+    width gets a single variant at its own width.
+    """
+    selected = sorted(width for width in widths if width <= source_width)
+    return selected or [source_width]
+
+
+def write_thumbnail_variants(src, stem, widths, formats):
+    """
+    Writes resized, compressed variants of a thumbnail image.
+
+    Args:
+        src (Path): Full-size source image.
+        stem (str): File name prefix of the variants (e.g. 'image5').
+        widths (list): Target widths in pixels.
+        formats (list): Variant format names (keys of THUMBNAIL_FORMATS).
+
+    Returns:
+        dict: Variant paths relative to MEDIA_ROOT per format and width,
+            e.g. {'webp': {'320': 'thumbnail/variants/image5_320.webp'}}.
+    """
+    dest_dir = Path(settings.MEDIA_ROOT) / VARIANT_DIR
+    dest_dir.mkdir(parents=True, exist_ok=True)
+    variants = {}
+
+    with Image.open(src) as image:
+        image = image.convert("RGB")
+        for width in variant_widths(image.width, widths):
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.Resampling.LANCZOS)
+
+            for name in supported_formats(formats):
+                spec = THUMBNAIL_FORMATS[name]
+                dest = dest_dir / f"{stem}_{width}.{spec['extension']}"
+                resized.save(dest, spec["format"], **spec["options"])
+                variants.setdefault(name, {})[str(width)] = str(dest.relative_to(settings.MEDIA_ROOT))
+
+    return variants
@@ -0,0 +1,97 @@
+"""
+Trickplay (seek preview) helpers
+
+Trickplay images are small video frames taken every
+settings.VIDEO_TRICKPLAY_INTERVAL seconds and tiled into JPEG sprite sheets.
+A WebVTT track maps every interval to its tile (`sprite_000.jpg#xywh=x,y,w,h`),
+so players can show seek previews by loading a few sprite sheets instead of
+media segments.
+
+Constants:
+    TRICKPLAY_DIR (str): Name of the trickplay directory inside MEDIA_ROOT/video/<video_id>/.
+    TRICKPLAY_INDEX (str): File name of the WebVTT index.
+
+Functions:
+    tile_size(video): Returns the (width, height) of one trickplay tile for the probed source.
+    trickplay_filter(video): Returns the FFmpeg filter chain that turns decoded frames into sprite sheets.
+    trickplay_output_args(output_dir): Returns the FFmpeg output arguments for the sprite sheets.
+    write_trickplay_vtt(path, duration, width, height): Writes the WebVTT index of the sprite sheets.
+"""
+
+import math
+from pathlib import Path
+from django.conf import settings
+
+
+TRICKPLAY_DIR = "trickplay"
+TRICKPLAY_INDEX = "thumbnails.vtt"
+
+
+def tile_size(video):
+    """
+    Returns the (width, height) of one trickplay tile.
+
+    The width is settings.VIDEO_TRICKPLAY_WIDTH; the height keeps the aspect
+    ratio of the probed source and is rounded to an even number (16:9 if unknown).
+    """
+    width = settings.VIDEO_TRICKPLAY_WIDTH
+    if video.width and video.height:
+        height = max(2, round(width * video.height / video.width / 2) * 2)
+    else:
+        height = round(width * 9 / 16 / 2) * 2
+    return width, height
+
+
+def trickplay_filter(video):
+    """
+    Returns the FFmpeg filter chain that samples one frame per interval and tiles the frames into sprite sheets.
+    """
+    width, height = tile_size(video)
+    grid = settings.VIDEO_TRICKPLAY_GRID
+    return f"fps=1/{settings.VIDEO_TRICKPLAY_INTERVAL},scale={width}:{height},tile={grid}x{grid}"
+
+
+def trickplay_output_args(output_dir):
+    """
+    Returns the FFmpeg output arguments that write the sprite sheets as sprite_000.jpg, sprite_001.jpg, ...
+    """
+    return ["-an", "-q:v", "5", "-start_number", "0", "-f", "image2", str(output_dir / "sprite_%03d.jpg")]
+
+
+def format_timestamp(seconds):
+    """
+    Formats seconds as a WebVTT timestamp (HH:MM:SS.mmm).
+    """
+    milliseconds = round(seconds * 1000)
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{milliseconds:03d}"
+
+
+def write_trickplay_vtt(path, duration, width, height):
+    """
+    Writes the WebVTT index that maps every trickplay interval to its tile in a sprite sheet.
+
+    Args:
+        path (Path): Destination path of the .vtt file, next to the sprite sheets.
+        duration (float): Source duration in seconds.
+        width (int): Tile width in pixels.
+        height (int): Tile height in pixels.
+    """
+    interval = settings.VIDEO_TRICKPLAY_INTERVAL
+    grid = settings.VIDEO_TRICKPLAY_GRID
+    lines = ["WEBVTT", ""]
+
+    for index in range(max(1, math.ceil(duration / interval))):
+        start = index * interval
+        end = min(start + interval, duration) if duration else start + interval
+        sheet, position = divmod(index, grid * grid)
+        row, column = divmod(position, grid)
+        lines += [
+            f"{format_timestamp(start)} --> {format_timestamp(end)}",
+            f"sprite_{sheet:03d}.jpg#xywh={column * width},{row * height},{width},{height}",
+            "",
+        ]
+
+    Path(path).write_text("\n".join(lines))
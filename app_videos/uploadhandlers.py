@@ -0,0 +1,49 @@
+"""
+Upload handlers for video files
+
+These handlers extend Django's default upload handlers so every uploaded file is
+hashed (SHA-256) while its chunks are being received. The hex digest is attached
+to the resulting UploadedFile as `sha256`, so identical uploads can be detected
+without reading the file a second time.
+
+Classes:
+    HashingUploadHandlerMixin: Adds incremental SHA-256 hashing to an upload handler.
+    HashingMemoryFileUploadHandler: MemoryFileUploadHandler with hashing (small files).
+    HashingTemporaryFileUploadHandler: TemporaryFileUploadHandler with hashing (large files).
+"""
+
+import hashlib
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+
+
+class HashingUploadHandlerMixin:
+    """
+    Hashes the received chunks of an upload and stores the digest on the uploaded file.
+
+    A MemoryFileUploadHandler that is not activated (file too large) only passes
+    its chunks on to the next handler, so it skips hashing to avoid hashing twice.
+    """
+
+    def new_file(self, *args, **kwargs):
+        # Set before super(): the memory handler stops the handler chain by raising
+        self.sha256 = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        if getattr(self, "activated", True):
+            self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.sha256 = self.sha256.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(HashingUploadHandlerMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadHandlerMixin, TemporaryFileUploadHandler):
+    pass
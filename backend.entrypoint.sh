@@ -63,9 +63,12 @@ else:
     print(f"Guest user '{guest_username}' already exists.")
 EOF
 
-# Start a background worker (using django-rq)
-# '&' runs it in the background so the script can continue
+# Start the background workers (using django-rq)
+# '&' runs them in the background so the script can continue
+# - the first one only serves 'default' (e-mails, finalize jobs), so these never wait behind a running transcode
+# - the second one takes 'default' jobs first as well, then transcodes from the shortest to the longest queue
 python manage.py rqworker default &
+python manage.py rqworker default transcode_short transcode transcode_long &
 
 # Finally, start Gunicorn (the production WSGI server for Django).
 # - exec replaces the current shell process with Gunicorn (important for Docker)
@@ -2,11 +2,27 @@ import pytest
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
 from app_videos.models import Video
+from app_videos.playlist_cache import clear_local_playlists
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from unittest.mock import patch
 
 User = get_user_model()
 
+
+@pytest.fixture(autouse=True)
+def local_cache(settings):
+    """
+    Replaces the Redis cache with an empty local-memory cache for every test.
+
+    Transcode progress and cached playlists are stored in the cache, so tests
+    must neither depend on a reachable Redis server nor see entries of earlier
+    tests; the in-process playlist tier is emptied as well.
+    """
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    cache.clear()
+    clear_local_playlists()
+
 @pytest.fixture
 def register_test_user():
     """
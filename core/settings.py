@@ -14,7 +14,7 @@ import os
 from pathlib import Path
 from datetime import timedelta
 from dotenv import load_dotenv
-from decouple import config
+from decouple import config, Csv
 
 load_dotenv()
 
@@ -124,7 +124,94 @@ RQ_QUEUES = {
         'DEFAULT_TIMEOUT': 1800,
         'REDIS_CLIENT_KWARGS': {},
     },
+    # FFmpeg jobs only, spread over three queues by estimated cost. Transcode workers
+    # listen in the order default, transcode_short, transcode, transcode_long, and a
+    # separate worker serves 'default' alone, so e-mails and finalize jobs never wait
+    # behind the transcode backlog or a running encode.
+    'transcode_short': {
+        'HOST': os.environ.get("REDIS_HOST", default="redis"),
+        'PORT': os.environ.get("REDIS_PORT", default=6379),
+        'DB': os.environ.get("REDIS_DB", default=0),
+        'DEFAULT_TIMEOUT': 1800,
+        'REDIS_CLIENT_KWARGS': {},
+    },
+    'transcode': {
+        'HOST': os.environ.get("REDIS_HOST", default="redis"),
+        'PORT': os.environ.get("REDIS_PORT", default=6379),
+        'DB': os.environ.get("REDIS_DB", default=0),
+        'DEFAULT_TIMEOUT': 7200,
+        'REDIS_CLIENT_KWARGS': {},
+    },
+    'transcode_long': {
+        'HOST': os.environ.get("REDIS_HOST", default="redis"),
+        'PORT': os.environ.get("REDIS_PORT", default=6379),
+        'DB': os.environ.get("REDIS_DB", default=0),
+        'DEFAULT_TIMEOUT': 6 * 3600,
+        'REDIS_CLIENT_KWARGS': {},
+    },
+}
+
+# Video transcoding
+# 'ladder': decode the source once and write all HLS renditions from one FFmpeg process
+# 'per_rendition': run one FFmpeg job per rendition
+# 'chunked': split the source at keyframes and transcode the chunks in parallel (long uploads)
+VIDEO_TRANSCODE_MODE = config('VIDEO_TRANSCODE_MODE', default='ladder')
+VIDEO_CHUNK_SECONDS = config('VIDEO_CHUNK_SECONDS', default=60, cast=int)
+VIDEO_CHUNK_WORKERS = config('VIDEO_CHUNK_WORKERS', default=os.cpu_count() or 1, cast=int)
+# HLS segment container: 'mpegts' (.ts) or 'fmp4' (CMAF fragmented MP4 with an init segment)
+VIDEO_HLS_SEGMENT_TYPE = config('VIDEO_HLS_SEGMENT_TYPE', default='mpegts')
+# Write one media file per rendition and address the segments with #EXT-X-BYTERANGE
+VIDEO_HLS_SINGLE_FILE = config('VIDEO_HLS_SINGLE_FILE', default=False, cast=bool)
+# Per-title encoding: derive the video bitrates of every title from a fast CRF complexity probe
+# on VIDEO_COMPLEXITY_SAMPLES samples of VIDEO_COMPLEXITY_SAMPLE_SECONDS each
+VIDEO_PER_TITLE = config('VIDEO_PER_TITLE', default=False, cast=bool)
+VIDEO_COMPLEXITY_SAMPLES = config('VIDEO_COMPLEXITY_SAMPLES', default=4, cast=int)
+VIDEO_COMPLEXITY_SAMPLE_SECONDS = config('VIDEO_COMPLEXITY_SAMPLE_SECONDS', default=5, cast=int)
+# Upper transcode cost bounds (seconds of 1080p output summed over all renditions) of the
+# 'transcode_short' and 'transcode' queues; more expensive jobs go to 'transcode_long'
+VIDEO_SCHEDULER_COST_THRESHOLDS = config('VIDEO_SCHEDULER_COST_THRESHOLDS', default='1000,5000', cast=Csv(int))
+# FFmpeg threads per transcode process; 0 shares the worker's cores between VIDEO_WORKERS_PER_HOST workers
+VIDEO_FFMPEG_THREADS = config('VIDEO_FFMPEG_THREADS', default=0, cast=int)
+VIDEO_WORKERS_PER_HOST = config('VIDEO_WORKERS_PER_HOST', default=1, cast=int)
+# Seconds to wait before each automatic retry of a failed (or killed) processing job
+VIDEO_TRANSCODE_RETRY_INTERVALS = config('VIDEO_TRANSCODE_RETRY_INTERVALS', default='60,300,900', cast=Csv(int))
+# Transcode the lowest rendition first and publish the video as soon as it is ready; the higher renditions
+# are added to the master playlist as they finish. In 'ladder' and 'chunked' mode this decodes the source
+# a second time for the lowest rendition, so it is opt-in
+VIDEO_PROGRESSIVE_PUBLISH = config('VIDEO_PROGRESSIVE_PUBLISH', default=False, cast=bool)
+# Fast local directory (e.g. NVMe or tmpfs) receiving the FFmpeg output before a finished rendition is
+# moved into MEDIA_ROOT; defaults to MEDIA_ROOT/scratch. Transcode jobs only start if the scratch and media
+# volumes keep VIDEO_MIN_FREE_SPACE bytes free beyond the estimated output size
+VIDEO_SCRATCH_ROOT = config('VIDEO_SCRATCH_ROOT', default='')
+VIDEO_MIN_FREE_SPACE = config('VIDEO_MIN_FREE_SPACE', default=1024 ** 3, cast=int)
+# Trickplay seek previews: one tile every INTERVAL seconds, WIDTH pixels wide, GRID x GRID tiles per sprite sheet
+VIDEO_TRICKPLAY = config('VIDEO_TRICKPLAY', default=True, cast=bool)
+VIDEO_TRICKPLAY_INTERVAL = config('VIDEO_TRICKPLAY_INTERVAL', default=10, cast=int)
+VIDEO_TRICKPLAY_WIDTH = config('VIDEO_TRICKPLAY_WIDTH', default=160, cast=int)
+VIDEO_TRICKPLAY_GRID = config('VIDEO_TRICKPLAY_GRID', default=10, cast=int)
+# Responsive thumbnail variants: widths in pixels and formats ('webp', 'avif', 'jpeg')
+VIDEO_THUMBNAIL_WIDTHS = config('VIDEO_THUMBNAIL_WIDTHS', default='320,640,1280', cast=Csv(int))
+VIDEO_THUMBNAIL_FORMATS = config('VIDEO_THUMBNAIL_FORMATS', default='webp', cast=Csv())
+# Delivery of playlists, segments, thumbnails and trickplay files after authentication:
+# 'django' streams them from the worker, 'x-accel-redirect' (nginx) and 'x-sendfile' (Apache, lighttpd)
+# let the front proxy send them. nginx needs an internal location at VIDEO_ACCEL_REDIRECT_PREFIX aliasing MEDIA_ROOT
+VIDEO_DELIVERY_BACKEND = config('VIDEO_DELIVERY_BACKEND', default='django')
+VIDEO_ACCEL_REDIRECT_PREFIX = config('VIDEO_ACCEL_REDIRECT_PREFIX', default='/protected-media/')
+# Segment URIs in served media playlists carry an HMAC-signed playback token valid for VIDEO_PLAYBACK_TOKEN_TTL
+# seconds, so segment requests skip JWT authentication; the key defaults to SECRET_KEY (share it with a CDN)
+VIDEO_PLAYBACK_TOKEN_TTL = config('VIDEO_PLAYBACK_TOKEN_TTL', default=4 * 3600, cast=int)
+VIDEO_PLAYBACK_TOKEN_KEY = config('VIDEO_PLAYBACK_TOKEN_KEY', default='')
+# Cache-Control of the served media; responses also carry ETag / Last-Modified and are revalidated with 304s.
+# Published segments never change, playlists are revalidated as the master playlist grows while renditions finish
+VIDEO_CACHE_CONTROL = {
+    'segment': config('VIDEO_CACHE_CONTROL_SEGMENT', default='public, max-age=31536000, immutable'),
+    'playlist': config('VIDEO_CACHE_CONTROL_PLAYLIST', default='private, no-cache'),
+    'thumbnail': config('VIDEO_CACHE_CONTROL_THUMBNAIL', default='private, max-age=86400'),
 }
+# Entries of the in-process tier of the media playlist cache (the shared tier is the default cache) and the
+# seconds an in-process entry is served before it is checked against the shared tier again
+VIDEO_PLAYLIST_CACHE_SIZE = config('VIDEO_PLAYLIST_CACHE_SIZE', default=1024, cast=int)
+VIDEO_PLAYLIST_LOCAL_TTL = config('VIDEO_PLAYLIST_LOCAL_TTL', default=5, cast=float)
 
 
 # Password validation
@@ -169,13 +256,18 @@ MEDIA_ROOT = BASE_DIR / "media"
 
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
-# FILE_UPLOAD_HANDLERS = [
-#     "django.core.files.uploadhandler.TemporaryFileUploadHandler",
-# ]
+# Hash uploads while they are received (used to detect duplicate video uploads)
+FILE_UPLOAD_HANDLERS = [
+    "app_videos.uploadhandlers.HashingMemoryFileUploadHandler",
+    "app_videos.uploadhandlers.HashingTemporaryFileUploadHandler",
+]
 
 # DATA_UPLOAD_MAX_MEMORY_SIZE = None
 # FILE_UPLOAD_MAX_MEMORY_SIZE = 0
 
+# Resumable upload API (api/upload/): largest accepted video file in bytes (default 20 GB)
+VIDEO_UPLOAD_MAX_SIZE = config('VIDEO_UPLOAD_MAX_SIZE', default=20 * 1024 ** 3, cast=int)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 